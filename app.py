@@ -4,19 +4,20 @@ Main application file for AI Influencer Content Generator
 
 import os
 import logging
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, stream_with_context, abort
 from werkzeug.utils import secure_filename
+import base64
+import io
 import json
 import time
 from PIL import Image
 
 # Import core modules
-from models.image_generator import ImageGenerator
-from models.persona_manager import PersonaManager
-from models.video_converter import ImageToVideoConverter
-from models.content_manager import ContentManager
+# ML modules (torch, diffusers, cv2) are imported lazily by IntegrationManager
+# and the validation stack is only loaded when /validate is requested
 from utils.integration import IntegrationManager
-from utils.validation import ValidationManager
+from utils.job_manager import JobManager, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED
+from models.cancellation import CancellationToken
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -38,7 +39,168 @@ data_dir = os.path.join(base_dir, 'data')
 os.makedirs(data_dir, exist_ok=True)
 
 integration_manager = IntegrationManager(base_dir=base_dir)
-validation_manager = ValidationManager(base_dir=base_dir)
+validation_manager = None
+
+def get_validation_manager():
+    """
+    Create the validation manager on first use
+    
+    Returns:
+        ValidationManager: Shared validation manager
+    """
+    global validation_manager
+    if validation_manager is None:
+        from utils.validation import ValidationManager
+        validation_manager = ValidationManager(base_dir=base_dir)
+    return validation_manager
+
+# Background jobs, web processes only submit them and worker.py runs them
+job_manager = JobManager(
+    storage_dir=os.path.join(data_dir, 'jobs'),
+    num_workers=int(os.environ.get('JOB_WORKERS', 0))
+)
+
+# Seconds between job store polls while streaming a generation
+STREAM_POLL_INTERVAL = 0.25
+
+def encode_preview_image(image, quality=70):
+    """
+    Encode an image as a JPEG data URL for server-sent events
+    
+    Args:
+        image (PIL.Image): Image to encode
+        quality (int): JPEG quality
+        
+    Returns:
+        str: Data URL
+    """
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=quality)
+    return 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def run_stream_image_job(params, progress):
+    """
+    Generate a single image in a job worker, publishing previews as job progress
+    
+    Args:
+        params (dict): Job parameters ('prompt', 'persona_id', 'settings', 'preview_interval', 'timeout')
+        progress (callable): Job progress callback
+        
+    Returns:
+        dict: Final 'step', 'num_steps', 'image' data URL and 'content_id'
+    """
+    def preview_callback(step, num_steps, image):
+        progress(0.9 * step / num_steps, f"Denoising step {step}/{num_steps}", preview={
+            "step": step,
+            "num_steps": num_steps,
+            "image": encode_preview_image(image)
+        })
+    
+    result = integration_manager.stream_image_workflow(
+        params.get('prompt'),
+        persona_id=params.get('persona_id'),
+        settings=params.get('settings'),
+        preview_callback=preview_callback,
+        preview_interval=params.get('preview_interval'),
+        progress_callback=progress,
+        cancel_token=CancellationToken(timeout=params.get('timeout'))
+    )
+    
+    return {
+        "step": result['num_steps'],
+        "num_steps": result['num_steps'],
+        "image": encode_preview_image(result['image'], quality=95),
+        "content_id": result['content']['id'] if result['content'] else None
+    }
+
+def register_job_handlers(manager):
+    """
+    Register the IntegrationManager workflows as background job types
+    
+    Generation jobs accept an optional 'timeout' parameter in seconds after
+    which their remaining work is abandoned.
+    
+    Args:
+        manager (JobManager): Job manager to register the handlers with
+    """
+    manager.register_handler('create_persona', lambda params, progress: integration_manager.create_persona_workflow(
+        name=params.get('name'),
+        reference_image=params.get('reference_image'),
+        description=params.get('description'),
+        attributes=params.get('attributes'),
+        progress_callback=progress,
+        cancel_token=CancellationToken(timeout=params.get('timeout'))
+    ))
+    manager.register_handler('generate_content', lambda params, progress: integration_manager.generate_content_workflow(
+        persona_id=params.get('persona_id'),
+        content_type=params.get('content_type'),
+        settings=params.get('settings'),
+        count=params.get('count', 1),
+        progress_callback=progress,
+        cancel_token=CancellationToken(timeout=params.get('timeout'))
+    ))
+    manager.register_handler('generate_preview', lambda params, progress: integration_manager.generate_preview_workflow(
+        persona_id=params.get('persona_id'),
+        content_type=params.get('content_type'),
+        settings=params.get('settings'),
+        count=params.get('count', 4),
+        progress_callback=progress,
+        cancel_token=CancellationToken(timeout=params.get('timeout'))
+    ))
+    manager.register_handler('upscale_content', lambda params, progress: integration_manager.upscale_content_workflow(
+        content_ids=params.get('content_ids', []),
+        settings=params.get('settings'),
+        progress_callback=progress,
+        cancel_token=CancellationToken(timeout=params.get('timeout'))
+    ))
+    manager.register_handler('create_video', lambda params, progress: integration_manager.create_video_workflow(
+        image_id=params.get('image_id'),
+        video_type=params.get('video_type', 'animate'),
+        settings=params.get('settings'),
+        progress_callback=progress
+    ))
+    manager.register_handler('create_video_batch', lambda params, progress: integration_manager.create_video_batch_workflow(
+        items=[(item['image_id'], item.get('motion_type', 'subtle'), item.get('duration', 5))
+               for item in params.get('items', [])],
+        settings=params.get('settings'),
+        progress_callback=progress
+    ))
+    manager.register_handler('export', lambda params, progress: integration_manager.export_workflow(
+        content_ids=params.get('content_ids', []),
+        export_format=params.get('export_format', 'original'),
+        platform=params.get('platform'),
+        progress_callback=progress
+    ))
+    manager.register_handler('stream_image', run_stream_image_job)
+
+register_job_handlers(job_manager)
+
+def start_job_workers(num_workers=None):
+    """
+    Run background jobs in this process
+    
+    Called from worker.py and the development server, never on import, so
+    web processes stay submit-only. Generation worker processes are forked
+    first, before any job thread can run inference.
+    
+    Args:
+        num_workers (int): Job worker threads (None for JOB_WORKERS)
+    """
+    if num_workers is None:
+        num_workers = job_manager.num_workers
+    if num_workers <= 0:
+        return
+    
+    integration_manager.start_generation_workers()
+    job_manager.start(num_workers)
+    
+    # Optionally load models up front so the first job does not pay for it,
+    # e.g. WARM_START_MODELS=stabilityai/stable-diffusion-3-medium. Only job
+    # workers generate, and render processes re-import app without loading models
+    warm_start_models = [m.strip() for m in os.environ.get('WARM_START_MODELS', '').split(',') if m.strip()]
+    if warm_start_models:
+        from models.image_generator import warm_up_models
+        warm_up_models(warm_start_models)
 
 # Create placeholder images for development
 def create_placeholder_images():
@@ -156,17 +318,15 @@ def create_persona():
             attributes["additional_notes"] = request.form.get('additional_notes')
         
         try:
-            # Create persona
-            # For MVP, we'll simulate this without actually calling the integration manager
-            # persona = integration_manager.create_persona_workflow(
-            #     name=name,
-            #     reference_image=reference_image,
-            #     description=description,
-            #     attributes=attributes
-            # )
+            # Create persona in the background
+            job = job_manager.submit_job('create_persona', {
+                "name": name,
+                "reference_image": reference_image,
+                "description": description,
+                "attributes": attributes
+            })
             
-            # Simulate success
-            flash('Persona created successfully!', 'success')
+            flash(f'Persona creation started (job {job["id"]})', 'success')
             return redirect(url_for('dashboard'))
             
         except Exception as e:
@@ -202,17 +362,15 @@ def generate_content():
         }
         
         try:
-            # Generate content
-            # For MVP, we'll simulate this without actually calling the integration manager
-            # content_items = integration_manager.generate_content_workflow(
-            #     persona_id=persona_id,
-            #     content_type=content_type,
-            #     settings=settings,
-            #     count=quantity
-            # )
+            # Generate content in the background
+            job = job_manager.submit_job('generate_content', {
+                "persona_id": persona_id,
+                "content_type": content_type,
+                "settings": settings,
+                "count": quantity
+            })
             
-            # Simulate success
-            flash('Content generated successfully!', 'success')
+            flash(f'Content generation started (job {job["id"]})', 'success')
             return redirect(url_for('gallery'))
             
         except Exception as e:
@@ -247,16 +405,14 @@ def create_video():
             settings["target_video"] = target_video
         
         try:
-            # Create video
-            # For MVP, we'll simulate this without actually calling the integration manager
-            # video_content = integration_manager.create_video_workflow(
-            #     image_id=image_id,
-            #     video_type=video_type,
-            #     settings=settings
-            # )
+            # Create video in the background
+            job = job_manager.submit_job('create_video', {
+                "image_id": image_id,
+                "video_type": video_type,
+                "settings": settings
+            })
             
-            # Simulate success
-            flash('Video created successfully!', 'success')
+            flash(f'Video creation started (job {job["id"]})', 'success')
             return redirect(url_for('gallery'))
             
         except Exception as e:
@@ -265,18 +421,86 @@ def create_video():
     
     return render_template('create_video.html')
 
+# Content files served by /content/<content_id>/<kind>, by content data key
+CONTENT_FILES = {
+    'file': 'file_path',
+    'thumbnail': 'thumbnail_path',
+    'preview': 'preview_path',
+    'poster': 'poster_path'
+}
+
+def get_content_page_args():
+    """
+    Read the content listing filters and page parameters of the current request
+    
+    Returns:
+        dict: Keyword arguments for ContentManager.list_content_page
+    """
+    return {
+        "content_type": request.args.get('type'),
+        "persona_id": request.args.get('persona_id'),
+        "filters": {name: request.args.get(name) for name in ('content_type', 'style', 'platform')
+                    if request.args.get(name)},
+        "limit": request.args.get('limit', 50, type=int),
+        "cursor": request.args.get('cursor')
+    }
+
+def serialize_content(content):
+    """
+    Convert content data to a listing item with URLs instead of file paths
+    
+    Videos are shown by their poster and played from their preview proxy,
+    so listings never point the browser at the full-quality file.
+    
+    Args:
+        content (dict): Content data
+        
+    Returns:
+        dict: Listing item
+    """
+    item = {
+        "id": content["id"],
+        "type": content["type"],
+        "persona_id": content.get("persona_id"),
+        "created_at": content.get("created_at"),
+        "metadata": content.get("metadata", {})
+    }
+    for kind, key in CONTENT_FILES.items():
+        if content.get(key):
+            item[f"{kind}_url"] = url_for('content_file', content_id=content["id"], kind=kind)
+    
+    item["path"] = item.get("poster_url") or item.get("thumbnail_url") or item.get("file_url")
+    return item
+
+@app.route('/content/<content_id>/<kind>')
+def content_file(content_id, kind):
+    if kind not in CONTENT_FILES:
+        abort(404)
+    
+    content = integration_manager.content_manager.get_content(content_id)
+    file_path = content.get(CONTENT_FILES[kind]) if content else None
+    if not file_path or not os.path.exists(file_path):
+        abort(404)
+    
+    # Content files never change once saved
+    return send_file(os.path.abspath(file_path), max_age=86400)
+
 @app.route('/gallery')
 def gallery():
-    # Get all content
-    # For MVP, we'll use placeholder data
-    content_items = [
-        {"id": "1", "type": "image", "path": url_for('static', filename='img/example-1.jpg'), "created_at": "2025-06-01"},
-        {"id": "2", "type": "image", "path": url_for('static', filename='img/example-2.jpg'), "created_at": "2025-06-01"},
-        {"id": "3", "type": "video", "path": url_for('static', filename='img/example-3.jpg'), "created_at": "2025-06-01"},
-        {"id": "4", "type": "image", "path": url_for('static', filename='img/placeholder.jpg'), "created_at": "2025-06-01"}
-    ]
+    page_args = get_content_page_args()
+    try:
+        page = integration_manager.content_manager.list_content_page(**page_args)
+    except ValueError as e:
+        flash(str(e), 'error')
+        page = integration_manager.content_manager.list_content_page(**dict(page_args, cursor=None))
+    
+    content_items = [serialize_content(content) for content in page["items"]]
+    
+    next_url = None
+    if page["next_cursor"]:
+        next_url = url_for('gallery', **dict(request.args.to_dict(), cursor=page["next_cursor"]))
     
-    return render_template('gallery.html', content_items=content_items)
+    return render_template('gallery.html', content_items=content_items, next_url=next_url)
 
 @app.route('/export', methods=['GET', 'POST'])
 def export():
@@ -287,16 +511,14 @@ def export():
         platform = request.form.get('platform')
         
         try:
-            # Export content
-            # For MVP, we'll simulate this without actually calling the integration manager
-            # export_path = integration_manager.export_workflow(
-            #     content_ids=content_ids,
-            #     export_format=export_format,
-            #     platform=platform
-            # )
+            # Export content in the background
+            job = job_manager.submit_job('export', {
+                "content_ids": content_ids,
+                "export_format": export_format,
+                "platform": platform
+            })
             
-            # Simulate success
-            flash('Content exported successfully!', 'success')
+            flash(f'Content export started (job {job["id"]})', 'success')
             return redirect(url_for('gallery'))
             
         except Exception as e:
@@ -317,7 +539,7 @@ def export():
 def validate():
     try:
         # Run validation
-        results = validation_manager.run_comprehensive_validation(output_report=True)
+        results = get_validation_manager().run_comprehensive_validation(output_report=True)
         return render_template('validation.html', results=results)
         
     except Exception as e:
@@ -339,15 +561,130 @@ def api_personas():
 
 @app.route('/api/content', methods=['GET'])
 def api_content():
-    # Get all content
-    # For MVP, we'll use placeholder data
-    content_items = [
-        {"id": "1", "type": "image", "path": url_for('static', filename='img/example-1.jpg'), "created_at": "2025-06-01"},
-        {"id": "2", "type": "image", "path": url_for('static', filename='img/example-2.jpg'), "created_at": "2025-06-01"},
-        {"id": "3", "type": "video", "path": url_for('static', filename='img/example-3.jpg'), "created_at": "2025-06-01"}
-    ]
+    # Keyset-paginated listing, follow next_cursor until it is null
+    try:
+        page = integration_manager.content_manager.list_content_page(**get_content_page_args())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify(content_items)
+    return jsonify({
+        "items": [serialize_content(content) for content in page["items"]],
+        "next_cursor": page["next_cursor"]
+    })
+
+@app.route('/api/generate/stream', methods=['POST'])
+def api_generate_stream():
+    # Stream intermediate previews and the final image as server-sent events.
+    # A job worker generates the image, this process only relays the job's previews
+    data = request.get_json(silent=True) or {}
+    prompt = data.get('prompt')
+    if not prompt:
+        return jsonify({"error": "prompt is required"}), 400
+    
+    # Reject bad values here, once the stream is open errors can only be sent as events
+    preview_interval = data.get('preview_interval')
+    if preview_interval is not None and (isinstance(preview_interval, bool) or not isinstance(preview_interval, int)
+                                         or preview_interval <= 0):
+        return jsonify({"error": f"preview_interval must be a positive integer, got {preview_interval!r}"}), 400
+    
+    timeout = data.get('timeout')
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                or not timeout > 0):
+        return jsonify({"error": f"timeout must be a positive number of seconds, got {timeout!r}"}), 400
+    
+    job = job_manager.submit_job('stream_image', {
+        'prompt': prompt,
+        'persona_id': data.get('persona_id'),
+        'settings': data.get('settings'),
+        'preview_interval': preview_interval,
+        'timeout': timeout
+    })
+    
+    def events():
+        # Closing the stream (e.g. the client disconnecting) cancels the job
+        finished = False
+        last_step = None
+        try:
+            while True:
+                job_data = job_manager.get_job(job['id'])
+                if job_data is None:
+                    raise RuntimeError("Generation job was removed")
+                
+                preview = job_data.get('preview')
+                if preview and preview['step'] != last_step:
+                    last_step = preview['step']
+                    yield f"event: preview\ndata: {json.dumps(preview)}\n\n"
+                
+                if job_data['status'] == JOB_COMPLETED:
+                    finished = True
+                    yield f"event: complete\ndata: {json.dumps(job_data['result'])}\n\n"
+                    return
+                if job_data['status'] in (JOB_FAILED, JOB_CANCELLED):
+                    finished = True
+                    error = job_data.get('error', f"Generation job was {job_data['status']}")
+                    yield f"event: error\ndata: {json.dumps({'error': error})}\n\n"
+                    return
+                
+                # Comment lines keep proxies from timing out and reveal disconnected clients
+                yield ": waiting\n\n"
+                time.sleep(STREAM_POLL_INTERVAL)
+        
+        except Exception as e:
+            logger.error(f"Error streaming generation: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+        
+        finally:
+            if not finished:
+                job_manager.cancel_job(job['id'])
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def api_jobs():
+    if request.method == 'POST':
+        # Submit a new job
+        data = request.get_json(silent=True) or {}
+        job_type = data.get('type')
+        if job_type not in job_manager.get_job_types():
+            return jsonify({"error": f"Unknown job type: {job_type}"}), 400
+        
+        priority = data.get('priority', 0)
+        if isinstance(priority, bool) or not isinstance(priority, int):
+            return jsonify({"error": f"Job priority must be an integer, got {priority!r}"}), 400
+        
+        job = job_manager.submit_job(job_type, data.get('params', {}), priority=priority)
+        return jsonify(job), 202
+    
+    # List jobs
+    return jsonify(job_manager.list_jobs(status=request.args.get('status')))
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    job = job_manager.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def api_job_cancel(job_id):
+    job = job_manager.cancel_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def api_job_result(job_id):
+    job = job_manager.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    
+    if job["status"] != JOB_COMPLETED:
+        return jsonify({"error": f"Job is {job['status']}", "status": job["status"]}), 409
+    
+    return jsonify({"id": job["id"], "result": job["result"]})
 
 # Error handlers
 @app.errorhandler(404)
@@ -362,5 +699,9 @@ if __name__ == '__main__':
     # Create placeholder images for development
     create_placeholder_images()
     
+    # The development server runs jobs itself, the debug reloader's watcher process must not
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_job_workers(int(os.environ.get('JOB_WORKERS', 2)))
+    
     # Run the app
     app.run(host='0.0.0.0', port=5000, debug=True)
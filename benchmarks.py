@@ -0,0 +1,450 @@
+"""
+Benchmark utilities for AI Influencer Content Generator
+Measures startup and processing costs of the application modules
+"""
+
+import os
+import sys
+import json
+import logging
+import subprocess
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Modules measured by the import benchmark, lightest first
+DEFAULT_IMPORT_MODULES = [
+    "flask",
+    "models.content_manager",
+    "models.persona_manager",
+    "utils.job_manager",
+    "utils.integration",
+    "app",
+    "cv2",
+    "models.video_converter",
+    "utils.validation",
+    "torch",
+    "diffusers",
+    "models.image_generator"
+]
+
+# Script run in a fresh interpreter for each measured module
+_IMPORT_PROBE = """
+import json, resource, sys, time
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+import importlib
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = [m for m in ("torch", "diffusers", "transformers", "cv2", "tensorflow") if m in sys.modules]
+print(json.dumps({"seconds": seconds, "rss_kb": after - before, "modules": len(sys.modules), "heavy": heavy}))
+"""
+
+def benchmark_imports(modules=None, top=5):
+    """
+    Measure the import cost of each module in a fresh interpreter
+
+    Args:
+        modules (list): Module names to import (None for DEFAULT_IMPORT_MODULES)
+        top (int): Number of slowest transitive imports to report per module
+
+    Returns:
+        list: One result dictionary per module
+    """
+    results = []
+    for module in modules or DEFAULT_IMPORT_MODULES:
+        result = {"module": module}
+        try:
+            # -X importtime reports cumulative microseconds for every imported module
+            completed = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", _IMPORT_PROBE, module],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=_get_probe_env()
+            )
+            if completed.returncode != 0:
+                result["error"] = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed"
+            else:
+                result.update(json.loads(completed.stdout.strip().splitlines()[-1]))
+                result["slowest"] = _parse_importtime(completed.stderr, top)
+
+        except Exception as e:
+            result["error"] = str(e)
+
+        results.append(result)
+        if "error" in result:
+            logger.info(f"{module}: {result['error']}")
+        else:
+            logger.info(f"{module}: {result['seconds']:.3f}s, +{result['rss_kb'] / 1024:.1f} MB, "
+                        f"heavy modules loaded: {', '.join(result['heavy']) or 'none'}")
+
+    return results
+
+def benchmark_quality_tiers(prompt="professional portrait of a business person, studio lighting",
+                            model_id=None, tiers=None, runs=2, width=512, height=512):
+    """
+    Compare generation latency of the quality tiers on CPU
+
+    The model is loaded and warmed up once before timing so only denoising
+    and decoding are measured.
+
+    Args:
+        prompt (str): Prompt used for every run
+        model_id (str): Model to benchmark (None for the ImageGenerator default)
+        tiers (list): Quality tiers to compare (None for all)
+        runs (int): Timed runs per tier
+        width (int): Requested image width before tier scaling
+        height (int): Requested image height before tier scaling
+
+    Returns:
+        list: One result dictionary per tier
+    """
+    import time
+    from models.image_generator import ImageGenerator
+    from models.quality_presets import QUALITY_PRESETS, get_generation_params
+
+    kwargs = {"device": "cpu"}
+    if model_id:
+        kwargs["model_id"] = model_id
+    generator = ImageGenerator(**kwargs)
+    generator.load_model()
+
+    # Warm-up run so one-time allocations are not attributed to the first tier
+    generator.generate_image(prompt, width=256, height=256, num_inference_steps=2, seed=0)
+
+    results = []
+    for tier in tiers or list(QUALITY_PRESETS):
+        params = get_generation_params({"quality": tier}, default_width=width, default_height=height)
+        timings = []
+        for run in range(runs):
+            start = time.perf_counter()
+            generator.generate_image(prompt, seed=run, **params)
+            timings.append(time.perf_counter() - start)
+
+        result = {
+            "tier": tier,
+            "scheduler": params["scheduler"],
+            "steps": params["num_inference_steps"],
+            "resolution": f"{params['width']}x{params['height']}",
+            "seconds_per_image": round(min(timings), 3),
+            "mean_seconds": round(sum(timings) / len(timings), 3)
+        }
+        results.append(result)
+        logger.info(f"{tier}: {result['seconds_per_image']}s/image ({result['steps']} steps, "
+                    f"{result['resolution']}, {result['scheduler']})")
+
+    return results
+
+def benchmark_cpu_backends(prompt="professional portrait of a business person, studio lighting",
+                           model_id=None, backends=None, runs=2, width=512, height=512,
+                           num_inference_steps=20, num_threads=None):
+    """
+    Compare generation latency of the CPU inference backends
+
+    Each backend is loaded and warmed up before timing, which for the
+    cpu_optimized backend includes compiling the UNet, and released from the
+    model pool afterwards so only one copy of the weights is resident.
+
+    Args:
+        prompt (str): Prompt used for every run
+        model_id (str): Model to benchmark (None for the ImageGenerator default)
+        backends (list): Backends to compare (None for all)
+        runs (int): Timed runs per backend
+        width (int): Image width
+        height (int): Image height
+        num_inference_steps (int): Denoising steps per image
+        num_threads (int): Intra-op CPU threads (None for the torch default)
+
+    Returns:
+        list: One result dictionary per backend
+    """
+    import time
+    from models.image_generator import BACKENDS, ImageGenerator
+
+    results = []
+    baseline = None
+    for backend in backends or list(BACKENDS):
+        kwargs = {"device": "cpu", "backend": backend, "num_threads": num_threads, "embedding_cache_bytes": 0}
+        if model_id:
+            kwargs["model_id"] = model_id
+        generator = ImageGenerator(**kwargs)
+        generator.load_model()
+
+        try:
+            # Warm-up run at the timed size so compilation is not measured
+            generator.generate_image(prompt, width=width, height=height, num_inference_steps=2, seed=0)
+
+            timings = []
+            for run in range(runs):
+                start = time.perf_counter()
+                generator.generate_image(prompt, width=width, height=height,
+                                         num_inference_steps=num_inference_steps, seed=run)
+                timings.append(time.perf_counter() - start)
+
+            result = {
+                "backend": backend,
+                "dtype": str(generator.pipeline.unet.dtype),
+                "seconds_per_image": round(min(timings), 3),
+                "mean_seconds": round(sum(timings) / len(timings), 3)
+            }
+
+        finally:
+            generator.model_pool.release(generator.model_id, generator.device, generator._pool_variant)
+
+        if baseline is None:
+            baseline = result["seconds_per_image"]
+        result["speedup"] = round(baseline / result["seconds_per_image"], 2)
+        results.append(result)
+        logger.info(f"{backend}: {result['seconds_per_image']}s/image ({result['dtype']}, "
+                    f"{result['speedup']}x vs {results[0]['backend']})")
+
+    return results
+
+def benchmark_animation_pipeline(image_path=None, duration=5, fps=30, motion_type="medium", runs=1):
+    """
+    Compare the disk-based, streaming and segment-parallel pipelines of animate_image
+
+    Peak temporary disk usage is sampled from a private temp directory while
+    each render runs.
+
+    Args:
+        image_path (str): Source image (None for a synthetic 1024x1024 image)
+        duration (int): Clip duration in seconds
+        fps (int): Frames per second
+        motion_type (str): Motion preset to render
+        runs (int): Timed runs per pipeline
+
+    Returns:
+        list: One result dictionary per pipeline
+    """
+    import tempfile
+    import threading
+    import time
+    from models.video_converter import ImageToVideoConverter
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if image_path is None:
+            image_path = _make_test_image(os.path.join(work_dir, "source.jpg"))
+
+        converter = ImageToVideoConverter(output_dir=os.path.join(work_dir, "videos"))
+        temp_root = os.path.join(work_dir, "tmp")
+        os.makedirs(temp_root)
+
+        results = []
+        pipelines = (("disk", False, 1), ("streaming", True, 1), ("segmented", True, max(2, os.cpu_count() or 1)))
+        for name, streaming, segments in pipelines:
+            timings = []
+            peak_bytes = 0
+            for _ in range(runs):
+                done = threading.Event()
+                peak = [0]
+
+                def sample():
+                    while not done.is_set():
+                        peak[0] = max(peak[0], _get_directory_bytes(temp_root))
+                        done.wait(0.02)
+
+                sampler = threading.Thread(target=sample, daemon=True)
+                previous_tempdir = tempfile.tempdir
+                tempfile.tempdir = temp_root
+                sampler.start()
+                try:
+                    start = time.perf_counter()
+                    output_path = converter.animate_image(image_path, duration=duration, motion_type=motion_type,
+                                                          fps=fps, streaming=streaming, segments=segments)
+                    timings.append(time.perf_counter() - start)
+                finally:
+                    done.set()
+                    sampler.join()
+                    tempfile.tempdir = previous_tempdir
+
+                peak_bytes = max(peak_bytes, peak[0])
+                output_bytes = os.path.getsize(output_path)
+                os.remove(output_path)
+
+            result = {
+                "pipeline": name,
+                "seconds": round(min(timings), 3),
+                "frames_per_second": round(duration * fps / min(timings), 1),
+                "peak_temp_bytes": peak_bytes,
+                "output_bytes": output_bytes
+            }
+            results.append(result)
+            logger.info(f"{name}: {result['seconds']}s ({result['frames_per_second']} frames/s), "
+                        f"peak temp disk {peak_bytes / 1024 ** 2:.1f} MB")
+
+    return results
+
+def benchmark_encoder_profiles(image_path=None, duration=5, fps=30, motion_type="medium",
+                               qualities=None, codecs=None):
+    """
+    Measure encode time and output size for each quality tier and codec
+
+    Frames are rendered for every encode, so the time of one render-only
+    pass is measured separately and subtracted.
+
+    Args:
+        image_path (str): Source image (None for a synthetic 1024x1024 image)
+        duration (int): Clip duration in seconds
+        fps (int): Frames per second
+        motion_type (str): Motion preset to render
+        qualities (list): Quality tiers to compare (None for all)
+        codecs (list): Codecs to compare (None for all)
+
+    Returns:
+        list: One result dictionary per quality and codec combination
+    """
+    import tempfile
+    import time
+    import cv2
+    from models.encoder_profiles import CODECS, ENCODER_PROFILES, get_encoder_profile
+    from models.motion import compute_trajectory, render_frames
+    from models.video_converter import ImageToVideoConverter
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if image_path is None:
+            image_path = _make_test_image(os.path.join(work_dir, "source.jpg"))
+
+        image = cv2.imread(image_path)
+        height, width = image.shape[:2]
+        converter = ImageToVideoConverter(output_dir=os.path.join(work_dir, "videos"))
+
+        start = time.perf_counter()
+        for _ in render_frames(image, compute_trajectory(motion_type, duration * fps, width, height)):
+            pass
+        render_seconds = time.perf_counter() - start
+
+        results = []
+        for quality in qualities or list(ENCODER_PROFILES):
+            for codec in codecs or list(CODECS):
+                result = {"quality": quality, "codec": codec}
+                result.update(get_encoder_profile(quality, codec))
+                result["crf"] += CODECS[codec]["crf_offset"]
+                try:
+                    start = time.perf_counter()
+                    output_path = converter.animate_image(image_path, duration=duration, motion_type=motion_type,
+                                                          fps=fps, quality=quality, codec=codec)
+                    seconds = time.perf_counter() - start
+                    result["encode_seconds"] = round(max(0.0, seconds - render_seconds), 3)
+                    result["output_bytes"] = os.path.getsize(output_path)
+                    result["kbps"] = round(result["output_bytes"] * 8 / duration / 1000)
+                    os.remove(output_path)
+                    logger.info(f"{quality}/{codec}: {result['encode_seconds']}s encode, "
+                                f"{result['output_bytes'] / 1024:.0f} KB ({result['kbps']} kbps)")
+
+                except Exception as e:
+                    # e.g. ffmpeg built without this encoder
+                    result["error"] = str(e)
+                    logger.info(f"{quality}/{codec}: {result['error']}")
+
+                results.append(result)
+
+    return results
+
+def _make_test_image(path, size=1024):
+    """
+    Write a synthetic benchmark image
+
+    A smooth gradient with noise gives the encoders realistic work to do.
+
+    Args:
+        path (str): Output path
+        size (int): Side length in pixels
+
+    Returns:
+        str: The output path
+    """
+    import numpy as np
+    from PIL import Image
+
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    pixels = np.stack([np.add.outer(gradient, gradient) / 2] * 3, axis=-1)
+    pixels += np.random.default_rng(0).normal(0, 8, pixels.shape)
+    Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(path, quality=95)
+    return path
+
+def _get_directory_bytes(path):
+    """
+    Get the total size of the files below a directory
+
+    Args:
+        path (str): Directory to measure
+
+    Returns:
+        int: Size in bytes
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+def _get_probe_env():
+    """
+    Build the environment for probe interpreters
+
+    Both this file's directory and its parent are put on the path so the
+    application root resolves whether this module sits beside app.py or
+    inside utils/.
+
+    Returns:
+        dict: Environment variables
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = [here, os.path.dirname(here)]
+    if os.environ.get("PYTHONPATH"):
+        paths.append(os.environ["PYTHONPATH"])
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    return env
+
+def _parse_importtime(stderr, top):
+    """
+    Extract the slowest imports from -X importtime output
+
+    Args:
+        stderr (str): Interpreter stderr with importtime lines
+        top (int): Number of entries to return
+
+    Returns:
+        list: (module, cumulative seconds) pairs, slowest first
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        try:
+            _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+            entries.append((name, int(cumulative) / 1e6))
+        except ValueError:
+            continue
+
+    entries.sort(key=lambda x: x[1], reverse=True)
+    return entries[:top]
+
+# Available benchmarks by name
+BENCHMARKS = {
+    "imports": benchmark_imports,
+    "quality_tiers": benchmark_quality_tiers,
+    "cpu_backends": benchmark_cpu_backends,
+    "animation_pipeline": benchmark_animation_pipeline,
+    "encoder_profiles": benchmark_encoder_profiles
+}
+
+# Example usage
+if __name__ == "__main__":
+    # Make the application root importable when run as a script
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:0] = [here, os.path.dirname(here)]
+
+    # Run the benchmarks named on the command line (all by default)
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print(json.dumps({name: BENCHMARKS[name]()}, indent=2))
@@ -0,0 +1,104 @@
+"""
+Cancellation Module for AI Influencer Content Generator
+Cooperative cancellation tokens and deadlines for long-running generation
+"""
+
+import threading
+import time
+
+class GenerationCancelledError(Exception):
+    """
+    Raised when generation is aborted through a cancellation token
+    """
+
+class DeadlineExceededError(GenerationCancelledError):
+    """
+    Raised when generation runs past the deadline of its cancellation token
+    """
+
+class CancellationToken:
+    """
+    Cooperative cancellation signal with an optional deadline
+
+    Generation code checks the token between denoising steps, between images
+    and between batches, so cancelling it frees the worker at the next check.
+    A token created with a parent is also cancelled when the parent is.
+    """
+
+    def __init__(self, timeout=None, deadline=None, parent=None):
+        """
+        Initialize the cancellation token
+
+        Args:
+            timeout (float): Seconds from now until the deadline (None for no timeout)
+            deadline (float): Absolute deadline as a time.time() value (None for no deadline)
+            parent (CancellationToken): Token whose cancellation also cancels this one
+        """
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+            deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+
+        self.deadline = deadline
+        self.parent = parent
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason="Generation was cancelled"):
+        """
+        Request cancellation
+
+        Args:
+            reason (str): Message for the raised GenerationCancelledError
+        """
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        """
+        Whether the token was cancelled or its deadline has passed
+        """
+        return self.error is not None
+
+    @property
+    def error(self):
+        """
+        Exception describing why the token is cancelled, or None if it is not
+        """
+        if self._event.is_set():
+            return GenerationCancelledError(self.reason)
+        if self.deadline is not None and time.time() >= self.deadline:
+            return DeadlineExceededError("Generation deadline exceeded")
+        if self.parent is not None:
+            return self.parent.error
+        return None
+
+    def remaining(self):
+        """
+        Get the seconds left until the nearest deadline
+
+        Returns:
+            float: Remaining seconds (never negative), or None without a deadline
+        """
+        deadlines = []
+        token = self
+        while token is not None:
+            if token.deadline is not None:
+                deadlines.append(token.deadline)
+            token = token.parent
+
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.time())
+
+    def raise_if_cancelled(self):
+        """
+        Raise if the token has been cancelled or its deadline has passed
+
+        Raises:
+            GenerationCancelledError: If cancelled (DeadlineExceededError for deadlines)
+        """
+        error = self.error
+        if error is not None:
+            raise error
@@ -0,0 +1,315 @@
+"""
+Content Index Module for AI Influencer Content Generator
+SQLite index of content metadata so listings and lookups skip directory scans
+"""
+
+import json
+import fcntl
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import (Column, Index, MetaData, String, Table, Text, create_engine, delete, event,
+                        func, select, tuple_)
+from sqlalchemy.dialects.sqlite import insert
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bump when the content table changes, the index is then rebuilt from the JSON sidecars
+SCHEMA_VERSION = 2
+
+# Metadata fields copied into their own columns so listings can filter on them
+METADATA_FILTERS = ("content_type", "style", "platform")
+
+metadata = MetaData()
+
+content_table = Table(
+    "content", metadata,
+    Column("id", String, primary_key=True),
+    Column("type", String, nullable=False),
+    Column("persona_id", String),
+    Column("created_at", String, nullable=False),
+    Column("content_type", String),
+    Column("style", String),
+    Column("platform", String),
+    Column("data", Text, nullable=False),
+    # Every listing is ordered newest first, so each filter leads an index ending in the sort key
+    # and pages are read straight off the index
+    Index("ix_content_created_at", "created_at", "id"),
+    Index("ix_content_persona_id", "persona_id", "created_at", "id"),
+    Index("ix_content_persona_type", "persona_id", "type", "created_at", "id"),
+    Index("ix_content_type", "type", "created_at", "id"),
+    Index("ix_content_content_type", "content_type", "created_at", "id"),
+    Index("ix_content_style", "style", "created_at", "id"),
+    Index("ix_content_platform", "platform", "created_at", "id")
+)
+
+meta_table = Table(
+    "index_meta", metadata,
+    Column("key", String, primary_key=True),
+    Column("value", String, nullable=False)
+)
+
+class ContentIndex:
+    """
+    Embedded SQLite index of content records
+
+    The content.json sidecars stay the source of truth. The index holds a
+    copy of every record plus the columns that listings filter and sort
+    on, and ContentManager keeps it in sync on every save and delete.
+    """
+
+    def __init__(self, db_path):
+        """
+        Initialize the content index, creating the database if needed
+
+        Args:
+            db_path (str): Path of the SQLite database file
+        """
+        self.db_path = db_path
+        self.engine = create_engine(f"sqlite:///{db_path}",
+                                    connect_args={"check_same_thread": False, "timeout": 30})
+        event.listen(self.engine, "connect", _configure_connection)
+
+        # Indexes built before a schema change, or whose import never finished, start over.
+        # Another process may be importing right now, so only reset once it has finished
+        with self.migration_lock():
+            meta_table.create(self.engine, checkfirst=True)
+            if not self.is_migrated():
+                self.reset()
+
+        logger.info(f"Initialized ContentIndex at {db_path}")
+
+    def is_migrated(self):
+        """
+        Whether the JSON sidecars have been imported into the index
+
+        Returns:
+            bool: True after mark_migrated, until the next reset
+        """
+        return self._get_meta("schema_version") == str(SCHEMA_VERSION)
+
+    @contextmanager
+    def migration_lock(self):
+        """
+        Hold the lock that serializes resetting and importing the index across processes
+
+        Callers re-check is_migrated() once they hold it, as another process
+        may have finished the import while they waited.
+        """
+        with open(f"{self.db_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def mark_migrated(self):
+        """
+        Record that the index holds every JSON sidecar
+        """
+        with self.engine.begin() as connection:
+            for key, value in (("schema_version", str(SCHEMA_VERSION)),
+                               ("migrated_at", datetime.now().isoformat())):
+                statement = insert(meta_table).values(key=key, value=value)
+                connection.execute(statement.on_conflict_do_update(index_elements=["key"], set_={"value": value}))
+
+    def reset(self):
+        """
+        Drop and recreate the index tables
+        """
+        metadata.drop_all(self.engine)
+        metadata.create_all(self.engine)
+
+    def add(self, content_data):
+        """
+        Insert or replace a content record
+
+        Args:
+            content_data (dict): Content data as stored in content.json
+        """
+        self.add_many([content_data])
+
+    def add_many(self, records):
+        """
+        Insert or replace content records in one transaction
+
+        Args:
+            records (list): Content data dictionaries
+        """
+        rows = [self._to_row(content_data) for content_data in records]
+        if not rows:
+            return
+
+        statement = insert(content_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["id"],
+            set_={column.name: statement.excluded[column.name] for column in content_table.columns if column.name != "id"}
+        )
+        with self.engine.begin() as connection:
+            connection.execute(statement, rows)
+
+    def remove(self, content_id):
+        """
+        Remove a content record
+
+        Args:
+            content_id (str): ID of the content
+
+        Returns:
+            bool: True if a record was removed
+        """
+        with self.engine.begin() as connection:
+            result = connection.execute(delete(content_table).where(content_table.c.id == content_id))
+        return result.rowcount > 0
+
+    def get(self, content_id):
+        """
+        Get a content record by ID
+
+        Args:
+            content_id (str): ID of the content
+
+        Returns:
+            dict: Content data or None if not indexed
+        """
+        with self.engine.connect() as connection:
+            data = connection.execute(
+                select(content_table.c.data).where(content_table.c.id == content_id)
+            ).scalar()
+        return json.loads(data) if data is not None else None
+
+    def list(self, content_type=None, persona_id=None):
+        """
+        List content records, newest first
+
+        Args:
+            content_type (str): Filter by content type ('image' or 'video')
+            persona_id (str): Filter by persona ID
+
+        Returns:
+            list: Content data dictionaries
+        """
+        query = self._filter(select(content_table.c.data), content_type, persona_id)
+        query = query.order_by(content_table.c.created_at.desc(), content_table.c.id.desc())
+
+        with self.engine.connect() as connection:
+            return [json.loads(data) for data in connection.execute(query).scalars()]
+
+    def list_page(self, content_type=None, persona_id=None, filters=None, limit=50, after=None):
+        """
+        List one page of content records, newest first
+
+        Pages are keyed on (created_at, id) rather than an offset, so each
+        page is an index range scan that costs the same however deep it is.
+
+        Args:
+            content_type (str): Filter by content type ('image' or 'video')
+            persona_id (str): Filter by persona ID
+            filters (dict): Exact matches on the METADATA_FILTERS fields
+            limit (int): Maximum records in the page
+            after (tuple): (created_at, id) of the last record of the previous page (None for the first page)
+
+        Returns:
+            tuple: (records, key) where key is the (created_at, id) to pass as after
+                for the next page, or None on the last page
+        """
+        query = self._filter(select(content_table.c.created_at, content_table.c.id, content_table.c.data),
+                             content_type, persona_id, filters)
+        if after is not None:
+            query = query.where(tuple_(content_table.c.created_at, content_table.c.id) < tuple_(*after))
+
+        # One extra row tells whether another page follows
+        query = query.order_by(content_table.c.created_at.desc(), content_table.c.id.desc()).limit(limit + 1)
+
+        with self.engine.connect() as connection:
+            rows = connection.execute(query).all()
+
+        records = [json.loads(row.data) for row in rows[:limit]]
+        key = (rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+        return records, key
+
+    def count(self):
+        """
+        Get the number of indexed records
+
+        Returns:
+            int: Number of records
+        """
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(content_table)).scalar()
+
+    def _filter(self, query, content_type=None, persona_id=None, filters=None):
+        """
+        Apply listing filters to a query
+
+        Args:
+            query (Select): Query on the content table
+            content_type (str): Filter by content type ('image' or 'video')
+            persona_id (str): Filter by persona ID
+            filters (dict): Exact matches on the METADATA_FILTERS fields
+
+        Returns:
+            Select: Filtered query
+        """
+        if content_type is not None:
+            query = query.where(content_table.c.type == content_type)
+        if persona_id is not None:
+            query = query.where(content_table.c.persona_id == persona_id)
+
+        for name, value in (filters or {}).items():
+            if name not in METADATA_FILTERS:
+                raise ValueError(f"Cannot filter content on {name}")
+            if value is not None:
+                query = query.where(content_table.c[name] == value)
+        return query
+
+    def _get_meta(self, key):
+        """
+        Read a value from the index metadata table
+
+        Args:
+            key (str): Metadata key
+
+        Returns:
+            str: Value or None if unset
+        """
+        with self.engine.connect() as connection:
+            return connection.execute(select(meta_table.c.value).where(meta_table.c.key == key)).scalar()
+
+    def _to_row(self, content_data):
+        """
+        Convert content data to a content table row
+
+        Args:
+            content_data (dict): Content data as stored in content.json
+
+        Returns:
+            dict: Column values
+        """
+        metadata_fields = content_data.get("metadata") or {}
+        row = {
+            "id": content_data["id"],
+            "type": content_data["type"],
+            "persona_id": content_data.get("persona_id"),
+            "created_at": content_data.get("created_at", ""),
+            "data": json.dumps(content_data)
+        }
+        for name in METADATA_FILTERS:
+            value = metadata_fields.get(name)
+            row[name] = str(value) if value is not None else None
+        return row
+
+def _configure_connection(dbapi_connection, connection_record):
+    """
+    Set SQLite pragmas on every new connection
+
+    WAL lets web and job processes read while another process writes, and
+    NORMAL sync is still crash safe in WAL mode.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
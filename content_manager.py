@@ -5,12 +5,19 @@ Handles storage, organization, and export of generated content
 
 import os
 import json
+import base64
 import uuid
 import shutil
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from PIL import Image
-import cv2
+
+from models.content_index import ContentIndex
+
+# Largest page list_content_page returns
+MAX_PAGE_SIZE = 200
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -21,14 +28,18 @@ class ContentManager:
     Manages storage, organization, and export of generated content
     """
     
-    def __init__(self, storage_dir="content"):
+    def __init__(self, storage_dir="content", save_workers=4, max_pending_saves=16, index_path=None):
         """
         Initialize the content manager
         
         Args:
             storage_dir (str): Directory to store content
+            save_workers (int): Threads encoding and writing images for save_image_async
+            max_pending_saves (int): Queued asynchronous saves before save_image_async blocks
+            index_path (str): Path of the SQLite metadata index (None for content_index.db in storage_dir)
         """
         self.storage_dir = storage_dir
+        self.save_workers = save_workers
         
         # Ensure storage directory exists
         os.makedirs(self.storage_dir, exist_ok=True)
@@ -42,6 +53,20 @@ class ContentManager:
         os.makedirs(self.video_dir, exist_ok=True)
         os.makedirs(self.export_dir, exist_ok=True)
         
+        # Asynchronous saves, the executor is created on first use
+        self._save_executor = None
+        self._save_slots = threading.BoundedSemaphore(max_pending_saves)
+        self._pending_saves = set()
+        self._save_lock = threading.Lock()
+        
+        # Metadata index answering lookups and listings without reading the sidecars
+        self.index = ContentIndex(index_path or os.path.join(storage_dir, "content_index.db"))
+        if not self.index.is_migrated():
+            # Processes starting together import once, the others wait and find it done
+            with self.index.migration_lock():
+                if not self.index.is_migrated():
+                    self.migrate_index()
+        
         logger.info(f"Initialized ContentManager with storage at {storage_dir}")
     
     def save_image(self, image, persona_id, metadata=None):
@@ -75,9 +100,9 @@ class ContentManager:
             else:
                 raise ValueError("Image must be a PIL Image or valid file path")
             
-            # Create thumbnail
+            # Create thumbnail, from memory when possible to skip decoding the JPEG again
             thumbnail_path = os.path.join(content_dir, "thumbnail.jpg")
-            self._create_thumbnail(image_path, thumbnail_path)
+            self._create_thumbnail(image if isinstance(image, Image.Image) else image_path, thumbnail_path)
             
             # Create content data
             content_data = {
@@ -100,7 +125,65 @@ class ContentManager:
             logger.error(f"Error saving image content: {str(e)}")
             raise
     
-    def save_video(self, video_path, persona_id, metadata=None):
+    def save_image_async(self, image, persona_id, metadata=None):
+        """
+        Save an image to the content store in a background thread
+        
+        Encoding and writing overlap with the caller's work. When
+        max_pending_saves saves are already queued the call blocks until one
+        finishes, so a fast producer cannot pile up unsaved images in memory.
+        
+        Args:
+            image (PIL.Image or str): Image to save or path to image
+            persona_id (str): ID of the persona associated with the image
+            metadata (dict): Additional metadata for the image
+            
+        Returns:
+            concurrent.futures.Future: Future resolving to the content data
+        """
+        self._save_slots.acquire()
+        try:
+            with self._save_lock:
+                if self._save_executor is None:
+                    self._save_executor = ThreadPoolExecutor(max_workers=self.save_workers,
+                                                             thread_name_prefix="content-save")
+                future = self._save_executor.submit(self.save_image, image, persona_id, metadata)
+                self._pending_saves.add(future)
+        except Exception:
+            self._save_slots.release()
+            raise
+        
+        future.add_done_callback(self._finish_save)
+        return future
+    
+    def flush(self, timeout=None):
+        """
+        Wait for all asynchronous saves queued so far
+        
+        Args:
+            timeout (float): Maximum seconds to wait (None to wait indefinitely)
+            
+        Returns:
+            bool: True if all saves finished, False on timeout
+        """
+        with self._save_lock:
+            pending = list(self._pending_saves)
+        
+        _, not_done = wait(pending, timeout=timeout)
+        return not not_done
+    
+    def _finish_save(self, future):
+        """
+        Release the queue slot of a finished asynchronous save
+        
+        Args:
+            future (concurrent.futures.Future): Finished save
+        """
+        with self._save_lock:
+            self._pending_saves.discard(future)
+        self._save_slots.release()
+    
+    def save_video(self, video_path, persona_id, metadata=None, previews=None):
         """
         Save a video to the content store
         
@@ -108,6 +191,8 @@ class ContentManager:
             video_path (str): Path to the video file
             persona_id (str): ID of the persona associated with the video
             metadata (dict): Additional metadata for the video
+            previews (dict): Preview files to store with the video, 'preview_path' for the
+                proxy and 'poster_path' for the animated poster (see ImageToVideoConverter.get_preview_paths)
             
         Returns:
             dict: Content data including ID and paths
@@ -140,6 +225,12 @@ class ContentManager:
                 "metadata": metadata or {}
             }
             
+            # Store the previews so galleries never have to load the full video
+            for key, preview_path in (previews or {}).items():
+                dest_preview_path = os.path.join(content_dir, os.path.basename(preview_path))
+                shutil.copy(preview_path, dest_preview_path)
+                content_data[key] = dest_preview_path
+            
             # Save content data
             self._save_content_data(content_id, content_data)
             
@@ -160,6 +251,34 @@ class ContentManager:
         Returns:
             dict: Content data or None if not found
         """
+        try:
+            content_data = self.index.get(content_id)
+            if content_data is not None:
+                return content_data
+            
+            # Not indexed, fall back to the sidecar in case another copy of the app wrote it
+            content_data = self._load_content_file(content_id)
+            if content_data is None:
+                logger.warning(f"Content with ID {content_id} not found")
+                return None
+            
+            self.index.add(content_data)
+            return content_data
+            
+        except Exception as e:
+            logger.error(f"Error getting content: {str(e)}")
+            raise
+    
+    def _load_content_file(self, content_id):
+        """
+        Read the content.json sidecar of a content item
+        
+        Args:
+            content_id (str): ID of the content
+            
+        Returns:
+            dict: Content data or None if there is no sidecar
+        """
         try:
             # Determine content type from directory structure
             image_content_path = os.path.join(self.image_dir, content_id, "content.json")
@@ -171,7 +290,6 @@ class ContentManager:
             elif os.path.exists(video_content_path):
                 content_path = video_content_path
             else:
-                logger.warning(f"Content with ID {content_id} not found")
                 return None
             
             # Load content data
@@ -181,7 +299,7 @@ class ContentManager:
             return content_data
             
         except Exception as e:
-            logger.error(f"Error getting content: {str(e)}")
+            logger.error(f"Error reading content file: {str(e)}")
             raise
     
     def list_content(self, content_type=None, persona_id=None):
@@ -196,37 +314,119 @@ class ContentManager:
             list: List of content data dictionaries
         """
         try:
-            content_list = []
-            
-            # Determine directories to search based on content type
-            dirs_to_search = []
-            if content_type == "image" or content_type is None:
-                dirs_to_search.append(self.image_dir)
-            if content_type == "video" or content_type is None:
-                dirs_to_search.append(self.video_dir)
-            
-            # Search directories
-            for dir_path in dirs_to_search:
-                if os.path.exists(dir_path):
-                    for content_id in os.listdir(dir_path):
-                        content_file = os.path.join(dir_path, content_id, "content.json")
-                        if os.path.exists(content_file):
-                            with open(content_file, 'r') as f:
-                                content_data = json.load(f)
-                                
-                                # Apply persona filter if specified
-                                if persona_id is None or content_data.get("persona_id") == persona_id:
-                                    content_list.append(content_data)
-            
-            # Sort by creation date (newest first)
-            content_list.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-            
-            return content_list
+            return self.index.list(content_type=content_type, persona_id=persona_id)
             
         except Exception as e:
             logger.error(f"Error listing content: {str(e)}")
             raise
     
+    def list_content_page(self, content_type=None, persona_id=None, filters=None, limit=50, cursor=None):
+        """
+        List one page of content, newest first
+        
+        Args:
+            content_type (str): Filter by content type ('image' or 'video')
+            persona_id (str): Filter by persona ID
+            filters (dict): Metadata filters on 'content_type', 'style' and 'platform'
+            limit (int): Page size, at most MAX_PAGE_SIZE
+            cursor (str): next_cursor of the previous page (None for the first page)
+            
+        Returns:
+            dict: 'items' with the content data of the page and 'next_cursor' for the
+                following page (None on the last page)
+        """
+        try:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+            after = self._decode_cursor(cursor) if cursor else None
+            
+            items, key = self.index.list_page(content_type=content_type, persona_id=persona_id,
+                                              filters=filters, limit=limit, after=after)
+            return {
+                "items": items,
+                "next_cursor": self._encode_cursor(key) if key else None
+            }
+            
+        except Exception as e:
+            logger.error(f"Error listing content page: {str(e)}")
+            raise
+    
+    def _encode_cursor(self, key):
+        """
+        Encode a (created_at, id) page key as an opaque cursor
+        
+        Args:
+            key (tuple): (created_at, id) of the last item of a page
+            
+        Returns:
+            str: URL-safe cursor
+        """
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+    
+    def _decode_cursor(self, cursor):
+        """
+        Decode a cursor from _encode_cursor
+        
+        Args:
+            cursor (str): URL-safe cursor
+            
+        Returns:
+            tuple: (created_at, id) page key
+        """
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            created_at, content_id = key
+            if not isinstance(created_at, str) or not isinstance(content_id, str):
+                raise TypeError("cursor fields must be strings")
+            return created_at, content_id
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+    
+    def migrate_index(self):
+        """
+        Import every content.json sidecar into the metadata index
+        
+        Runs once when the index is created, and again whenever its schema
+        changes. Existing entries are replaced, so it can also be run by
+        hand to rebuild the index after the content directory was edited.
+        
+        Returns:
+            int: Number of imported content items
+        """
+        try:
+            logger.info(f"Importing content metadata from {self.storage_dir} into the index")
+            
+            records = []
+            imported = 0
+            for dir_path in (self.image_dir, self.video_dir):
+                for content_id in os.listdir(dir_path):
+                    content_file = os.path.join(dir_path, content_id, "content.json")
+                    if not os.path.exists(content_file):
+                        continue
+                    
+                    try:
+                        with open(content_file, 'r') as f:
+                            records.append(json.load(f))
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Skipping unreadable content file {content_file}: {str(e)}")
+                        continue
+                    
+                    # Insert in chunks to bound memory on large libraries
+                    if len(records) >= 500:
+                        self.index.add_many(records)
+                        imported += len(records)
+                        records = []
+            
+            self.index.add_many(records)
+            imported += len(records)
+            self.index.mark_migrated()
+            
+            logger.info(f"Imported {imported} content items into the index")
+            return imported
+            
+        except Exception as e:
+            logger.error(f"Error migrating content index: {str(e)}")
+            raise
+    
     def delete_content(self, content_id):
         """
         Delete content by ID
@@ -251,6 +451,8 @@ class ContentManager:
             else:  # video
                 content_dir = os.path.join(self.video_dir, content_id)
             
+            self.index.remove(content_id)
+            
             # Delete content directory
             if os.path.exists(content_dir):
                 shutil.rmtree(content_dir)
@@ -300,8 +502,8 @@ class ContentManager:
                 filename = f"{content_data['type']}_{content_id}"
                 if content_data["type"] == "image":
                     filename += ".jpg"
-                else:  # video
-                    filename += ".mp4"
+                else:  # video, keeping the container of the encoder profile
+                    filename += os.path.splitext(source_path)[1] or ".mp4"
                 
                 export_path = os.path.join(export_dir, filename)
                 
@@ -332,13 +534,20 @@ class ContentManager:
         Create a thumbnail from an image
         
         Args:
-            image_path (str): Path to the source image
+            image_path (str or PIL.Image): Path to the source image or the image itself
             thumbnail_path (str): Path to save the thumbnail
             size (tuple): Thumbnail dimensions (width, height)
         """
         try:
-            # Open image and create thumbnail
+            if isinstance(image_path, Image.Image):
+                img = image_path.copy()
+                img.thumbnail(size)
+                img.save(thumbnail_path)
+                return
+            
+            # Open image and create thumbnail, letting the JPEG decoder downscale
             with Image.open(image_path) as img:
+                img.draft("RGB", size)
                 img.thumbnail(size)
                 img.save(thumbnail_path)
                 
@@ -355,6 +564,9 @@ class ContentManager:
             thumbnail_path (str): Path to save the thumbnail
         """
         try:
+            # Imported here so content listing does not pull in OpenCV
+            import cv2
+            
             # Open video and extract frame
             cap = cv2.VideoCapture(video_path)
             
@@ -464,6 +676,8 @@ class ContentManager:
             content_file = os.path.join(content_dir, "content.json")
             with open(content_file, 'w') as f:
                 json.dump(content_data, f, indent=2)
+            
+            self.index.add(content_data)
                 
         except Exception as e:
             logger.error(f"Error saving content data: {str(e)}")
@@ -0,0 +1,115 @@
+"""
+Prompt Embedding Cache Module for AI Influencer Content Generator
+Keeps text encoder outputs in memory so repeated prompts skip re-encoding
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class PromptEmbeddingCache:
+    """
+    LRU cache of prompt embeddings bounded by a byte budget
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Initialize the prompt embedding cache
+
+        Args:
+            max_bytes (int): Maximum total size of cached embeddings in bytes
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        logger.info(f"Initialized PromptEmbeddingCache with budget of {max_bytes} bytes")
+
+    def get(self, model_id, text):
+        """
+        Get cached embeddings for a prompt
+
+        Args:
+            model_id (str): Model the embeddings were computed with
+            text (str): Prompt text that was encoded
+
+        Returns:
+            torch.Tensor: Cached embeddings or None if not cached
+        """
+        key = (model_id, text)
+        with self._lock:
+            embeddings = self._entries.get(key)
+            if embeddings is None:
+                self.misses += 1
+                return None
+
+            # Mark entry as most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embeddings
+
+    def put(self, model_id, text, embeddings):
+        """
+        Store embeddings for a prompt, evicting least recently used entries
+
+        Args:
+            model_id (str): Model the embeddings were computed with
+            text (str): Prompt text that was encoded
+            embeddings (torch.Tensor): Text encoder output
+        """
+        key = (model_id, text)
+        size = embeddings.element_size() * embeddings.nelement()
+
+        # Entries larger than the whole budget are never cached
+        if size > self.max_bytes:
+            logger.warning(f"Embedding of {size} bytes exceeds cache budget, not caching")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                old = self._entries.pop(key)
+                self.current_bytes -= old.element_size() * old.nelement()
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.element_size() * evicted.nelement()
+                self.evictions += 1
+
+            self._entries[key] = embeddings
+            self.current_bytes += size
+
+    def clear(self):
+        """
+        Remove all cached embeddings
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Hit/miss counters and memory usage
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
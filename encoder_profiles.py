@@ -0,0 +1,232 @@
+"""
+Encoder Profiles Module for AI Influencer Content Generator
+Maps the video quality form field to ffmpeg encoder settings
+"""
+
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ffmpeg encoder per codec. Profile CRFs are on the x264 scale; crf_offset
+# shifts them to roughly the same visual quality for the other encoders.
+CODECS = {
+    "x264": {"encoder": "libx264", "extension": "mp4", "crf_offset": 0, "still_image_tune": "stillimage"},
+    "x265": {"encoder": "libx265", "extension": "mp4", "crf_offset": 5, "still_image_tune": None},
+    "vp9": {"encoder": "libvpx-vp9", "extension": "webm", "crf_offset": 10, "still_image_tune": None}
+}
+
+# libvpx-vp9 speed (-cpu-used, 0-5 with -deadline good) for each x264 preset name
+VP9_CPU_USED = {
+    "ultrafast": 5, "superfast": 5, "veryfast": 5, "faster": 4, "fast": 4,
+    "medium": 3, "slow": 2, "slower": 1, "veryslow": 0
+}
+
+# Encoder settings per quality tier. Social platforms re-encode uploads, so
+# draft and standard trade invisible detail for much faster, smaller encodes;
+# high keeps the previous CRF 18 / high profile output.
+ENCODER_PROFILES = {
+    "draft": {
+        "codec": "x264",
+        "preset": "veryfast",
+        "crf": 26
+    },
+    "standard": {
+        "codec": "x264",
+        "preset": "fast",
+        "crf": 23
+    },
+    "high": {
+        "codec": "x264",
+        "preset": "medium",
+        "crf": 18
+    }
+}
+
+DEFAULT_QUALITY = "standard"
+
+# Audio codecs each container can carry as a stream copy, and the encoder
+# used when the source audio has to be converted instead
+CONTAINER_AUDIO = {
+    "mp4": {"copy": {"aac", "mp3", "alac", "ac3", "eac3", "opus", "flac"}, "encoder": "aac", "bitrate": "192k"},
+    "webm": {"copy": {"opus", "vorbis"}, "encoder": "libopus", "bitrate": "128k"}
+}
+
+# Low-bitrate proxy MP4 played by gallery pages instead of the master
+PREVIEW_PROXY = {"max_size": 480, "preset": "veryfast", "crf": 30, "maxrate": "600k"}
+
+# Short animated poster shown before a video is played
+PREVIEW_POSTER = {"max_size": 320, "fps": 10, "duration": 3}
+POSTER_FORMATS = ("webp", "gif")
+
+def get_encoder_profile(quality=None, codec=None):
+    """
+    Get the encoder profile for a quality tier
+
+    Args:
+        quality (str): Quality tier ('draft', 'standard', 'high'), None for default
+        codec (str): Codec from CODECS overriding the tier's codec (None to keep it)
+
+    Returns:
+        dict: Profile with 'codec', 'preset' and 'crf'
+    """
+    if quality not in ENCODER_PROFILES:
+        if quality is not None:
+            logger.warning(f"Unknown quality tier {quality}, using {DEFAULT_QUALITY}")
+        quality = DEFAULT_QUALITY
+
+    profile = dict(ENCODER_PROFILES[quality])
+    if codec is not None:
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        profile["codec"] = codec
+    return profile
+
+def get_output_extension(quality=None, codec=None):
+    """
+    Get the container file extension for an encoder profile
+
+    Args:
+        quality (str): Quality tier, None for default
+        codec (str): Codec override (None for the tier's codec)
+
+    Returns:
+        str: File extension without the dot
+    """
+    return CODECS[get_encoder_profile(quality, codec)["codec"]]["extension"]
+
+def build_encoder_args(quality=None, codec=None, threads=None, still_image=False):
+    """
+    Build the ffmpeg output arguments for an encoder profile
+
+    Args:
+        quality (str): Quality tier, None for default
+        codec (str): Codec override (None for the tier's codec)
+        threads (int): Encoder threads (None to let the encoder decide)
+        still_image (bool): Content is an animated still image, enabling the still image tune
+
+    Returns:
+        list: ffmpeg arguments placed before the output path
+    """
+    profile = get_encoder_profile(quality, codec)
+    codec_info = CODECS[profile["codec"]]
+    crf = profile["crf"] + codec_info["crf_offset"]
+
+    args = ["-c:v", codec_info["encoder"]]
+    if profile["codec"] == "vp9":
+        # Constant quality mode needs the bitrate cap disabled
+        args += ["-crf", str(crf), "-b:v", "0",
+                 "-deadline", "good", "-cpu-used", str(VP9_CPU_USED[profile["preset"]]),
+                 "-row-mt", "1"]
+    else:
+        args += ["-preset", profile["preset"], "-crf", str(crf)]
+        if profile["codec"] == "x264":
+            args += ["-profile:v", "high"]
+        else:
+            # Lets Apple players recognise HEVC in MP4
+            args += ["-tag:v", "hvc1"]
+
+    if still_image and codec_info["still_image_tune"]:
+        args += ["-tune", codec_info["still_image_tune"]]
+    if threads:
+        args += ["-threads", str(threads)]
+
+    args += ["-pix_fmt", "yuv420p"]
+    if codec_info["extension"] == "mp4":
+        # Put the index first so playback can start before the download finishes
+        args += ["-movflags", "+faststart"]
+    return args
+
+def build_audio_args(audio_codec, quality=None, codec=None):
+    """
+    Build the ffmpeg audio arguments for carrying a source audio stream over
+
+    The stream is copied untouched when the output container supports its
+    codec and only re-encoded when it does not.
+
+    Args:
+        audio_codec (str): ffprobe codec name of the source audio stream
+        quality (str): Quality tier, None for default
+        codec (str): Codec override (None for the tier's codec)
+
+    Returns:
+        list: ffmpeg audio arguments placed before the output path
+    """
+    container = CONTAINER_AUDIO[get_output_extension(quality, codec)]
+    if audio_codec in container["copy"]:
+        return ["-c:a", "copy"]
+
+    logger.info(f"Re-encoding {audio_codec} audio to {container['encoder']} for the output container")
+    return ["-c:a", container["encoder"], "-b:a", container["bitrate"]]
+
+def get_scaled_size(width, height, max_size):
+    """
+    Fit frame dimensions into a square bound, keeping the aspect ratio
+
+    Args:
+        width (int): Frame width
+        height (int): Frame height
+        max_size (int): Maximum length of the longer side
+
+    Returns:
+        tuple: (width, height), rounded to even numbers for yuv420p
+    """
+    scale = min(1.0, max_size / max(width, height))
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+def build_proxy_args(width, height, threads=None):
+    """
+    Build the ffmpeg output arguments for the preview proxy of a video
+
+    The proxy is a small H.264 file for gallery playback. It has no audio,
+    and its bitrate is capped so a page of previews stays light.
+
+    Args:
+        width (int): Source frame width
+        height (int): Source frame height
+        threads (int): Encoder threads (None to let the encoder decide)
+
+    Returns:
+        list: ffmpeg arguments placed before the proxy path
+    """
+    proxy_width, proxy_height = get_scaled_size(width, height, PREVIEW_PROXY["max_size"])
+    maxrate = PREVIEW_PROXY["maxrate"]
+    args = [
+        "-map", "0:v:0", "-an",
+        "-vf", f"scale={proxy_width}:{proxy_height}:flags=area",
+        "-c:v", "libx264",
+        "-preset", PREVIEW_PROXY["preset"],
+        "-crf", str(PREVIEW_PROXY["crf"]),
+        "-maxrate", maxrate, "-bufsize", f"{int(maxrate[:-1]) * 2}k",
+        "-profile:v", "main"
+    ]
+    if threads:
+        args += ["-threads", str(threads)]
+    return args + ["-pix_fmt", "yuv420p", "-movflags", "+faststart"]
+
+def build_poster_args(width, height, poster_format="webp"):
+    """
+    Build the ffmpeg output arguments for the animated poster of a video
+
+    Args:
+        width (int): Source frame width
+        height (int): Source frame height
+        poster_format (str): Poster format from POSTER_FORMATS
+
+    Returns:
+        list: ffmpeg arguments placed before the poster path
+    """
+    if poster_format not in POSTER_FORMATS:
+        raise ValueError(f"Unknown poster format: {poster_format}")
+
+    poster_width, poster_height = get_scaled_size(width, height, PREVIEW_POSTER["max_size"])
+    filters = f"fps={PREVIEW_POSTER['fps']},scale={poster_width}:{poster_height}:flags=area"
+    args = ["-map", "0:v:0", "-an", "-t", str(PREVIEW_POSTER["duration"])]
+
+    if poster_format == "webp":
+        args += ["-vf", filters, "-c:v", "libwebp", "-quality", "60", "-compression_level", "4"]
+    else:
+        # A palette computed from the clip looks far better than the default GIF palette
+        args += ["-vf", f"{filters},split[a][b];[a]palettegen[palette];[b][palette]paletteuse"]
+    return args + ["-loop", "0"]
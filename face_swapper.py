@@ -0,0 +1,337 @@
+"""
+Face Swap Module for AI Influencer Content Generator
+Local CPU face swapping with insightface and onnxruntime
+"""
+
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import onnxruntime
+from insightface.app import FaceAnalysis
+from insightface.model_zoo.inswapper import INSwapper
+from insightface.utils import face_align
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# inswapper is not downloaded automatically, it has to be placed here or passed explicitly
+DEFAULT_SWAPPER_MODEL_PATH = os.path.join(os.path.expanduser("~"), ".insightface", "models", "inswapper_128.onnx")
+
+# insightface model pack providing the detector and the recognition model
+DEFAULT_ANALYSIS_MODEL = "buffalo_l"
+
+class FaceSwapper:
+    """
+    Swaps a source face onto every face in a stream of video frames
+
+    The face detector is by far the most expensive per-frame stage, so it
+    only runs on keyframes: every detect_interval frames, and whenever
+    tracking fails. Between keyframes the five facial landmarks are
+    followed with Lucas-Kanade optical flow. Target faces only need
+    landmarks, so recognition runs once per job on the source face. Aligned
+    face crops from several frames go through the swap model in a single
+    ONNX run when the model allows it. The stock inswapper_128.onnx has a
+    fixed batch dimension of 1, so with it the crops still run one at a
+    time; cross-frame batching needs a swap model re-exported with a dynamic
+    batch dimension.
+    """
+
+    def __init__(self, swapper_model_path=None, analysis_model=DEFAULT_ANALYSIS_MODEL, det_size=(640, 640),
+                 detect_interval=10, batch_size=8, max_faces=0, num_threads=None):
+        """
+        Initialize the face swapper
+
+        Args:
+            swapper_model_path (str): Path to inswapper_128.onnx (None for DEFAULT_SWAPPER_MODEL_PATH)
+            analysis_model (str): insightface model pack for detection and recognition
+            det_size (tuple): Detector input size
+            detect_interval (int): Frames between face detections, tracking in between
+            batch_size (int): Frames whose faces are swapped in one ONNX run (dynamic-batch models only)
+            max_faces (int): Maximum faces swapped per frame, largest first (0 for all)
+            num_threads (int): onnxruntime intra-op threads (None to let onnxruntime decide)
+        """
+        self.swapper_model_path = swapper_model_path or DEFAULT_SWAPPER_MODEL_PATH
+        self.analysis_model = analysis_model
+        self.det_size = det_size
+        self.detect_interval = max(1, detect_interval)
+        self.batch_size = max(1, batch_size)
+        self.max_faces = max_faces
+        self.num_threads = num_threads
+
+        self.analyzer = None
+        self.swapper = None
+        self._batched = False
+        self._load_lock = threading.Lock()
+
+        logger.info(f"Initialized FaceSwapper with detection every {self.detect_interval} frames")
+
+    def load_model(self):
+        """
+        Load the face analysis and swap models on first use
+        """
+        with self._load_lock:
+            if self.swapper is not None:
+                return
+
+            if not os.path.exists(self.swapper_model_path):
+                raise FileNotFoundError(f"Face swap model not found at {self.swapper_model_path}")
+
+            providers = ["CPUExecutionProvider"]
+
+            logger.info(f"Loading face analysis model {self.analysis_model}")
+            analyzer = FaceAnalysis(name=self.analysis_model, allowed_modules=["detection", "recognition"],
+                                    providers=providers)
+            # insightface only forwards providers to its sessions, replace them to apply num_threads
+            if self.num_threads:
+                for model in analyzer.models.values():
+                    model.session = self._create_session(model.model_file, providers)
+            analyzer.prepare(ctx_id=-1, det_size=self.det_size)
+
+            logger.info(f"Loading face swap model from {self.swapper_model_path}")
+            swapper = INSwapper(model_file=self.swapper_model_path,
+                                session=self._create_session(self.swapper_model_path, providers))
+
+            # Exported models with a fixed batch dimension of 1 are run crop by crop
+            batch_dim = swapper.session.get_inputs()[0].shape[0]
+            self._batched = not (isinstance(batch_dim, int) and batch_dim == 1)
+
+            self.analyzer = analyzer
+            self.swapper = swapper
+
+    def _create_session(self, model_file, providers):
+        """
+        Create an onnxruntime session limited to num_threads intra-op threads
+
+        Args:
+            model_file (str): Path to the ONNX model
+            providers (list): onnxruntime execution providers
+
+        Returns:
+            onnxruntime.InferenceSession: Session for the model
+        """
+        session_options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            session_options.intra_op_num_threads = self.num_threads
+        return onnxruntime.InferenceSession(model_file, sess_options=session_options, providers=providers)
+
+    def get_source_face(self, image):
+        """
+        Detect the largest face in the source image and compute its embedding
+
+        Args:
+            image (numpy.ndarray): Source image in BGR
+
+        Returns:
+            insightface.app.common.Face: Face with its identity embedding
+        """
+        self.load_model()
+
+        faces = self.analyzer.get(image)
+        if not faces:
+            raise ValueError("No face found in the source image")
+
+        return max(faces, key=lambda face: (face.bbox[2] - face.bbox[0]) * (face.bbox[3] - face.bbox[1]))
+
+    def swap_frames(self, frames, source_face, workers=None):
+        """
+        Swap the source face onto the faces of a frame stream, yielding frames in order
+
+        Args:
+            frames (iterable): Writable BGR frames, modified in place
+            source_face (Face): Face from get_source_face
+            workers (int): Threads blending swapped faces back into the frames (None or 1 for serial)
+
+        Yields:
+            numpy.ndarray: Frames with swapped faces
+        """
+        self.load_model()
+
+        # The identity latent only depends on the source face, compute it once per job
+        latent = source_face.normed_embedding.reshape((1, -1)).astype(np.float32)
+        latent = np.dot(latent, self.swapper.emap)
+        latent /= np.linalg.norm(latent)
+
+        landmarks = []
+        previous_gray = None
+        since_detection = self.detect_interval
+        batch = []
+        detections = 0
+        total_frames = 0
+
+        with ThreadPoolExecutor(max_workers=workers or 1, thread_name_prefix="face-blend") as executor:
+            for frame in frames:
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+                tracked = None
+                if since_detection < self.detect_interval:
+                    tracked = self._track(previous_gray, gray, landmarks)
+                if tracked is None:
+                    tracked = self._detect(frame)
+                    since_detection = 0
+                    detections += 1
+
+                landmarks = tracked
+                previous_gray = gray
+                since_detection += 1
+                total_frames += 1
+
+                batch.append((frame, landmarks))
+                if len(batch) >= self.batch_size:
+                    yield from self._swap_batch(batch, latent, executor)
+                    batch = []
+
+            if batch:
+                yield from self._swap_batch(batch, latent, executor)
+
+        logger.info(f"Swapped faces in {total_frames} frames with {detections} detections")
+
+    def _detect(self, frame):
+        """
+        Detect faces and return their landmarks
+
+        Args:
+            frame (numpy.ndarray): Frame in BGR
+
+        Returns:
+            list: (5, 2) float32 landmark arrays, one per face
+        """
+        _, landmarks = self.analyzer.det_model.detect(frame, max_num=self.max_faces)
+        if landmarks is None:
+            return []
+        return [points.astype(np.float32) for points in landmarks]
+
+    def _track(self, previous_gray, gray, landmarks):
+        """
+        Follow face landmarks from the previous frame with optical flow
+
+        Args:
+            previous_gray (numpy.ndarray): Previous frame in grayscale
+            gray (numpy.ndarray): Current frame in grayscale
+            landmarks (list): Landmark arrays in the previous frame
+
+        Returns:
+            list: Landmark arrays in the current frame, None if any point was lost
+        """
+        if not landmarks:
+            return []
+
+        points = np.concatenate(landmarks).reshape(-1, 1, 2)
+        tracked, status, _ = cv2.calcOpticalFlowPyrLK(previous_gray, gray, points, None,
+                                                      winSize=(21, 21), maxLevel=3)
+        if tracked is None or not status.all():
+            return None
+        return list(tracked.reshape(-1, 5, 2))
+
+    def _swap_batch(self, batch, latent, executor):
+        """
+        Swap all faces of a batch of frames in one model run
+
+        Args:
+            batch (list): (frame, landmarks) pairs
+            latent (numpy.ndarray): Source identity latent
+            executor (ThreadPoolExecutor): Pool blending the faces back
+
+        Returns:
+            iterable: Frames of the batch in order
+        """
+        crops = []
+        transforms = [[] for _ in batch]
+        for index, (frame, landmarks) in enumerate(batch):
+            for points in landmarks:
+                crop, matrix = face_align.norm_crop2(frame, points, self.swapper.input_size[0])
+                crops.append(crop)
+                transforms[index].append(matrix)
+
+        if not crops:
+            return [frame for frame, _ in batch]
+
+        swapped = iter(self._run_swapper(crops, latent))
+        faces = [[next(swapped) for _ in matrices] for matrices in transforms]
+
+        def blend(index):
+            frame = batch[index][0]
+            for face, matrix in zip(faces[index], transforms[index]):
+                _paste_back(frame, face, matrix)
+            return frame
+
+        return executor.map(blend, range(len(batch)))
+
+    def _run_swapper(self, crops, latent):
+        """
+        Run the swap model on aligned face crops
+
+        Args:
+            crops (list): Aligned BGR face crops
+            latent (numpy.ndarray): Source identity latent
+
+        Returns:
+            numpy.ndarray: Swapped BGR faces of shape (n, size, size, 3)
+        """
+        swapper = self.swapper
+        blob = cv2.dnn.blobFromImages(crops, 1.0 / swapper.input_std, tuple(swapper.input_size),
+                                      (swapper.input_mean,) * 3, swapRB=True)
+
+        if self._batched:
+            outputs = swapper.session.run(swapper.output_names, {
+                swapper.input_names[0]: blob,
+                swapper.input_names[1]: np.repeat(latent, len(crops), axis=0)
+            })[0]
+        else:
+            outputs = np.concatenate([
+                swapper.session.run(swapper.output_names, {
+                    swapper.input_names[0]: blob[i:i + 1],
+                    swapper.input_names[1]: latent
+                })[0]
+                for i in range(len(crops))
+            ])
+
+        faces = np.clip(255 * outputs.transpose((0, 2, 3, 1)), 0, 255).astype(np.uint8)
+        return faces[..., ::-1]
+
+def _paste_back(frame, face, matrix):
+    """
+    Blend a swapped face crop back into the frame in place
+
+    Only the region covered by the face is warped and blended, instead of
+    the whole frame.
+
+    Args:
+        frame (numpy.ndarray): Writable frame in BGR
+        face (numpy.ndarray): Swapped face crop in BGR
+        matrix (numpy.ndarray): Alignment transform from the frame to the crop
+    """
+    size = face.shape[0]
+    height, width = frame.shape[:2]
+    inverse = cv2.invertAffineTransform(matrix)
+
+    corners = np.array([[0, 0], [size, 0], [0, size], [size, size]], dtype=np.float64)
+    mapped = corners @ inverse[:, :2].T + inverse[:, 2]
+    x0 = max(int(np.floor(mapped[:, 0].min())) - 2, 0)
+    y0 = max(int(np.floor(mapped[:, 1].min())) - 2, 0)
+    x1 = min(int(np.ceil(mapped[:, 0].max())) + 2, width)
+    y1 = min(int(np.ceil(mapped[:, 1].max())) + 2, height)
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    inverse[0, 2] -= x0
+    inverse[1, 2] -= y0
+    region_size = (x1 - x0, y1 - y0)
+    warped = cv2.warpAffine(face, inverse, region_size, borderValue=0.0)
+    mask = cv2.warpAffine(np.full((size, size), 255, dtype=np.float32), inverse, region_size, borderValue=0.0)
+    mask[mask > 20] = 255
+
+    # Feather the edge in proportion to the face size, as insightface does
+    mask_size = int(size * np.sqrt(abs(np.linalg.det(inverse[:, :2]))))
+    k = max(mask_size // 10, 10)
+    mask = cv2.erode(mask, np.ones((k, k), np.uint8), iterations=1)
+    k = max(mask_size // 20, 5)
+    mask = cv2.GaussianBlur(mask, (2 * k + 1, 2 * k + 1), 0)
+    mask = (mask / 255)[..., np.newaxis]
+
+    region = frame[y0:y1, x0:x1]
+    region[:] = (mask * warped + (1 - mask) * region).astype(np.uint8)
@@ -0,0 +1,446 @@
+"""
+Generation scheduling utilities for AI Influencer Content Generator
+Queues image generation requests and runs compatible ones as shared batches
+"""
+
+import threading
+import logging
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+
+from models.cancellation import GenerationCancelledError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Denoising steps between intermediate previews
+DEFAULT_PREVIEW_INTERVAL = 5
+
+class GenerationRequest:
+    """
+    A pending image generation request submitted to the scheduler
+    """
+
+    def __init__(self, prompt, count=1, negative_prompt=None, width=512, height=512,
+                 num_inference_steps=30, guidance_scale=7.5, seed=None, step_callback=None, scheduler=None,
+                 cancel_token=None, image_callback=None, preview_callback=None,
+                 preview_interval=DEFAULT_PREVIEW_INTERVAL):
+        """
+        Initialize a generation request
+
+        Args:
+            prompt (str): Text prompt for image generation
+            count (int): Number of images to generate
+            negative_prompt (str): Text prompt for elements to avoid
+            width (int): Output image width
+            height (int): Output image height
+            num_inference_steps (int): Number of denoising steps
+            guidance_scale (float): How closely to follow the prompt
+            seed (int): Random seed for the first image (incremented per image)
+            step_callback (callable): Called as step_callback(step, num_steps) while denoising
+            scheduler (str): Scheduler name (None for the pipeline default)
+            cancel_token (CancellationToken): Token that aborts this request only
+            image_callback (callable): Called as image_callback(index, image) for each image of this
+                request as soon as its batch is produced, before the whole request finishes
+            preview_callback (callable): Called as preview_callback(step, num_steps, image) with
+                approximate previews of the request's first image while it is denoised
+            preview_interval (int): Denoising steps between previews
+        """
+        self.id = str(uuid.uuid4())
+        self.prompt = prompt
+        self.count = count
+        self.negative_prompt = negative_prompt
+        self.width = width
+        self.height = height
+        self.num_inference_steps = num_inference_steps
+        self.guidance_scale = guidance_scale
+        self.seed = seed
+        self.step_callback = step_callback
+        self.scheduler = scheduler
+        self.cancel_token = cancel_token
+        self.image_callback = image_callback
+        self.preview_callback = preview_callback
+        self.preview_interval = preview_interval
+        self.submitted_at = time.time()
+        self.status = "pending"
+        self.future = Future()
+
+    @property
+    def batch_key(self):
+        """
+        Parameters that must match for requests to share a denoising run
+        """
+        return (self.width, self.height, self.num_inference_steps, self.guidance_scale, self.scheduler)
+
+    def result(self, timeout=None):
+        """
+        Wait for the generated images
+
+        Args:
+            timeout (float): Maximum seconds to wait (None to wait indefinitely)
+
+        Returns:
+            list: List of PIL.Image objects for this request only
+        """
+        return self.future.result(timeout=timeout)
+
+    def to_dict(self):
+        """
+        Get a JSON-serializable summary of the request
+
+        Returns:
+            dict: Request status data
+        """
+        return {
+            "id": self.id,
+            "status": self.status,
+            "count": self.count,
+            "width": self.width,
+            "height": self.height,
+            "num_inference_steps": self.num_inference_steps,
+            "guidance_scale": self.guidance_scale,
+            "scheduler": self.scheduler,
+            "submitted_at": self.submitted_at
+        }
+
+class GenerationScheduler:
+    """
+    Collects generation requests and runs compatible ones together
+
+    Requests sharing resolution, step count, guidance scale and scheduler that arrive
+    within the batching window are denoised in a single batch. Each caller
+    receives only the images generated for its own request.
+    """
+
+    def __init__(self, image_generator, batch_window=0.05, max_batch_size=None, max_finished=1000):
+        """
+        Initialize the generation scheduler
+
+        Args:
+            image_generator (ImageGenerator): Generator that runs the batches
+            batch_window (float): Seconds to wait for more requests before running a batch
+            max_batch_size (int): Upper bound for images per batch (None for memory-based)
+            max_finished (int): Number of finished requests kept for status lookups
+        """
+        self.image_generator = image_generator
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.max_finished = max_finished
+
+        self._pending = deque()
+        self._requests = {}
+        self._finished = deque()
+        self._condition = threading.Condition()
+        self._running = True
+
+        # Single worker thread, the pipeline is not safe for concurrent use
+        self._worker = threading.Thread(target=self._run, name="generation-scheduler", daemon=True)
+        self._worker.start()
+
+        logger.info(f"Initialized GenerationScheduler with {batch_window * 1000:.0f}ms batching window")
+
+    def submit(self, prompt, count=1, **kwargs):
+        """
+        Queue a generation request without waiting for it
+
+        Args:
+            prompt (str): Text prompt for image generation
+            count (int): Number of images to generate
+            **kwargs: Additional GenerationRequest arguments
+
+        Returns:
+            GenerationRequest: Request whose result() yields the generated images
+        """
+        request = GenerationRequest(prompt, count=count, **kwargs)
+
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Generation scheduler has been shut down")
+            self._pending.append(request)
+            self._requests[request.id] = request
+            self._condition.notify()
+
+        logger.info(f"Queued generation request {request.id} for {count} images")
+        return request
+
+    def generate(self, prompt, count=1, timeout=None, **kwargs):
+        """
+        Queue a generation request and wait for its images
+
+        Args:
+            prompt (str): Text prompt for image generation
+            count (int): Number of images to generate
+            timeout (float): Maximum seconds to wait (None to wait indefinitely)
+            **kwargs: Additional GenerationRequest arguments
+
+        Returns:
+            list: List of PIL.Image objects
+        """
+        return self.submit(prompt, count=count, **kwargs).result(timeout=timeout)
+
+    def get_request(self, request_id):
+        """
+        Look up a submitted request by ID
+
+        Args:
+            request_id (str): ID of the request
+
+        Returns:
+            GenerationRequest: Request or None if unknown
+        """
+        with self._condition:
+            return self._requests.get(request_id)
+
+    def get_queue_length(self):
+        """
+        Get the number of requests waiting to be batched
+
+        Returns:
+            int: Number of pending requests
+        """
+        with self._condition:
+            return len(self._pending)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting requests and stop the worker after the queue drains
+
+        Args:
+            wait (bool): Block until the worker thread exits
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if wait:
+            self._worker.join()
+
+    def _run(self):
+        """
+        Worker loop that forms and executes batches
+        """
+        while True:
+            batch = []
+            try:
+                with self._condition:
+                    while self._running and not self._pending:
+                        self._condition.wait()
+                    if not self._pending:
+                        return
+
+                    # Give concurrent callers a short window to join the batch
+                    deadline = self._pending[0].submitted_at + self.batch_window
+                    remaining = deadline - time.time()
+                    while self._running and remaining > 0:
+                        self._condition.wait(remaining)
+                        remaining = deadline - time.time()
+
+                    batch = self._take_batch()
+
+                if batch:
+                    self._execute_batch(batch)
+
+            except Exception as e:
+                # Fail only the requests involved and keep serving the others, a dead
+                # worker thread would leave every future caller waiting forever
+                logger.error(f"Error in generation scheduler: {str(e)}")
+                if not batch:
+                    # Assembling the batch failed, drop the request it started from
+                    with self._condition:
+                        batch = [self._pending.popleft()] if self._pending else []
+                self._fail_requests(batch, e)
+
+    def _take_batch(self):
+        """
+        Remove the oldest request and all compatible pending requests from the queue
+
+        Returns:
+            list: Requests to run together, empty if every pending request was cancelled
+        """
+        self._drop_cancelled()
+        if not self._pending:
+            return []
+
+        first = self._pending[0]
+        limit = self.max_batch_size
+        if limit is None:
+            limit = self.image_generator.get_max_batch_size(first.width, first.height)
+
+        batch = []
+        total = 0
+        remaining = deque()
+        for request in self._pending:
+            fits = not batch or total + request.count <= limit
+            if request.batch_key == first.batch_key and fits:
+                batch.append(request)
+                total += request.count
+            else:
+                remaining.append(request)
+
+        self._pending = remaining
+        for request in batch:
+            request.status = "running"
+        return batch
+
+    def _drop_cancelled(self):
+        """
+        Fail pending requests whose cancellation token fired while they were queued
+        """
+        cancelled = []
+        remaining = deque()
+        for request in self._pending:
+            error = request.cancel_token.error if request.cancel_token is not None else None
+            if error is None:
+                remaining.append(request)
+            else:
+                request.status = "cancelled"
+                request.future.set_exception(error)
+                cancelled.append(request)
+
+        if cancelled:
+            logger.info(f"Dropped {len(cancelled)} cancelled requests from the queue")
+            self._pending = remaining
+            self._record_finished(cancelled)
+
+    def _fail_requests(self, requests, error):
+        """
+        Fail the requests that have not finished yet
+
+        Args:
+            requests (list): Requests to fail
+            error (Exception): Exception raised to their callers
+        """
+        for request in requests:
+            if not request.future.done():
+                request.status = "cancelled" if isinstance(error, GenerationCancelledError) else "failed"
+                request.future.set_exception(error)
+        self._record_finished(requests)
+
+    def _execute_batch(self, batch):
+        """
+        Run a batch of requests and distribute the images to their callers
+
+        A request cancelled while its batch runs is failed at the next step
+        boundary, so its caller stops waiting right away. Its images stay in
+        the batch until the end of the denoising run though: all images share
+        one latent tensor and the pipeline cannot drop rows from it midway.
+        Its callbacks are no longer called and its images are discarded, and
+        the run is aborted once every request of the batch has been dropped.
+
+        Args:
+            batch (list): Compatible requests to denoise together
+        """
+        first = batch[0]
+        prompts = []
+        negative_prompts = []
+        seeds = []
+        owners = []
+        for request in batch:
+            for i in range(request.count):
+                prompts.append(request.prompt)
+                negative_prompts.append(request.negative_prompt)
+                seeds.append(request.seed + i if request.seed is not None else None)
+                owners.append((request, i))
+
+        logger.info(f"Running batch of {len(batch)} requests ({len(prompts)} images) at "
+                    f"{first.width}x{first.height}, {first.num_inference_steps} steps")
+
+        failed = {}
+
+        def drop(request, error):
+            failed[request.id] = error
+            request.status = "cancelled" if isinstance(error, GenerationCancelledError) else "failed"
+            request.future.set_exception(error)
+
+        def step_callback(step, num_steps):
+            # A cancelled token or failing callback (e.g. a cancelled job) only drops its own request
+            for request in batch:
+                if request.id in failed:
+                    continue
+                if request.cancel_token is not None and request.cancel_token.error is not None:
+                    drop(request, request.cancel_token.error)
+                    continue
+                if request.step_callback is None:
+                    continue
+                try:
+                    request.step_callback(step, num_steps)
+                except Exception as e:
+                    drop(request, e)
+
+            if len(failed) == len(batch):
+                raise next(iter(failed.values()))
+
+        def batch_callback(indices, images):
+            # Callers can store finished images while the rest of the batch is denoised
+            for index, image in zip(indices, images):
+                request, image_index = owners[index]
+                if request.image_callback is None or request.id in failed:
+                    continue
+                try:
+                    request.image_callback(image_index, image)
+                except Exception as e:
+                    drop(request, e)
+
+        def preview_callback(indices, step, num_steps, decode):
+            # Only the first image of requests wanting a preview at this step is decoded,
+            # the final step is decoded properly by the VAE
+            wanted = []
+            for position, index in enumerate(indices):
+                request, image_index = owners[index]
+                if (image_index == 0 and request.preview_callback is not None and request.id not in failed
+                        and step % request.preview_interval == 0 and step < num_steps):
+                    wanted.append((position, request))
+            if not wanted:
+                return
+
+            for (position, request), image in zip(wanted, decode([position for position, _ in wanted])):
+                try:
+                    request.preview_callback(step, num_steps, image)
+                except Exception as e:
+                    drop(request, e)
+
+        wants_previews = any(request.preview_callback is not None for request in batch)
+
+        try:
+            images = self.image_generator.generate_prompt_batch(
+                prompts,
+                negative_prompts=negative_prompts,
+                seeds=seeds,
+                width=first.width,
+                height=first.height,
+                num_inference_steps=first.num_inference_steps,
+                guidance_scale=first.guidance_scale,
+                max_batch_size=self.max_batch_size,
+                step_callback=step_callback,
+                scheduler=first.scheduler,
+                batch_callback=batch_callback,
+                preview_callback=preview_callback if wants_previews else None
+            )
+        except Exception as e:
+            logger.error(f"Error running generation batch: {str(e)}")
+            self._fail_requests(batch, e)
+            return
+
+        # Hand each caller back only its own images, dropped requests already failed
+        offset = 0
+        for request in batch:
+            if request.id not in failed:
+                request.status = "completed"
+                request.future.set_result(images[offset:offset + request.count])
+            offset += request.count
+        self._record_finished(batch)
+
+    def _record_finished(self, batch):
+        """
+        Keep finished requests for lookups, forgetting the oldest ones
+
+        Args:
+            batch (list): Requests that just finished
+        """
+        with self._condition:
+            self._finished.extend(request.id for request in batch)
+            while len(self._finished) > self.max_finished:
+                self._requests.pop(self._finished.popleft(), None)
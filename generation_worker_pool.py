@@ -0,0 +1,527 @@
+"""
+Generation worker pool for AI Influencer Content Generator
+Runs image generation in several processes that share one copy of the model weights
+"""
+
+import os
+import time
+import queue
+import threading
+import logging
+import multiprocessing
+from collections import deque
+
+from models.cancellation import CancellationToken, GenerationCancelledError
+from utils.generation_scheduler import GenerationRequest
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class GenerationWorkerPool:
+    """
+    Pool of forked generation processes sharing the parent's model weights
+
+    The pipeline is loaded once in the parent and its parameters are moved to
+    shared memory before the workers are forked, so every worker reads the
+    same weights instead of holding its own copy. Each worker runs its own
+    torch thread pool, optionally pinned to a disjoint set of CPUs, which lets
+    generation scale across sockets. Requests wait in the parent until a
+    worker is free, so one cancelled while queued is dropped without ever
+    reaching a worker, and the pool exposes the same submit/generate
+    interface as GenerationScheduler.
+
+    The pool must be created at process start, before the parent runs any
+    inference or starts threads that might: a child forked while another
+    thread holds the pipeline lock or an OpenMP thread pool is active
+    deadlocks.
+    """
+
+    def __init__(self, image_generator, num_workers=2, threads_per_worker=None, pin_cpus=True,
+                 poll_interval=0.5, max_finished=1000):
+        """
+        Initialize the worker pool and start the worker processes
+
+        Args:
+            image_generator (ImageGenerator): Generator whose model is shared with the workers
+            num_workers (int): Number of worker processes
+            threads_per_worker (int): torch threads per worker (None to split the CPUs evenly)
+            pin_cpus (bool): Pin each worker to its own subset of CPUs
+            poll_interval (float): Seconds between checks for dead workers and cancelled requests
+            max_finished (int): Number of finished requests kept for status lookups
+        """
+        if image_generator.device != "cpu":
+            raise ValueError("GenerationWorkerPool only supports CPU generation")
+        if image_generator.has_run_inference():
+            # Another thread may be inside the pipeline, a forked child would inherit its held locks
+            raise RuntimeError("GenerationWorkerPool must be created before the pipeline runs in this process")
+        if threading.active_count() > 1:
+            logger.warning("Forking generation workers while other threads are running")
+
+        self.image_generator = image_generator
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.max_finished = max_finished
+
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+        self.threads_per_worker = threads_per_worker or max(1, len(cpus) // num_workers)
+
+        self._requests = {}
+        self._finished = deque()
+        self._sequence = {}
+        self._assigned = {}
+        self._failed = {}
+        self._queue = deque()
+        self._dispatched = 0
+        self._pending = 0
+        self._next_sequence = 1
+        self._dead = set()
+        self._broken = None
+        self._lock = threading.Lock()
+        self._running = True
+        self._stopped_workers = False
+
+        # Load once in the parent and share the weights with the forked workers
+        image_generator.load_model()
+        self._share_weights(image_generator.pipeline)
+
+        context = multiprocessing.get_context("fork")
+        self._tasks = context.Queue()
+        self._events = context.Queue()
+        self._cancel_sequences = [context.Value("q", 0) for _ in range(num_workers)]
+        self._workers = []
+        for index in range(num_workers):
+            worker_cpus = None
+            if pin_cpus and len(cpus) >= num_workers:
+                worker_cpus = cpus[index::num_workers]
+
+            process = context.Process(
+                target=_worker_main,
+                args=(index, image_generator, self.threads_per_worker, worker_cpus,
+                      self._tasks, self._events, self._cancel_sequences[index]),
+                name=f"generation-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self._workers.append(process)
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="generation-pool-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+        logger.info(f"Initialized GenerationWorkerPool with {num_workers} workers, "
+                    f"{self.threads_per_worker} threads each")
+
+    def submit(self, prompt, count=1, **kwargs):
+        """
+        Queue a generation request without waiting for it
+
+        Args:
+            prompt (str): Text prompt for image generation
+            count (int): Number of images to generate
+            **kwargs: Additional GenerationRequest arguments
+
+        Returns:
+            GenerationRequest: Request whose result() yields the generated images
+        """
+        request = GenerationRequest(prompt, count=count, **kwargs)
+
+        # Callbacks and tokens stay in this process, workers get a plain deadline
+        deadline = None
+        if request.cancel_token is not None:
+            remaining = request.cancel_token.remaining()
+            if remaining is not None:
+                deadline = time.time() + remaining
+
+        with self._lock:
+            if self._broken is not None:
+                raise self._broken
+            if not self._running:
+                raise RuntimeError("Generation worker pool has been shut down")
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            self._requests[request.id] = request
+            self._sequence[request.id] = sequence
+            self._pending += 1
+            self._queue.append((request, (sequence, request.id, prompt, count, {
+                "negative_prompt": request.negative_prompt,
+                "width": request.width,
+                "height": request.height,
+                "num_inference_steps": request.num_inference_steps,
+                "guidance_scale": request.guidance_scale,
+                "seed": request.seed,
+                "scheduler": request.scheduler
+            }, deadline, request.image_callback is not None,
+                request.preview_interval if request.preview_callback is not None else None)))
+
+        self._fill_workers()
+
+        logger.info(f"Queued generation request {request.id} for {count} images")
+        return request
+
+    def generate(self, prompt, count=1, timeout=None, **kwargs):
+        """
+        Queue a generation request and wait for its images
+
+        Args:
+            prompt (str): Text prompt for image generation
+            count (int): Number of images to generate
+            timeout (float): Maximum seconds to wait (None to wait indefinitely)
+            **kwargs: Additional GenerationRequest arguments
+
+        Returns:
+            list: List of PIL.Image objects
+        """
+        return self.submit(prompt, count=count, **kwargs).result(timeout=timeout)
+
+    def get_request(self, request_id):
+        """
+        Look up a submitted request by ID
+
+        Args:
+            request_id (str): ID of the request
+
+        Returns:
+            GenerationRequest: Request or None if unknown
+        """
+        with self._lock:
+            return self._requests.get(request_id)
+
+    def get_queue_length(self):
+        """
+        Get the number of requests no worker has started yet
+
+        Returns:
+            int: Number of pending requests
+        """
+        with self._lock:
+            return self._pending
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting requests and stop the workers after the queue drains
+
+        Args:
+            wait (bool): Block until the worker processes exit
+        """
+        with self._lock:
+            if self._stopped_workers or (not self._running and self._broken is None):
+                return
+            self._running = False
+
+        # Workers are told to exit once the parent's queue has drained
+        self._fill_workers()
+
+        if wait:
+            for process in self._workers:
+                process.join()
+            self._events.put(None)
+            self._dispatcher.join()
+
+    def _share_weights(self, pipeline):
+        """
+        Move the pipeline parameters to shared memory
+
+        Forked children would share the pages copy-on-write anyway, but
+        shared memory keeps them shared even when torch touches the storages.
+
+        Args:
+            pipeline (StableDiffusionPipeline): Loaded pipeline
+        """
+        components = getattr(pipeline, "components", {}) or {}
+        for name, component in components.items():
+            if hasattr(component, "share_memory"):
+                component.share_memory()
+                logger.info(f"Moved {name} weights to shared memory")
+
+    def _dispatch(self):
+        """
+        Dispatcher loop relaying worker events to the waiting requests
+        """
+        next_check = time.monotonic() + self.poll_interval
+        while True:
+            try:
+                event = self._events.get(timeout=self.poll_interval)
+            except queue.Empty:
+                event = ()
+
+            if event is None:
+                return
+
+            # A busy event queue must not postpone noticing dead workers
+            if time.monotonic() >= next_check:
+                next_check = time.monotonic() + self.poll_interval
+                self._check_workers()
+                self._drop_cancelled()
+
+            if event:
+                self._handle_event(event)
+
+    def _handle_event(self, event):
+        """
+        Apply a worker event to its request
+
+        Args:
+            event (tuple): Event sent by _worker_main
+        """
+        kind, request_id = event[0], event[1]
+        with self._lock:
+            request = self._requests.get(request_id)
+        # Requests already failed by a worker check can still get late events
+        if request is None or request.future.done():
+            return
+
+        if kind == "started":
+            worker = event[2]
+            with self._lock:
+                self._pending -= 1
+                self._dispatched -= 1
+                self._assigned[worker] = request_id
+            request.status = "running"
+            self._check_cancelled(request, worker)
+
+        elif kind == "images":
+            if request.image_callback is not None and request.id not in self._failed:
+                try:
+                    for index, image in zip(event[2], event[3]):
+                        request.image_callback(index, image)
+                except Exception as e:
+                    self._failed[request.id] = e
+            self._check_cancelled(request, self._get_worker(request_id))
+
+        elif kind == "preview":
+            if request.preview_callback is not None and request.id not in self._failed:
+                try:
+                    request.preview_callback(event[2], event[3], event[4])
+                except Exception as e:
+                    self._failed[request.id] = e
+            self._check_cancelled(request, self._get_worker(request_id))
+
+        elif kind == "progress":
+            if request.step_callback is not None and request.id not in self._failed:
+                try:
+                    request.step_callback(event[2], event[3])
+                except Exception as e:
+                    self._failed[request.id] = e
+            self._check_cancelled(request, self._get_worker(request_id))
+
+        elif kind in ("completed", "failed"):
+            with self._lock:
+                for worker, assigned_id in list(self._assigned.items()):
+                    if assigned_id == request_id:
+                        del self._assigned[worker]
+            self._finish(request, event[2] if kind == "completed" else None,
+                         self._failed.pop(request_id, event[2] if kind == "failed" else None))
+            self._fill_workers()
+
+    def _fill_workers(self):
+        """
+        Hand queued requests to idle workers, dropping those cancelled while queued
+
+        Once the pool is shutting down and the queue is empty, the workers
+        are sent their exit sentinels.
+        """
+        dropped = []
+        with self._lock:
+            idle = len(self._workers) - len(self._dead) - len(self._assigned) - self._dispatched
+            while self._queue and idle > 0:
+                request, task = self._queue.popleft()
+                error = request.cancel_token.error if request.cancel_token is not None else None
+                if error is not None:
+                    self._pending -= 1
+                    dropped.append((request, error))
+                    continue
+                self._tasks.put(task)
+                self._dispatched += 1
+                idle -= 1
+
+            if not self._running and not self._queue and not self._stopped_workers:
+                for _ in self._workers:
+                    self._tasks.put(None)
+                self._stopped_workers = True
+
+        for request, error in dropped:
+            self._finish(request, None, error)
+
+    def _drop_cancelled(self):
+        """
+        Fail queued requests whose token fired while they wait for a worker
+        """
+        dropped = []
+        with self._lock:
+            for entry in list(self._queue):
+                request = entry[0]
+                error = request.cancel_token.error if request.cancel_token is not None else None
+                if error is not None:
+                    self._queue.remove(entry)
+                    self._pending -= 1
+                    dropped.append((request, error))
+
+        for request, error in dropped:
+            logger.info(f"Dropped generation request {request.id} cancelled while queued")
+            self._finish(request, None, error)
+
+    def _check_cancelled(self, request, worker):
+        """
+        Tell a worker to abort a request whose token fired or whose callback failed
+
+        Args:
+            request (GenerationRequest): Running request
+            worker (int): Index of the worker running it
+        """
+        if request.id not in self._failed and request.cancel_token is not None:
+            error = request.cancel_token.error
+            if error is not None:
+                self._failed[request.id] = error
+
+        if request.id in self._failed and worker is not None:
+            self._cancel_sequences[worker].value = self._sequence[request.id]
+
+    def _check_workers(self):
+        """
+        Fail requests of workers that died, and every request once none are left
+
+        Dead workers are not replaced: forking again after the parent has
+        started running threads is exactly what the pool must avoid.
+        """
+        for index, process in enumerate(self._workers):
+            if index in self._dead or process.is_alive():
+                continue
+            self._dead.add(index)
+            with self._lock:
+                request_id = self._assigned.pop(index, None)
+                request = self._requests.get(request_id) if request_id else None
+                stopping = not self._running
+            if not (stopping and process.exitcode == 0):
+                logger.error(f"Generation worker {index} exited with code {process.exitcode}")
+            if request is not None:
+                self._finish(request, None, RuntimeError(f"Generation worker {index} exited unexpectedly"))
+
+        if len(self._dead) == len(self._workers) and self._broken is None:
+            self._fail_all(RuntimeError("All generation workers have exited"))
+
+    def _fail_all(self, error):
+        """
+        Fail every unfinished request and reject new ones
+
+        Args:
+            error (Exception): Failure reason given to the requests
+        """
+        with self._lock:
+            self._broken = error
+            self._running = False
+            self._pending = 0
+            self._queue.clear()
+            unfinished = [self._requests[request_id] for request_id in self._sequence]
+
+        if unfinished:
+            logger.error(f"Failing {len(unfinished)} generation requests: {str(error)}")
+        for request in unfinished:
+            self._finish(request, None, error)
+
+    def _get_worker(self, request_id):
+        """
+        Find the worker running a request
+
+        Args:
+            request_id (str): ID of the request
+
+        Returns:
+            int: Worker index or None if the request is not running
+        """
+        with self._lock:
+            for worker, assigned_id in self._assigned.items():
+                if assigned_id == request_id:
+                    return worker
+        return None
+
+    def _finish(self, request, images, error):
+        """
+        Resolve a request and keep it for lookups, forgetting the oldest ones
+
+        Args:
+            request (GenerationRequest): Finished request
+            images (list): Generated images, None on failure
+            error (Exception): Failure reason, None on success
+        """
+        if request.future.done():
+            return
+
+        if error is None:
+            request.status = "completed"
+            request.future.set_result(images)
+        else:
+            request.status = "cancelled" if isinstance(error, GenerationCancelledError) else "failed"
+            request.future.set_exception(error)
+
+        with self._lock:
+            self._sequence.pop(request.id, None)
+            self._finished.append(request.id)
+            while len(self._finished) > self.max_finished:
+                self._requests.pop(self._finished.popleft(), None)
+
+def _worker_main(index, image_generator, num_threads, cpus, tasks, events, cancel_sequence):
+    """
+    Worker process loop running generation tasks from the queue
+
+    Args:
+        index (int): Worker index
+        image_generator (ImageGenerator): Generator inherited from the parent
+        num_threads (int): torch intra-op threads for this worker
+        cpus (list): CPUs to pin the worker to (None to leave affinity unchanged)
+        tasks (multiprocessing.Queue): Task queue shared by all workers
+        events (multiprocessing.Queue): Queue for events sent to the parent
+        cancel_sequence (multiprocessing.Value): Sequence number of the task to abort
+    """
+    import torch
+
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    torch.set_num_threads(num_threads)
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+
+        sequence, request_id, prompt, count, kwargs, deadline, stream_images, preview_interval = task
+        events.put(("started", request_id, index))
+        first_done = [False]
+
+        def step_callback(step, num_steps):
+            if cancel_sequence.value == sequence:
+                raise GenerationCancelledError("Generation was cancelled")
+            events.put(("progress", request_id, step, num_steps))
+
+        def batch_callback(indices, images):
+            if 0 in indices:
+                first_done[0] = True
+            # Only sent when the caller stores images as they come, they are pickled again on completion
+            if stream_images:
+                events.put(("images", request_id, indices, images))
+
+        def preview_callback(step, num_steps, image):
+            # Like the scheduler, only the request's first image is previewed
+            if not first_done[0]:
+                events.put(("preview", request_id, step, num_steps, image))
+
+        preview_kwargs = {}
+        if preview_interval is not None:
+            preview_kwargs = {"preview_callback": preview_callback, "preview_interval": preview_interval}
+
+        try:
+            images = image_generator.generate_multiple_images(
+                prompt,
+                count=count,
+                step_callback=step_callback,
+                cancel_token=CancellationToken(deadline=deadline),
+                batch_callback=batch_callback,
+                **preview_kwargs,
+                **kwargs
+            )
+            events.put(("completed", request_id, images))
+
+        except Exception as e:
+            # Library exceptions may not survive pickling, send a plain copy
+            if not isinstance(e, GenerationCancelledError):
+                e = RuntimeError(f"{type(e).__name__}: {str(e)}")
+            events.put(("failed", request_id, e))
@@ -4,80 +4,218 @@ Integrates Stable Diffusion for high-quality image generation
 """
 
 import os
+import queue
+import random
+import threading
 import torch
 import numpy as np
 from PIL import Image
-from diffusers import StableDiffusionPipeline, DPMSolverMultistepScheduler
+import diffusers
+from diffusers import StableDiffusionPipeline, StableDiffusionLatentUpscalePipeline, DPMSolverMultistepScheduler
 from transformers import CLIPTextModel, CLIPTokenizer
 import logging
 
+from models.cancellation import CancellationToken
+from models.embedding_cache import PromptEmbeddingCache
+from models.model_pool import get_model_pool
+from models.quality_presets import SCHEDULERS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Default negative prompt for better quality
+DEFAULT_NEGATIVE_PROMPT = "low quality, blurry, distorted, deformed, disfigured, bad anatomy, watermark"
+
+# Approximate peak inference memory per 512x512 image, used to size batches
+BATCH_MEMORY_PER_IMAGE = {
+    "cuda": 1.5 * 1024 ** 3,  # float16 with attention slicing
+    "cpu": 3 * 1024 ** 3  # float32
+}
+
+# Fraction of available memory that batched generation may use
+BATCH_MEMORY_HEADROOM = 0.8
+
+# Upper bound for a single denoising batch
+MAX_BATCH_SIZE = 8
+
+# Model used to upscale chosen previews in latent space (2x)
+LATENT_UPSCALER_MODEL_ID = "stabilityai/sd-x2-latent-upscaler"
+
+# Linear approximation of the SD VAE decoder mapping the 4 latent channels to RGB,
+# used for cheap intermediate previews
+LATENT_RGB_FACTORS = [
+    [0.3512, 0.2297, 0.3227],
+    [0.3250, 0.4974, 0.2350],
+    [-0.2829, 0.1762, 0.2721],
+    [-0.2120, -0.2616, -0.7177]
+]
+
+# Denoising steps between intermediate previews
+DEFAULT_PREVIEW_INTERVAL = 5
+
+# Inference backends: "default" keeps the stock pipeline, "cpu_optimized" uses
+# bfloat16 where the CPU supports it, channels-last layout and a compiled UNet
+BACKENDS = ("default", "cpu_optimized")
+
 class ImageGenerator:
     """
     Handles image generation using Stable Diffusion models
     """
     
-    def __init__(self, model_id="stabilityai/stable-diffusion-3-medium", device=None):
+    def __init__(self, model_id="stabilityai/stable-diffusion-3-medium", device=None,
+                 embedding_cache_bytes=64 * 1024 * 1024, result_cache=None,
+                 backend="default", num_threads=None, compile_unet=True):
         """
         Initialize the image generator with specified model
         
         Args:
             model_id (str): HuggingFace model ID for Stable Diffusion
             device (str): Device to run inference on ('cuda', 'cpu', etc.)
+            embedding_cache_bytes (int): Memory budget for cached prompt embeddings (0 to disable)
+            result_cache (ImageResultCache): On-disk cache for seeded generations (None to disable)
+            backend (str): Inference backend from BACKENDS
+            num_threads (int): Intra-op CPU threads for torch (None for the torch default)
+            compile_unet (bool): Compile the UNet with torch.compile on the cpu_optimized backend
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        
         self.model_id = model_id
+        self.backend = backend
+        self.num_threads = num_threads
+        self.compile_unet = compile_unet
         
         # Determine device
         if device is None:
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
         else:
             self.device = device
+        
+        if backend == "cpu_optimized" and self.device != "cpu":
+            raise ValueError(f"The cpu_optimized backend cannot run on {self.device}")
+        
+        # torch thread settings are process-wide
+        if num_threads:
+            torch.set_num_threads(num_threads)
             
-        logger.info(f"Initializing ImageGenerator with model {model_id} on {self.device}")
+        logger.info(f"Initializing ImageGenerator with model {model_id} on {self.device} ({backend} backend)")
+        
+        # Model will be loaded on first use to save memory, and is shared
+        # with every other generator using the same model through the pool
+        self.model_pool = get_model_pool()
+        
+        # Cache of text encoder outputs for repeated prompts
+        self.embedding_cache = PromptEmbeddingCache(max_bytes=embedding_cache_bytes) if embedding_cache_bytes else None
+        
+        # Cache of finished images for fully deterministic (seeded) requests
+        self.result_cache = result_cache
         
-        # Model will be loaded on first use to save memory
-        self.pipeline = None
+        # Alternative schedulers by name, created on first use
+        self._schedulers = {}
         
+        # Differently optimized copies of a model are separate pool entries
+        self._pool_variant = None if backend == "default" else backend
+        
+    @property
+    def pipeline(self):
+        """
+        Pipeline for this generator's model, or None if it is not resident
+        """
+        return self.model_pool.get_loaded(self.model_id, self.device, self._pool_variant)
+    
     def load_model(self):
         """
-        Load the Stable Diffusion model
+        Load the Stable Diffusion model into the shared model pool
         """
         if self.pipeline is not None:
             return
         
+        self.model_pool.get_pipeline(self.model_id, self.device, self._load_pipeline, self._pool_variant)
+    
+    def has_run_inference(self):
+        """
+        Check whether this process has already run the pipeline
+        
+        Returns:
+            bool: True once any generator sharing the pipeline has run it
+        """
+        return self.model_pool.is_pipeline_used(self.model_id, self.device, self._pool_variant)
+    
+    def _load_pipeline(self):
+        """
+        Load and configure the Stable Diffusion pipeline
+        
+        Returns:
+            StableDiffusionPipeline: Pipeline moved to the target device
+        """
         try:
             logger.info(f"Loading model {self.model_id}...")
             
             # Load pipeline with optimizations
-            self.pipeline = StableDiffusionPipeline.from_pretrained(
+            pipeline = StableDiffusionPipeline.from_pretrained(
                 self.model_id,
-                torch_dtype=torch.float16 if self.device == "cuda" else torch.float32,
+                torch_dtype=self._get_torch_dtype(),
                 safety_checker=None  # Disable safety checker for performance
             )
             
             # Use DPM-Solver++ for faster inference
-            self.pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
-                self.pipeline.scheduler.config
+            pipeline.scheduler = DPMSolverMultistepScheduler.from_config(
+                pipeline.scheduler.config
             )
             
             # Move to device
-            self.pipeline = self.pipeline.to(self.device)
+            pipeline = pipeline.to(self.device)
             
             # Enable memory optimization if on CUDA
             if self.device == "cuda":
-                self.pipeline.enable_attention_slicing()
+                pipeline.enable_attention_slicing()
+            
+            if self.backend == "cpu_optimized":
+                self._optimize_for_cpu(pipeline)
                 
             logger.info("Model loaded successfully")
+            return pipeline
             
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def _get_torch_dtype(self):
+        """
+        Get the weight dtype for the configured device and backend
+        
+        Returns:
+            torch.dtype: Weight dtype
+        """
+        if self.device == "cuda":
+            return torch.float16
+        if self.backend == "cpu_optimized" and _cpu_supports_bfloat16():
+            return torch.bfloat16
+        return torch.float32
+    
+    def _optimize_for_cpu(self, pipeline):
+        """
+        Apply CPU inference optimizations to a loaded pipeline
+        
+        Args:
+            pipeline (StableDiffusionPipeline): Pipeline on the CPU
+        """
+        # Convolutions in oneDNN run fastest on NHWC tensors
+        pipeline.unet.to(memory_format=torch.channels_last)
+        pipeline.vae.to(memory_format=torch.channels_last)
+        
+        if self.compile_unet:
+            # Compilation happens lazily on the first call for each input shape
+            pipeline.unet = torch.compile(pipeline.unet)
+        
+        logger.info(f"Optimized pipeline for CPU ({pipeline.unet.dtype}, "
+                    f"{torch.get_num_threads()} threads, compiled UNet: {self.compile_unet})")
+    
     def generate_image(self, prompt, negative_prompt=None, width=512, height=512, 
-                      num_inference_steps=30, guidance_scale=7.5, seed=None):
+                      num_inference_steps=30, guidance_scale=7.5, seed=None,
+                      prompt_embeds=None, negative_prompt_embeds=None, step_callback=None, scheduler=None,
+                      preview_callback=None, preview_interval=DEFAULT_PREVIEW_INTERVAL, cancel_token=None):
         """
         Generate an image based on the provided prompt
         
@@ -89,11 +227,34 @@ class ImageGenerator:
             num_inference_steps (int): Number of denoising steps
             guidance_scale (float): How closely to follow the prompt
             seed (int): Random seed for reproducibility
+            prompt_embeds (torch.Tensor): Precomputed prompt embeddings (skips encoding)
+            negative_prompt_embeds (torch.Tensor): Precomputed negative prompt embeddings
+            step_callback (callable): Called as step_callback(step, num_steps) after each denoising step
+            scheduler (str): Scheduler name from quality_presets.SCHEDULERS (None for the default)
+            preview_callback (callable): Called as preview_callback(step, num_steps, image) with approximate previews
+            preview_interval (int): Denoising steps between previews
+            cancel_token (CancellationToken): Checked between denoising steps to abort generation
             
         Returns:
             PIL.Image: Generated image
         """
         try:
+            enhanced_prompt, negative_prompt = self._prepare_prompts(prompt, negative_prompt)
+            
+            # Seeded requests are deterministic and can be served from the result cache
+            cache_key = None
+            if prompt_embeds is None and negative_prompt_embeds is None:
+                cache_key = self._get_result_cache_key(enhanced_prompt, negative_prompt, width, height,
+                                                       num_inference_steps, guidance_scale, seed, scheduler)
+            if cache_key is not None:
+                image = self.result_cache.get(cache_key)
+                if image is not None:
+                    logger.info(f"Returning cached image for prompt: {prompt}")
+                    return image
+            
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            
             # Load model if not already loaded
             if self.pipeline is None:
                 self.load_model()
@@ -103,30 +264,31 @@ class ImageGenerator:
                 generator = torch.Generator(device=self.device).manual_seed(seed)
             else:
                 generator = None
-                
-            # Default negative prompt for better quality if none provided
-            if negative_prompt is None:
-                negative_prompt = "low quality, blurry, distorted, deformed, disfigured, bad anatomy, watermark"
-                
-            # Enhanced prompt for better quality
-            enhanced_prompt = f"high quality, detailed, professional photograph, {prompt}"
+            
+            prompt_kwargs = self._get_prompt_kwargs(enhanced_prompt, negative_prompt,
+                                                    prompt_embeds, negative_prompt_embeds)
             
             logger.info(f"Generating image with prompt: {prompt}")
             
             # Generate image
-            output = self.pipeline(
-                prompt=enhanced_prompt,
-                negative_prompt=negative_prompt,
+            output = self._run_pipeline(
+                scheduler=scheduler,
+                **prompt_kwargs,
                 width=width,
                 height=height,
                 num_inference_steps=num_inference_steps,
                 guidance_scale=guidance_scale,
-                generator=generator
+                generator=generator,
+                **self._get_callback_kwargs(step_callback, num_inference_steps, cancel_token,
+                                            preview_callback, preview_interval, (width, height))
             )
             
             # Get image from output
             image = output.images[0]
             
+            if cache_key is not None:
+                self.result_cache.put(cache_key, image)
+            
             logger.info("Image generated successfully")
             return image
             
@@ -134,31 +296,757 @@ class ImageGenerator:
             logger.error(f"Error generating image: {str(e)}")
             raise
     
-    def generate_multiple_images(self, prompt, count=4, **kwargs):
+    def generate_image_stream(self, prompt, preview_interval=DEFAULT_PREVIEW_INTERVAL, **kwargs):
+        """
+        Generate an image, yielding approximate previews while it denoises
+        
+        The pipeline runs in a background thread; previews are decoded from the
+        latents with LATENT_RGB_FACTORS instead of the VAE so they cost almost
+        nothing. Cached results are yielded directly as the final image.
+        Closing the iterator early cancels the generation at the next step.
+        
+        Args:
+            prompt (str): Text prompt for image generation
+            preview_interval (int): Denoising steps between previews
+            **kwargs: Additional generate_image arguments, including cancel_token
+            
+        Yields:
+            dict: Events with 'step', 'num_steps', 'image' and 'final' (True for the finished image)
+        """
+        num_steps = kwargs.get("num_inference_steps", 30)
+        cancel_token = CancellationToken(parent=kwargs.pop("cancel_token", None))
+        events = queue.Queue()
+        
+        def preview_callback(step, num_steps, image):
+            events.put({"step": step, "num_steps": num_steps, "image": image, "final": False})
+        
+        def run():
+            try:
+                image = self.generate_image(prompt, preview_callback=preview_callback,
+                                            preview_interval=preview_interval, cancel_token=cancel_token,
+                                            **kwargs)
+                events.put({"step": num_steps, "num_steps": num_steps, "image": image, "final": True})
+            except Exception as e:
+                events.put(e)
+        
+        thread = threading.Thread(target=run, name="image-stream", daemon=True)
+        thread.start()
+        
+        try:
+            while True:
+                event = events.get()
+                if isinstance(event, Exception):
+                    raise event
+                yield event
+                if event["final"]:
+                    break
+        finally:
+            # Stop the pipeline if the consumer went away before the end
+            cancel_token.cancel("Image stream was closed")
+    
+    def decode_latent_preview(self, latents, size=None):
+        """
+        Approximate images from latents without running the VAE
+        
+        Args:
+            latents (torch.Tensor): Latents of shape (batch, 4, height / 8, width / 8)
+            size (tuple): (width, height) to resize the previews to (None for latent size)
+            
+        Returns:
+            list: List of PIL.Image previews
+        """
+        factors = torch.tensor(LATENT_RGB_FACTORS, dtype=torch.float32, device=latents.device)
+        rgb = torch.einsum("bchw,cr->bhwr", latents.float(), factors)
+        rgb = ((rgb + 1) / 2).clamp(0, 1).mul(255).byte().cpu().numpy()
+        
+        images = []
+        for array in rgb:
+            image = Image.fromarray(array)
+            if size is not None:
+                image = image.resize(size, Image.BILINEAR)
+            images.append(image)
+        return images
+    
+    def generate_multiple_images(self, prompt, count=4, batched=True, max_batch_size=None, batch_callback=None,
+                                 **kwargs):
         """
         Generate multiple images with the same prompt
         
+        In batched mode the prompt is encoded once and all images of a batch
+        share a single denoising run. The batch size is derived from available
+        memory and halved automatically if the pipeline runs out of memory.
+        
         Args:
             prompt (str): Text prompt for image generation
             count (int): Number of images to generate
-            **kwargs: Additional arguments for generate_image
+            batched (bool): Run images through the pipeline in batches
+            max_batch_size (int): Upper bound for the batch size (None for automatic)
+            batch_callback (callable): Called as batch_callback(indices, images) as soon as
+                each batch is produced, before the remaining batches run
+            **kwargs: Additional arguments for generate_image, including cancel_token
             
         Returns:
             list: List of PIL.Image objects
         """
-        images = []
-        for i in range(count):
-            # Use different seeds for variety
-            seed = kwargs.get('seed', None)
-            if seed is not None:
-                kwargs['seed'] = seed + i
+        # Use different seeds for variety
+        seed = kwargs.pop('seed', None)
+        seeds = [seed + i if seed is not None else None for i in range(count)]
+        cancel_token = kwargs.get('cancel_token')
+        
+        if not batched:
+            images = []
+            for i in range(count):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                logger.info(f"Generating image {i+1}/{count}")
+                image = self.generate_image(prompt, seed=seeds[i], **kwargs)
+                images.append(image)
+                if batch_callback is not None:
+                    batch_callback([i], [image])
                 
-            logger.info(f"Generating image {i+1}/{count}")
-            image = self.generate_image(prompt, **kwargs)
-            images.append(image)
+            return images
+        
+        try:
+            width = kwargs.get('width', 512)
+            height = kwargs.get('height', 512)
+            
+            cache_keys = [None] * count
+            if kwargs.get('prompt_embeds') is None and kwargs.get('negative_prompt_embeds') is None:
+                enhanced_prompt, negative_prompt = self._prepare_prompts(prompt, kwargs.get('negative_prompt'))
+                cache_keys = [
+                    self._get_result_cache_key(enhanced_prompt, negative_prompt, width, height,
+                                               kwargs.get('num_inference_steps', 30),
+                                               kwargs.get('guidance_scale', 7.5), seed,
+                                               kwargs.get('scheduler'))
+                    for seed in seeds
+                ]
+            
+            return self._generate_with_result_cache(
+                cache_keys, width, height, max_batch_size,
+                lambda indices: self._generate_batch(prompt, [seeds[i] for i in indices], **kwargs),
+                cancel_token,
+                batch_callback
+            )
+            
+        except Exception as e:
+            logger.error(f"Error generating multiple images: {str(e)}")
+            raise
+    
+    def generate_prompt_batch(self, prompts, negative_prompts=None, seeds=None, width=512, height=512,
+                              num_inference_steps=30, guidance_scale=7.5, max_batch_size=None,
+                              step_callback=None, scheduler=None, cancel_token=None, batch_callback=None,
+                              preview_callback=None):
+        """
+        Generate one image per prompt, running different prompts in shared batches
+        
+        All prompts must share resolution, step count and guidance scale since
+        they are denoised together.
+        
+        Args:
+            prompts (list): Text prompt for each image
+            negative_prompts (list): Negative prompt for each image (None entries use the default)
+            seeds (list): Random seed for each image (None entries are randomized)
+            width (int): Output image width
+            height (int): Output image height
+            num_inference_steps (int): Number of denoising steps
+            guidance_scale (float): How closely to follow the prompt
+            max_batch_size (int): Upper bound for the batch size (None for automatic)
+            step_callback (callable): Called as step_callback(step, num_steps) after each denoising step
+            scheduler (str): Scheduler name from quality_presets.SCHEDULERS (None for the default)
+            cancel_token (CancellationToken): Checked between denoising steps and batches
+            batch_callback (callable): Called as batch_callback(indices, images) as soon as
+                each batch is produced, before the remaining batches run
+            preview_callback (callable): Called as preview_callback(indices, step, num_steps, decode)
+                after each denoising step of the batch holding indices; decode(positions) returns
+                approximate previews of the images at those positions of indices
+            
+        Returns:
+            list: List of PIL.Image objects in the order of the prompts
+        """
+        count = len(prompts)
+        if negative_prompts is None:
+            negative_prompts = [None] * count
+        if seeds is None:
+            seeds = [None] * count
+        
+        try:
+            prepared = [self._prepare_prompts(prompt, negative_prompt)
+                        for prompt, negative_prompt in zip(prompts, negative_prompts)]
+            
+            # Only explicitly seeded images are deterministic and cacheable
+            cache_keys = [
+                self._get_result_cache_key(enhanced_prompt, negative_prompt, width, height,
+                                           num_inference_steps, guidance_scale, seed, scheduler)
+                for (enhanced_prompt, negative_prompt), seed in zip(prepared, seeds)
+            ]
+            
+            # Per-image generators need a concrete seed for every image
+            seeds = [seed if seed is not None else random.randrange(2 ** 32) for seed in seeds]
+            
+            def run_batch(indices):
+                logger.info(f"Generating batch of {len(indices)} images across prompts")
+                generator = [torch.Generator(device=self.device).manual_seed(seeds[i]) for i in indices]
+                
+                if self.embedding_cache is not None:
+                    prompt_kwargs = {
+                        "prompt_embeds": torch.cat([self.encode_prompt(prepared[i][0]) for i in indices]),
+                        "negative_prompt_embeds": torch.cat([self.encode_prompt(prepared[i][1]) for i in indices])
+                    }
+                else:
+                    prompt_kwargs = {
+                        "prompt": [prepared[i][0] for i in indices],
+                        "negative_prompt": [prepared[i][1] for i in indices]
+                    }
+                
+                # Callers choose which images to preview, only those are decoded
+                latent_callback = None
+                if preview_callback is not None:
+                    def latent_callback(step, num_steps, latents):
+                        preview_callback(indices, step, num_steps,
+                                         lambda positions: self.decode_latent_preview(latents[positions],
+                                                                                      (width, height)))
+                
+                output = self._run_pipeline(
+                    scheduler=scheduler,
+                    **prompt_kwargs,
+                    width=width,
+                    height=height,
+                    num_inference_steps=num_inference_steps,
+                    guidance_scale=guidance_scale,
+                    generator=generator,
+                    **self._get_callback_kwargs(step_callback, num_inference_steps, cancel_token,
+                                                latent_callback=latent_callback)
+                )
+                return list(output.images)
+            
+            return self._generate_with_result_cache(cache_keys, width, height, max_batch_size, run_batch,
+                                                    cancel_token, batch_callback)
+            
+        except Exception as e:
+            logger.error(f"Error generating prompt batch: {str(e)}")
+            raise
+    
+    def get_max_batch_size(self, width=512, height=512):
+        """
+        Estimate how many images fit into a single denoising run
+        
+        Args:
+            width (int): Output image width
+            height (int): Output image height
+            
+        Returns:
+            int: Batch size that fits into available memory
+        """
+        available_bytes = self._get_available_memory()
+        if available_bytes is None:
+            return 1
+        
+        # Scale the per-image estimate with the pixel count relative to 512x512
+        per_image_bytes = BATCH_MEMORY_PER_IMAGE["cuda" if self.device.startswith("cuda") else "cpu"]
+        per_image_bytes = per_image_bytes * (width * height) / (512 * 512)
+        
+        batch_size = int(available_bytes * BATCH_MEMORY_HEADROOM // per_image_bytes)
+        return max(1, min(batch_size, MAX_BATCH_SIZE))
+    
+    def get_result_cache_stats(self):
+        """
+        Get result cache statistics
+        
+        Returns:
+            dict: Cache statistics or None if caching is disabled
+        """
+        if self.result_cache is None:
+            return None
+        return self.result_cache.get_stats()
+    
+    def _get_result_cache_key(self, enhanced_prompt, negative_prompt, width, height,
+                              num_inference_steps, guidance_scale, seed, scheduler=None):
+        """
+        Build the result cache key for a deterministic generation
+        
+        Args:
+            enhanced_prompt (str): Prompt text passed to the pipeline
+            negative_prompt (str): Negative prompt text passed to the pipeline
+            width (int): Output image width
+            height (int): Output image height
+            num_inference_steps (int): Number of denoising steps
+            guidance_scale (float): How closely to follow the prompt
+            seed (int): Random seed, None makes the request uncacheable
+            scheduler (str): Scheduler name (None for the default)
             
+        Returns:
+            str: Cache key, or None if the request is not cacheable
+        """
+        if self.result_cache is None or seed is None:
+            return None
+        
+        params = dict(
+            model_id=self.model_id,
+            prompt=enhanced_prompt,
+            negative_prompt=negative_prompt,
+            width=width,
+            height=height,
+            num_inference_steps=num_inference_steps,
+            guidance_scale=float(guidance_scale),
+            seed=seed,
+            scheduler=scheduler
+        )
+        
+        # Reduced precision changes the output, keep default backend keys stable
+        if self.backend != "default":
+            params["backend"] = self.backend
+        
+        return self.result_cache.make_key(**params)
+    
+    def _generate_with_result_cache(self, cache_keys, width, height, max_batch_size, run_batch, cancel_token=None,
+                                    batch_callback=None):
+        """
+        Serve cached images and generate only the missing ones in batches
+        
+        batch_callback receives the cached images first and then every batch
+        as soon as it is produced, so callers can store finished images while
+        the following batches are still denoising.
+        
+        Args:
+            cache_keys (list): Result cache key (or None) for each image
+            width (int): Output image width
+            height (int): Output image height
+            max_batch_size (int): Upper bound for the batch size (None for automatic)
+            run_batch (callable): Function taking a list of image indices and returning their images
+            cancel_token (CancellationToken): Checked before each batch
+            batch_callback (callable): Called as batch_callback(indices, images) for each finished batch
+            
+        Returns:
+            list: List of PIL.Image objects
+        """
+        images = [self.result_cache.get(key) if key is not None else None for key in cache_keys]
+        pending = [i for i, image in enumerate(images) if image is None]
+        
+        if len(pending) < len(images):
+            logger.info(f"Serving {len(images) - len(pending)}/{len(images)} images from result cache")
+            if batch_callback is not None:
+                cached = [i for i, image in enumerate(images) if image is not None]
+                batch_callback(cached, [images[i] for i in cached])
+        
+        def run_pending(start, end):
+            indices = pending[start:end]
+            batch = run_batch(indices)
+            for i, image in zip(indices, batch):
+                images[i] = image
+                if cache_keys[i] is not None:
+                    self.result_cache.put(cache_keys[i], image)
+            if batch_callback is not None:
+                batch_callback(indices, batch)
+            return batch
+        
+        if pending:
+            self._run_in_batches(len(pending), width, height, max_batch_size, run_pending, cancel_token)
+        
         return images
     
+    def _run_in_batches(self, count, width, height, max_batch_size, run_batch, cancel_token=None):
+        """
+        Produce count images in memory-sized batches, splitting on out-of-memory
+        
+        Args:
+            count (int): Total number of images
+            width (int): Output image width
+            height (int): Output image height
+            max_batch_size (int): Upper bound for the batch size (None for automatic)
+            run_batch (callable): Function (start, end) returning images for that range
+            cancel_token (CancellationToken): Checked before each batch
+            
+        Returns:
+            list: List of PIL.Image objects
+        """
+        # Load model if not already loaded
+        if self.pipeline is None:
+            self.load_model()
+        
+        batch_size = self.get_max_batch_size(width, height)
+        if max_batch_size is not None:
+            batch_size = min(batch_size, max_batch_size)
+        batch_size = max(1, min(batch_size, count))
+        
+        images = []
+        while len(images) < count:
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            
+            start = len(images)
+            end = min(count, start + batch_size)
+            logger.info(f"Generating images {start+1}-{end}/{count} (batch size {batch_size})")
+            try:
+                images.extend(run_batch(start, end))
+            except Exception as e:
+                if not self._is_out_of_memory(e) or batch_size == 1:
+                    raise
+                
+                # Split the batch and retry with the remaining images
+                batch_size = max(1, batch_size // 2)
+                logger.warning(f"Out of memory during batched generation, retrying with batch size {batch_size}")
+                self._release_memory()
+        
+        return images
+    
+    def _generate_batch(self, prompt, seeds, negative_prompt=None, width=512, height=512,
+                        num_inference_steps=30, guidance_scale=7.5,
+                        prompt_embeds=None, negative_prompt_embeds=None, step_callback=None, scheduler=None,
+                        cancel_token=None, preview_callback=None, preview_interval=DEFAULT_PREVIEW_INTERVAL):
+        """
+        Run a single denoising pass for a batch of images
+        
+        Args:
+            prompt (str): Text prompt for image generation
+            seeds (list): One seed (or None) per image in the batch
+            negative_prompt (str): Text prompt for elements to avoid
+            width (int): Output image width
+            height (int): Output image height
+            num_inference_steps (int): Number of denoising steps
+            guidance_scale (float): How closely to follow the prompt
+            prompt_embeds (torch.Tensor): Precomputed prompt embeddings (skips encoding)
+            negative_prompt_embeds (torch.Tensor): Precomputed negative prompt embeddings
+            step_callback (callable): Called as step_callback(step, num_steps) after each denoising step
+            scheduler (str): Scheduler name from quality_presets.SCHEDULERS (None for the default)
+            cancel_token (CancellationToken): Checked between denoising steps
+            preview_callback (callable): Called as preview_callback(step, num_steps, image) with
+                approximate previews of the first image in the batch
+            preview_interval (int): Denoising steps between previews
+            
+        Returns:
+            list: List of PIL.Image objects
+        """
+        # Seed each image individually so results match sequential generation
+        if all(seed is not None for seed in seeds):
+            generator = [torch.Generator(device=self.device).manual_seed(seed) for seed in seeds]
+        else:
+            generator = None
+        
+        enhanced_prompt, negative_prompt = self._prepare_prompts(prompt, negative_prompt)
+        prompt_kwargs = self._get_prompt_kwargs(enhanced_prompt, negative_prompt,
+                                                prompt_embeds, negative_prompt_embeds)
+        
+        # The prompt is encoded once and repeated across the batch by the pipeline
+        output = self._run_pipeline(
+            scheduler=scheduler,
+            **prompt_kwargs,
+            width=width,
+            height=height,
+            num_inference_steps=num_inference_steps,
+            guidance_scale=guidance_scale,
+            num_images_per_prompt=len(seeds),
+            generator=generator,
+            **self._get_callback_kwargs(step_callback, num_inference_steps, cancel_token,
+                                        preview_callback, preview_interval, (width, height))
+        )
+        
+        return list(output.images)
+    
+    def _prepare_prompts(self, prompt, negative_prompt=None):
+        """
+        Build the enhanced prompt and default negative prompt
+        
+        Args:
+            prompt (str): Text prompt for image generation
+            negative_prompt (str): Text prompt for elements to avoid
+            
+        Returns:
+            tuple: (enhanced_prompt, negative_prompt)
+        """
+        # Default negative prompt for better quality if none provided
+        if negative_prompt is None:
+            negative_prompt = DEFAULT_NEGATIVE_PROMPT
+            
+        # Enhanced prompt for better quality
+        enhanced_prompt = f"high quality, detailed, professional photograph, {prompt}"
+        
+        return enhanced_prompt, negative_prompt
+    
+    def encode_prompt(self, text):
+        """
+        Encode a prompt with the text encoder, using the embedding cache
+        
+        Args:
+            text (str): Prompt text exactly as passed to the pipeline
+            
+        Returns:
+            torch.Tensor: Prompt embeddings
+        """
+        # Load model if not already loaded
+        if self.pipeline is None:
+            self.load_model()
+        
+        if self.embedding_cache is not None:
+            embeddings = self.embedding_cache.get(self.model_id, text)
+            if embeddings is not None:
+                return embeddings
+        
+        pipeline = self.pipeline
+        tokenizer = pipeline.tokenizer
+        text_inputs = tokenizer(
+            text,
+            padding="max_length",
+            max_length=tokenizer.model_max_length,
+            truncation=True,
+            return_tensors="pt"
+        )
+        
+        with torch.no_grad():
+            embeddings = pipeline.text_encoder(text_inputs.input_ids.to(self.device))[0]
+        embeddings = embeddings.to(dtype=pipeline.text_encoder.dtype)
+        
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(self.model_id, text, embeddings)
+        
+        return embeddings
+    
+    def get_embedding_cache_stats(self):
+        """
+        Get prompt embedding cache statistics
+        
+        Returns:
+            dict: Cache statistics or None if caching is disabled
+        """
+        if self.embedding_cache is None:
+            return None
+        return self.embedding_cache.get_stats()
+    
+    def _get_prompt_kwargs(self, enhanced_prompt, negative_prompt, prompt_embeds=None, negative_prompt_embeds=None):
+        """
+        Build the prompt arguments for a pipeline call
+        
+        Precomputed embeddings take precedence; otherwise embeddings are taken
+        from the cache when it is enabled, falling back to raw prompt text.
+        
+        Args:
+            enhanced_prompt (str): Prompt text passed to the pipeline
+            negative_prompt (str): Negative prompt text passed to the pipeline
+            prompt_embeds (torch.Tensor): Precomputed prompt embeddings
+            negative_prompt_embeds (torch.Tensor): Precomputed negative prompt embeddings
+            
+        Returns:
+            dict: Keyword arguments for the pipeline call
+        """
+        if prompt_embeds is None and self.embedding_cache is not None:
+            prompt_embeds = self.encode_prompt(enhanced_prompt)
+        if negative_prompt_embeds is None and self.embedding_cache is not None:
+            negative_prompt_embeds = self.encode_prompt(negative_prompt)
+        
+        prompt_kwargs = {}
+        if prompt_embeds is not None:
+            prompt_kwargs["prompt_embeds"] = prompt_embeds
+        else:
+            prompt_kwargs["prompt"] = enhanced_prompt
+        if negative_prompt_embeds is not None:
+            prompt_kwargs["negative_prompt_embeds"] = negative_prompt_embeds
+        else:
+            prompt_kwargs["negative_prompt"] = negative_prompt
+        
+        return prompt_kwargs
+    
+    def _run_pipeline(self, scheduler=None, **kwargs):
+        """
+        Call the shared pipeline, serializing access across generators
+        
+        Args:
+            scheduler (str): Scheduler name to use for this call (None for the default)
+            **kwargs: Arguments for the pipeline call
+            
+        Returns:
+            Pipeline output
+        """
+        # Keep a local reference so eviction cannot pull the pipeline mid-call
+        pipeline = self.pipeline
+        if pipeline is None:
+            self.load_model()
+            pipeline = self.pipeline
+        
+        with self.model_pool.get_pipeline_lock(self.model_id, self.device, self._pool_variant):
+            if scheduler is None:
+                return pipeline(**kwargs)
+            
+            # Swap the scheduler for this call only, other callers share the pipeline
+            default_scheduler = pipeline.scheduler
+            pipeline.scheduler = self._get_scheduler(default_scheduler, scheduler)
+            try:
+                return pipeline(**kwargs)
+            finally:
+                pipeline.scheduler = default_scheduler
+    
+    def _get_scheduler(self, default_scheduler, name):
+        """
+        Get a scheduler instance by name, built from the pipeline's default config
+        
+        Args:
+            default_scheduler: Scheduler the pipeline was loaded with
+            name (str): Scheduler name from quality_presets.SCHEDULERS
+            
+        Returns:
+            Scheduler instance
+        """
+        if name not in SCHEDULERS:
+            raise ValueError(f"Unknown scheduler: {name}")
+        
+        # Scheduler configs depend only on the model, so instances are reused across calls
+        if name not in self._schedulers:
+            class_name, overrides = SCHEDULERS[name]
+            self._schedulers[name] = getattr(diffusers, class_name).from_config(default_scheduler.config, **overrides)
+        return self._schedulers[name]
+    
+    def _get_callback_kwargs(self, step_callback, num_inference_steps, cancel_token=None, preview_callback=None,
+                             preview_interval=DEFAULT_PREVIEW_INTERVAL, preview_size=None, latent_callback=None):
+        """
+        Adapt a step_callback(step, num_steps) to the pipeline callback arguments
+        
+        Args:
+            step_callback (callable): Progress callback or None
+            num_inference_steps (int): Number of denoising steps
+            cancel_token (CancellationToken): Checked after every step, raising aborts the pipeline
+            preview_callback (callable): Called as preview_callback(step, num_steps, image) or None
+            preview_interval (int): Denoising steps between previews
+            preview_size (tuple): (width, height) of the previews
+            latent_callback (callable): Called as latent_callback(step, num_steps, latents) after every step
+            
+        Returns:
+            dict: Keyword arguments for the pipeline call
+        """
+        if step_callback is None and preview_callback is None and latent_callback is None and cancel_token is None:
+            return {}
+        
+        def callback(step, timestep, latents):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            
+            if step_callback is not None:
+                step_callback(step + 1, num_inference_steps)
+            
+            # The final step is decoded properly by the VAE
+            if (preview_callback is not None and (step + 1) % preview_interval == 0
+                    and step + 1 < num_inference_steps):
+                preview_callback(step + 1, num_inference_steps,
+                                 self.decode_latent_preview(latents[:1], preview_size)[0])
+            
+            if latent_callback is not None:
+                latent_callback(step + 1, num_inference_steps, latents)
+        
+        return {"callback": callback, "callback_steps": 1}
+    
+    def _get_available_memory(self):
+        """
+        Get the amount of memory available for inference on the current device
+        
+        Returns:
+            int: Available bytes or None if unknown
+        """
+        try:
+            if self.device.startswith("cuda"):
+                free_bytes, _ = torch.cuda.mem_get_info(torch.device(self.device))
+                return free_bytes
+            
+            # Available physical memory on CPU
+            return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+            
+        except (ValueError, OSError, AttributeError, RuntimeError) as e:
+            logger.warning(f"Could not determine available memory: {str(e)}")
+            return None
+    
+    def _is_out_of_memory(self, error):
+        """
+        Check whether an exception was caused by running out of memory
+        
+        Args:
+            error (Exception): Exception raised by the pipeline
+            
+        Returns:
+            bool: True if the error is an out-of-memory error
+        """
+        if isinstance(error, (torch.cuda.OutOfMemoryError, MemoryError)):
+            return True
+        return isinstance(error, RuntimeError) and "out of memory" in str(error).lower()
+    
+    def _release_memory(self):
+        """
+        Release cached allocator memory after an out-of-memory error
+        """
+        if self.device.startswith("cuda"):
+            torch.cuda.empty_cache()
+    
+    def upscale_image(self, image, prompt="", width=None, height=None, method="latent",
+                      num_inference_steps=20, seed=None, cancel_token=None):
+        """
+        Upscale a generated image to its final resolution
+        
+        The latent method runs the 2x latent upscaler guided by the original
+        prompt; the lanczos method is a plain image resize for CPU-only or
+        quick exports. Any remaining difference to the target size is
+        resolved with a Lanczos resize.
+        
+        Args:
+            image (PIL.Image): Image to upscale
+            prompt (str): Prompt the image was generated from
+            width (int): Target width (None for twice the input width)
+            height (int): Target height (None for twice the input height)
+            method (str): Upscaling method ('latent' or 'lanczos')
+            num_inference_steps (int): Denoising steps for the latent upscaler
+            seed (int): Random seed for reproducibility
+            cancel_token (CancellationToken): Checked between denoising steps
+            
+        Returns:
+            PIL.Image: Upscaled image
+        """
+        try:
+            width = width or image.width * 2
+            height = height or image.height * 2
+            
+            logger.info(f"Upscaling {image.width}x{image.height} image to {width}x{height} ({method})")
+            
+            if method == "latent":
+                upscaler = self.model_pool.get_pipeline(LATENT_UPSCALER_MODEL_ID, self.device, self._load_upscaler)
+                
+                if seed is not None:
+                    generator = torch.Generator(device=self.device).manual_seed(seed)
+                else:
+                    generator = None
+                
+                enhanced_prompt, _ = self._prepare_prompts(prompt)
+                with self.model_pool.get_pipeline_lock(LATENT_UPSCALER_MODEL_ID, self.device):
+                    output = upscaler(
+                        prompt=enhanced_prompt,
+                        image=image.convert("RGB"),
+                        num_inference_steps=num_inference_steps,
+                        guidance_scale=0,
+                        generator=generator,
+                        **self._get_callback_kwargs(None, num_inference_steps, cancel_token)
+                    )
+                image = output.images[0]
+            elif method != "lanczos":
+                raise ValueError(f"Unknown upscale method: {method}")
+            
+            if image.size != (width, height):
+                image = image.resize((width, height), Image.LANCZOS)
+            
+            logger.info("Image upscaled successfully")
+            return image
+            
+        except Exception as e:
+            logger.error(f"Error upscaling image: {str(e)}")
+            raise
+    
+    def _load_upscaler(self):
+        """
+        Load the latent upscaler pipeline
+        
+        Returns:
+            StableDiffusionLatentUpscalePipeline: Pipeline moved to the target device
+        """
+        logger.info(f"Loading upscaler {LATENT_UPSCALER_MODEL_ID}...")
+        
+        upscaler = StableDiffusionLatentUpscalePipeline.from_pretrained(
+            LATENT_UPSCALER_MODEL_ID,
+            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
+        )
+        return upscaler.to(self.device)
+    
     def save_image(self, image, output_path):
         """
         Save the generated image to disk
@@ -183,6 +1071,36 @@ class ImageGenerator:
             logger.error(f"Error saving image: {str(e)}")
             raise
 
+def _cpu_supports_bfloat16():
+    """
+    Check whether oneDNN has native bfloat16 kernels on this CPU
+    
+    Returns:
+        bool: True if bfloat16 inference is supported
+    """
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+def warm_up_models(model_ids, device=None, background=True):
+    """
+    Load models into the shared model pool before the first request
+    
+    Args:
+        model_ids (list): HuggingFace model IDs to load
+        device (str): Device to load the models on (None for automatic)
+        background (bool): Load in a daemon thread instead of blocking
+        
+    Returns:
+        threading.Thread: Loader thread if background, otherwise None
+    """
+    return get_model_pool().warm_up(
+        model_ids,
+        lambda model_id: ImageGenerator(model_id=model_id, device=device, embedding_cache_bytes=0).load_model(),
+        background=background
+    )
+
 # Example usage
 if __name__ == "__main__":
     # Create generator
@@ -5,21 +5,36 @@ Provides helper functions for connecting different modules
 
 import os
 import logging
+import threading
 from PIL import Image
 import json
 import time
 import uuid
+from concurrent.futures import wait
 
 # Import core modules
-from models.image_generator import ImageGenerator
+# ImageGenerator (torch/diffusers) and ImageToVideoConverter (cv2) are
+# imported on first use so that processes which never generate stay light
 from models.persona_manager import PersonaManager
-from models.video_converter import ImageToVideoConverter
 from models.content_manager import ContentManager
+from models.cancellation import CancellationToken
+from models.quality_presets import get_generation_params, scale_resolution
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Final output resolution (width, height) for each content type
+CONTENT_TYPE_RESOLUTIONS = {
+    "portrait": (512, 512),
+    "full_body": (512, 768),  # Taller for full body
+    "action": (512, 512),
+    "social_post": (1024, 1024)
+}
+
+# Size of preview candidates relative to the final resolution
+PREVIEW_SCALE = 0.5
+
 class IntegrationManager:
     """
     Manages integration between different modules
@@ -46,14 +61,108 @@ class IntegrationManager:
         os.makedirs(self.uploads_dir, exist_ok=True)
         
         # Initialize core modules
-        self.image_generator = ImageGenerator()
         self.persona_manager = PersonaManager(storage_dir=self.personas_dir)
-        self.video_converter = ImageToVideoConverter(output_dir=os.path.join(self.content_dir, "videos"))
         self.content_manager = ContentManager(storage_dir=self.content_dir)
         
+        # Heavy modules are created on first use
+        self._image_generator = None
+        self._video_converter = None
+        self._generation_scheduler = None
+        self._lazy_lock = threading.Lock()
+        
         logger.info(f"Initialized IntegrationManager with base directory {base_dir}")
     
-    def create_persona_workflow(self, name, reference_image=None, description=None, attributes=None):
+    @property
+    def image_generator(self):
+        """
+        Image generator, importing torch and diffusers on first access
+        """
+        with self._lazy_lock:
+            if self._image_generator is None:
+                from models.image_generator import ImageGenerator
+                from models.result_cache import ImageResultCache
+                # e.g. IMAGE_BACKEND=cpu_optimized IMAGE_THREADS=16 on CPU-only render nodes
+                num_threads = os.environ.get("IMAGE_THREADS")
+                self._image_generator = ImageGenerator(
+                    result_cache=ImageResultCache(cache_dir=os.path.join(self.data_dir, "cache", "images")),
+                    backend=os.environ.get("IMAGE_BACKEND", "default"),
+                    num_threads=int(num_threads) if num_threads else None
+                )
+            return self._image_generator
+    
+    @property
+    def video_converter(self):
+        """
+        Image to video converter, importing OpenCV on first access
+        """
+        with self._lazy_lock:
+            if self._video_converter is None:
+                from models.video_converter import ImageToVideoConverter
+                # FACE_SWAP_MODEL points at inswapper_128.onnx, which insightface does not download
+                self._video_converter = ImageToVideoConverter(
+                    output_dir=os.path.join(self.content_dir, "videos"),
+                    face_swap_model_path=os.environ.get("FACE_SWAP_MODEL")
+                )
+            return self._video_converter
+    
+    @property
+    def generation_scheduler(self):
+        """
+        Scheduler batching concurrent generation requests through the image generator
+        
+        With GENERATION_WORKERS set above 1 on a CPU device, requests are instead
+        spread over a pool of worker processes sharing the generator's weights.
+        That pool forks, so it is never created here: call
+        start_generation_workers() at process start.
+        """
+        image_generator = self.image_generator
+        with self._lazy_lock:
+            if self._generation_scheduler is None:
+                if self._use_worker_pool(image_generator):
+                    raise RuntimeError("GENERATION_WORKERS is set, call start_generation_workers() "
+                                       "at process start before generating")
+                from utils.generation_scheduler import GenerationScheduler
+                self._generation_scheduler = GenerationScheduler(image_generator)
+            return self._generation_scheduler
+    
+    def start_generation_workers(self):
+        """
+        Fork the generation worker pool if GENERATION_WORKERS asks for one
+        
+        Must be called before any job threads start or any inference runs in
+        this process, forking later can leave the workers deadlocked. Without
+        GENERATION_WORKERS this does nothing and the scheduler stays lazy.
+        
+        Returns:
+            GenerationWorkerPool: Started pool (None unless GENERATION_WORKERS applies to this device)
+        """
+        if int(os.environ.get("GENERATION_WORKERS", 1)) <= 1:
+            return None
+        
+        image_generator = self.image_generator
+        with self._lazy_lock:
+            if self._generation_scheduler is None and self._use_worker_pool(image_generator):
+                from utils.generation_worker_pool import GenerationWorkerPool
+                self._generation_scheduler = GenerationWorkerPool(
+                    image_generator,
+                    num_workers=int(os.environ.get("GENERATION_WORKERS", 1))
+                )
+            return self._generation_scheduler
+    
+    def _use_worker_pool(self, image_generator):
+        """
+        Check whether generation is configured to run in forked worker processes
+        
+        Args:
+            image_generator (ImageGenerator): Generator the scheduler would use
+            
+        Returns:
+            bool: True if GENERATION_WORKERS is above 1 on a CPU device
+        """
+        return int(os.environ.get("GENERATION_WORKERS", 1)) > 1 and image_generator.device == "cpu"
+    
+    def create_persona_workflow(self, name, reference_image=None, description=None, attributes=None,
+                                progress_callback=None, cancel_token=None):
         """
         Execute the complete persona creation workflow
         
@@ -62,6 +171,8 @@ class IntegrationManager:
             reference_image (str or PIL.Image): Reference image or path
             description (str): Text description of the persona
             attributes (dict): Additional attributes for the persona
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
+            cancel_token (CancellationToken): Aborts generation between steps and images when cancelled
             
         Returns:
             dict: Persona data with preview images
@@ -81,11 +192,13 @@ class IntegrationManager:
             persona = self.persona_manager.extract_identity_features(persona["id"])
             
             # Step 3: Generate preview images
-            preview_images = []
-            
             # Generate different preview styles
             styles = ["professional headshot", "casual portrait", "full body shot"]
             
+            # Queue all previews first so they are denoised as one batch, sharing
+            # a token so a failed preview also stops the ones still queued
+            previews_token = CancellationToken(parent=cancel_token)
+            requests = []
             for style in styles:
                 # Construct prompt based on persona attributes
                 age_range = attributes.get("age_range", "25-35")
@@ -101,17 +214,27 @@ class IntegrationManager:
                     
                 prompt += "high quality, professional photography, studio lighting"
                 
-                # Generate image
-                image = self.image_generator.generate_image(
+                requests.append((style, prompt, self.generation_scheduler.submit(
                     prompt=prompt,
                     width=512,
                     height=512,
                     num_inference_steps=30,
-                    guidance_scale=7.5
-                )
+                    guidance_scale=7.5,
+                    step_callback=self._make_step_callback(progress_callback),
+                    cancel_token=previews_token
+                )))
+            
+            saves = []
+            for style, prompt, generation_request in requests:
+                # Wait for generated image
+                try:
+                    image = generation_request.result()[0]
+                except Exception:
+                    previews_token.cancel("Persona creation failed")
+                    raise
                 
-                # Save image to content store
-                content_data = self.content_manager.save_image(
+                # Save in the background while the next preview is awaited
+                saves.append(self.content_manager.save_image_async(
                     image=image,
                     persona_id=persona["id"],
                     metadata={
@@ -119,9 +242,9 @@ class IntegrationManager:
                         "style": style,
                         "is_preview": True
                     }
-                )
-                
-                preview_images.append(content_data)
+                ))
+            
+            preview_images = [save.result() for save in saves]
             
             # Update persona with preview images
             self.persona_manager.update_persona(
@@ -139,7 +262,8 @@ class IntegrationManager:
             logger.error(f"Error in persona creation workflow: {str(e)}")
             raise
     
-    def generate_content_workflow(self, persona_id, content_type, settings=None, count=1):
+    def generate_content_workflow(self, persona_id, content_type, settings=None, count=1, progress_callback=None,
+                                  cancel_token=None):
         """
         Execute the content generation workflow
         
@@ -148,6 +272,8 @@ class IntegrationManager:
             content_type (str): Type of content to generate
             settings (dict): Generation settings
             count (int): Number of items to generate
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
+            cancel_token (CancellationToken): Aborts generation between steps and images when cancelled
             
         Returns:
             list: Generated content data
@@ -169,13 +295,13 @@ class IntegrationManager:
             
             # Process based on content type
             if content_type == "portrait":
-                results = self._generate_portrait_images(persona, settings, count)
+                results = self._generate_portrait_images(persona, settings, count, progress_callback, cancel_token)
             elif content_type == "full_body":
-                results = self._generate_full_body_images(persona, settings, count)
+                results = self._generate_full_body_images(persona, settings, count, progress_callback, cancel_token)
             elif content_type == "action":
-                results = self._generate_action_images(persona, settings, count)
+                results = self._generate_action_images(persona, settings, count, progress_callback, cancel_token)
             elif content_type == "social_post":
-                results = self._generate_social_post_images(persona, settings, count)
+                results = self._generate_social_post_images(persona, settings, count, progress_callback, cancel_token)
             else:
                 raise ValueError(f"Unknown content type: {content_type}")
             
@@ -186,7 +312,175 @@ class IntegrationManager:
             logger.error(f"Error in content generation workflow: {str(e)}")
             raise
     
-    def create_video_workflow(self, image_id=None, video_type="animate", settings=None):
+    def generate_preview_workflow(self, persona_id, content_type, settings=None, count=4, progress_callback=None,
+                                  cancel_token=None):
+        """
+        Generate low-resolution preview candidates for later upscaling
+        
+        Previews are rendered at PREVIEW_SCALE of the final resolution and
+        saved with the target size in their settings, so only the candidates
+        the user picks are passed to upscale_content_workflow.
+        
+        Args:
+            persona_id (str): ID of the persona
+            content_type (str): Type of content to generate
+            settings (dict): Generation settings
+            count (int): Number of candidates to generate
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
+            cancel_token (CancellationToken): Aborts generation between steps and images when cancelled
+            
+        Returns:
+            list: Generated preview content data
+        """
+        if content_type not in CONTENT_TYPE_RESOLUTIONS:
+            raise ValueError(f"Unknown content type: {content_type}")
+        
+        settings = dict(settings or {})
+        default_width, default_height = CONTENT_TYPE_RESOLUTIONS[content_type]
+        target_width = settings.get("width", default_width)
+        target_height = settings.get("height", default_height)
+        
+        settings["preview_target"] = {"width": target_width, "height": target_height}
+        settings["width"] = scale_resolution(target_width, PREVIEW_SCALE)
+        settings["height"] = scale_resolution(target_height, PREVIEW_SCALE)
+        
+        logger.info(f"Generating {count} previews at {settings['width']}x{settings['height']} "
+                    f"for {target_width}x{target_height} output")
+        
+        return self.generate_content_workflow(
+            persona_id=persona_id,
+            content_type=content_type,
+            settings=settings,
+            count=count,
+            progress_callback=progress_callback,
+            cancel_token=cancel_token
+        )
+    
+    def stream_image_workflow(self, prompt, persona_id=None, settings=None, preview_callback=None,
+                              preview_interval=None, progress_callback=None, cancel_token=None):
+        """
+        Generate a single image, reporting intermediate previews as it denoises
+        
+        Runs through the generation scheduler like every other workflow, so it
+        belongs in a job worker; the web process streams the previews relayed
+        through the job store.
+        
+        Args:
+            prompt (str): Text prompt for image generation
+            persona_id (str): Persona to save the finished image for (None to skip saving)
+            settings (dict): Generation settings
+            preview_callback (callable): Called as preview_callback(step, num_steps, image) with approximate previews
+            preview_interval (int): Denoising steps between previews (None for the scheduler default)
+            progress_callback (callable): Progress callback for the denoising steps
+            cancel_token (CancellationToken): Aborts generation between steps when cancelled
+            
+        Returns:
+            dict: 'image', 'num_steps' and 'content' (None unless the image was saved)
+        """
+        # Initialize settings if not provided
+        if settings is None:
+            settings = {}
+        
+        generation_params = get_generation_params(settings)
+        request_kwargs = {}
+        if preview_interval is not None:
+            request_kwargs["preview_interval"] = preview_interval
+        
+        image = self.generation_scheduler.generate(
+            prompt=prompt,
+            count=1,
+            **generation_params,
+            seed=settings.get("seed"),
+            step_callback=self._make_step_callback(progress_callback),
+            cancel_token=cancel_token,
+            preview_callback=preview_callback,
+            **request_kwargs
+        )[0]
+        
+        content = None
+        if persona_id:
+            content = self.content_manager.save_image(
+                image=image,
+                persona_id=persona_id,
+                metadata={
+                    "prompt": prompt,
+                    "content_type": "custom",
+                    "settings": settings
+                }
+            )
+        
+        return {"image": image, "num_steps": generation_params["num_inference_steps"], "content": content}
+    
+    def upscale_content_workflow(self, content_ids, settings=None, progress_callback=None, cancel_token=None):
+        """
+        Upscale chosen preview images to their final resolution
+        
+        Args:
+            content_ids (list): IDs of the preview images to upscale
+            settings (dict): Upscale settings ('method', 'steps', optional 'width'/'height')
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
+            cancel_token (CancellationToken): Aborts generation between steps and images when cancelled
+            
+        Returns:
+            list: Upscaled content data
+        """
+        try:
+            logger.info(f"Starting upscale workflow for {len(content_ids)} images")
+            
+            # Initialize settings if not provided
+            if settings is None:
+                settings = {}
+            
+            method = settings.get("method", "latent")
+            
+            saves = []
+            for i, content_id in enumerate(content_ids):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                
+                if progress_callback:
+                    progress_callback(i / len(content_ids), f"Upscaling image {i + 1}/{len(content_ids)}")
+                
+                source = self.content_manager.get_content(content_id)
+                if not source or source.get("type") != "image":
+                    raise ValueError(f"Image content with ID {content_id} not found")
+                
+                metadata = source.get("metadata", {})
+                source_settings = metadata.get("settings", {})
+                target = source_settings.get("preview_target", {})
+                
+                with Image.open(source["file_path"]) as img:
+                    image = self.image_generator.upscale_image(
+                        img,
+                        prompt=metadata.get("prompt", ""),
+                        width=settings.get("width", target.get("width")),
+                        height=settings.get("height", target.get("height")),
+                        method=method,
+                        num_inference_steps=settings.get("steps", 20),
+                        seed=source_settings.get("seed"),
+                        cancel_token=cancel_token
+                    )
+                
+                # Save in the background while the next image is upscaled
+                saves.append(self.content_manager.save_image_async(
+                    image=image,
+                    persona_id=source.get("persona_id"),
+                    metadata=dict(
+                        metadata,
+                        source_image_id=content_id,
+                        upscale_method=method
+                    )
+                ))
+            
+            content_items = [save.result() for save in saves]
+            logger.info(f"Completed upscale workflow, created {len(content_items)} items")
+            return content_items
+            
+        except Exception as e:
+            logger.error(f"Error in upscale workflow: {str(e)}")
+            raise
+    
+    def create_video_workflow(self, image_id=None, video_type="animate", settings=None, progress_callback=None):
         """
         Execute the video creation workflow
         
@@ -194,6 +488,7 @@ class IntegrationManager:
             image_id (str): ID of the source image
             video_type (str): Type of video to create
             settings (dict): Video creation settings
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
             
         Returns:
             dict: Video content data
@@ -213,6 +508,9 @@ class IntegrationManager:
             # Get persona ID from image content
             persona_id = image_content.get("persona_id")
             
+            if progress_callback:
+                progress_callback(0.0, f"Creating {video_type} video")
+            
             # Process based on video type
             if video_type == "animate":
                 # Get motion type from settings
@@ -224,9 +522,15 @@ class IntegrationManager:
                     image_path=image_content["file_path"],
                     duration=duration,
                     motion_type=motion_type,
-                    fps=30
+                    fps=30,
+                    quality=settings.get("quality"),
+                    codec=settings.get("codec"),
+                    previews=settings.get("previews", True)
                 )
                 
+                if progress_callback:
+                    progress_callback(0.9, "Saving video")
+                
                 # Save video to content store
                 video_content = self.content_manager.save_video(
                     video_path=video_path,
@@ -235,7 +539,8 @@ class IntegrationManager:
                         "source_image_id": image_id,
                         "video_type": video_type,
                         "settings": settings
-                    }
+                    },
+                    previews=self.video_converter.get_preview_paths(video_path)
                 )
                 
                 logger.info(f"Created animated video {video_content['id']} from image {image_id}")
@@ -250,9 +555,15 @@ class IntegrationManager:
                 # Perform face swap
                 video_path = self.video_converter.face_swap_video(
                     face_image_path=image_content["file_path"],
-                    target_video_path=target_video
+                    target_video_path=target_video,
+                    quality=settings.get("quality"),
+                    codec=settings.get("codec"),
+                    previews=settings.get("previews", True)
                 )
                 
+                if progress_callback:
+                    progress_callback(0.9, "Saving video")
+                
                 # Save video to content store
                 video_content = self.content_manager.save_video(
                     video_path=video_path,
@@ -262,7 +573,8 @@ class IntegrationManager:
                         "video_type": video_type,
                         "target_video": target_video,
                         "settings": settings
-                    }
+                    },
+                    previews=self.video_converter.get_preview_paths(video_path)
                 )
                 
                 logger.info(f"Created face swap video {video_content['id']} from image {image_id}")
@@ -275,7 +587,78 @@ class IntegrationManager:
             logger.error(f"Error in video creation workflow: {str(e)}")
             raise
     
-    def export_workflow(self, content_ids, export_format="original", platform=None):
+    def create_video_batch_workflow(self, items, settings=None, progress_callback=None):
+        """
+        Animate many images with several motion presets in one batch
+        
+        Args:
+            items (list): (image_id, motion_type, duration) tuples
+            settings (dict): Settings shared by all clips ('quality', 'codec', 'previews', 'workers')
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
+            
+        Returns:
+            list: Video content data, in the order of items
+        """
+        try:
+            logger.info(f"Starting video batch workflow for {len(items)} clips")
+            
+            # Initialize settings if not provided
+            if settings is None:
+                settings = {}
+            
+            # Resolve every image before rendering anything
+            image_contents = {}
+            for image_id, _, _ in items:
+                if image_id not in image_contents:
+                    image_content = self.content_manager.get_content(image_id)
+                    if not image_content:
+                        raise ValueError(f"Image content with ID {image_id} not found")
+                    image_contents[image_id] = image_content
+            
+            if progress_callback:
+                progress_callback(0.0, f"Animating {len(items)} clips")
+            
+            def clip_progress(completed, total):
+                if progress_callback:
+                    progress_callback(0.9 * completed / total, f"Animated {completed}/{total} clips")
+            
+            video_paths = self.video_converter.animate_batch(
+                [(image_contents[image_id]["file_path"], motion_type, duration)
+                 for image_id, motion_type, duration in items],
+                fps=30,
+                quality=settings.get("quality"),
+                codec=settings.get("codec"),
+                previews=settings.get("previews", True),
+                workers=settings.get("workers"),
+                progress_callback=clip_progress
+            )
+            
+            if progress_callback:
+                progress_callback(0.9, "Saving videos")
+            
+            batch_id = str(uuid.uuid4())
+            video_contents = []
+            for (image_id, motion_type, duration), video_path in zip(items, video_paths):
+                video_contents.append(self.content_manager.save_video(
+                    video_path=video_path,
+                    persona_id=image_contents[image_id].get("persona_id"),
+                    metadata={
+                        "source_image_id": image_id,
+                        "video_type": "animate",
+                        "batch_id": batch_id,
+                        "settings": dict(settings, motion_type=motion_type, duration=duration)
+                    },
+                    previews=self.video_converter.get_preview_paths(video_path)
+                ))
+            
+            logger.info(f"Completed video batch workflow, created {len(video_contents)} videos")
+            return video_contents
+            
+        except Exception as e:
+            logger.error(f"Error in video batch workflow: {str(e)}")
+            raise
+    
+    def export_workflow(self, content_ids, export_format="original", platform=None, progress_callback=None):
         """
         Execute the export workflow
         
@@ -283,6 +666,7 @@ class IntegrationManager:
             content_ids (list): List of content IDs to export
             export_format (str): Format for export
             platform (str): Platform optimization
+            progress_callback (callable): Called as progress_callback(progress, message) with progress in 0-1
             
         Returns:
             str: Path to export zip file
@@ -290,6 +674,9 @@ class IntegrationManager:
         try:
             logger.info(f"Starting export workflow for {len(content_ids)} content items")
             
+            if progress_callback:
+                progress_callback(0.0, f"Exporting {len(content_ids)} items")
+            
             # Export content
             export_path = self.content_manager.export_content(
                 content_ids=content_ids,
@@ -304,7 +691,73 @@ class IntegrationManager:
             logger.error(f"Error in export workflow: {str(e)}")
             raise
     
-    def _generate_portrait_images(self, persona, settings, count):
+    def _make_step_callback(self, progress_callback, start=0.0, end=0.9):
+        """
+        Map denoising steps onto a workflow progress range
+        
+        Args:
+            progress_callback (callable): Workflow progress callback or None
+            start (float): Progress reported before the first step
+            end (float): Progress reported after the last step
+            
+        Returns:
+            callable: step_callback(step, num_steps) or None
+        """
+        if progress_callback is None:
+            return None
+        
+        def step_callback(step, num_steps):
+            progress_callback(start + (end - start) * step / num_steps, f"Denoising step {step}/{num_steps}")
+        
+        return step_callback
+    
+    def _generate_and_save_images(self, persona, prompt, count, generation_params, seed=None, metadata=None,
+                                  progress_callback=None, cancel_token=None):
+        """
+        Generate images through the scheduler and save each batch as soon as it is produced
+        
+        Encoding and writing run in the content manager's save threads while
+        the scheduler keeps denoising the remaining batches.
+        
+        Args:
+            persona (dict): Persona data
+            prompt (str): Text prompt for image generation
+            count (int): Number of images to generate
+            generation_params (dict): Resolution, steps and guidance from get_generation_params
+            seed (int): Random seed for the first image (None for random)
+            metadata (dict): Metadata stored with every image
+            progress_callback (callable): Progress callback for the denoising steps
+            cancel_token (CancellationToken): Aborts generation when cancelled
+            
+        Returns:
+            list: Generated content data in generation order
+        """
+        saves = {}
+        
+        def save(index, image):
+            saves[index] = self.content_manager.save_image_async(
+                image=image,
+                persona_id=persona["id"],
+                metadata=metadata
+            )
+        
+        try:
+            self.generation_scheduler.generate(
+                prompt=prompt,
+                count=count,
+                **generation_params,
+                seed=seed,
+                step_callback=self._make_step_callback(progress_callback),
+                cancel_token=cancel_token,
+                image_callback=save
+            )
+        finally:
+            # Images finished before a failure are kept, but never left half-written
+            wait(list(saves.values()))
+        
+        return [saves[i].result() for i in range(count)]
+    
+    def _generate_portrait_images(self, persona, settings, count, progress_callback=None, cancel_token=None):
         """
         Generate portrait images for a persona
         
@@ -312,6 +765,8 @@ class IntegrationManager:
             persona (dict): Persona data
             settings (dict): Generation settings
             count (int): Number of images to generate
+            progress_callback (callable): Progress callback for the denoising steps
+            cancel_token (CancellationToken): Aborts generation when cancelled
             
         Returns:
             list: Generated content data
@@ -356,35 +811,23 @@ class IntegrationManager:
         if additional_prompt:
             base_prompt += f"{additional_prompt}, "
         
-        # Generate images
-        images = self.image_generator.generate_multiple_images(
-            prompt=base_prompt,
-            count=count,
-            width=settings.get("width", 512),
-            height=settings.get("height", 512),
-            num_inference_steps=settings.get("steps", 30),
-            guidance_scale=settings.get("guidance", 7.5)
+        # Generate images, saving each batch while the rest are still being generated
+        return self._generate_and_save_images(
+            persona, base_prompt, count,
+            get_generation_params(settings, *CONTENT_TYPE_RESOLUTIONS["portrait"]),
+            seed=settings.get("seed"),
+            metadata={
+                "prompt": base_prompt,
+                "content_type": "portrait",
+                "style": style,
+                "setting": setting,
+                "settings": settings
+            },
+            progress_callback=progress_callback,
+            cancel_token=cancel_token
         )
-        
-        # Save images to content store
-        content_items = []
-        for i, image in enumerate(images):
-            content_data = self.content_manager.save_image(
-                image=image,
-                persona_id=persona["id"],
-                metadata={
-                    "prompt": base_prompt,
-                    "content_type": "portrait",
-                    "style": style,
-                    "setting": setting,
-                    "settings": settings
-                }
-            )
-            content_items.append(content_data)
-        
-        return content_items
     
-    def _generate_full_body_images(self, persona, settings, count):
+    def _generate_full_body_images(self, persona, settings, count, progress_callback=None, cancel_token=None):
         """
         Generate full body images for a persona
         
@@ -392,6 +835,8 @@ class IntegrationManager:
             persona (dict): Persona data
             settings (dict): Generation settings
             count (int): Number of images to generate
+            progress_callback (callable): Progress callback for the denoising steps
+            cancel_token (CancellationToken): Aborts generation when cancelled
             
         Returns:
             list: Generated content data
@@ -436,35 +881,23 @@ class IntegrationManager:
         # Generate and save images (same as portrait function)
         # ...
         
-        # Generate images
-        images = self.image_generator.generate_multiple_images(
-            prompt=base_prompt,
-            count=count,
-            width=settings.get("width", 512),
-            height=settings.get("height", 768),  # Taller for full body
-            num_inference_steps=settings.get("steps", 30),
-            guidance_scale=settings.get("guidance", 7.5)
+        # Generate images, saving each batch while the rest are still being generated
+        return self._generate_and_save_images(
+            persona, base_prompt, count,
+            get_generation_params(settings, *CONTENT_TYPE_RESOLUTIONS["full_body"]),
+            seed=settings.get("seed"),
+            metadata={
+                "prompt": base_prompt,
+                "content_type": "full_body",
+                "style": style,
+                "setting": setting,
+                "settings": settings
+            },
+            progress_callback=progress_callback,
+            cancel_token=cancel_token
         )
-        
-        # Save images to content store
-        content_items = []
-        for i, image in enumerate(images):
-            content_data = self.content_manager.save_image(
-                image=image,
-                persona_id=persona["id"],
-                metadata={
-                    "prompt": base_prompt,
-                    "content_type": "full_body",
-                    "style": style,
-                    "setting": setting,
-                    "settings": settings
-                }
-            )
-            content_items.append(content_data)
-        
-        return content_items
     
-    def _generate_action_images(self, persona, settings, count):
+    def _generate_action_images(self, persona, settings, count, progress_callback=None, cancel_token=None):
         """
         Generate action images for a persona
         
@@ -472,6 +905,8 @@ class IntegrationManager:
             persona (dict): Persona data
             settings (dict): Generation settings
             count (int): Number of images to generate
+            progress_callback (callable): Progress callback for the denoising steps
+            cancel_token (CancellationToken): Aborts generation when cancelled
             
         Returns:
             list: Generated content data
@@ -516,35 +951,23 @@ class IntegrationManager:
         if additional_prompt:
             base_prompt += f"{additional_prompt}, "
         
-        # Generate images
-        images = self.image_generator.generate_multiple_images(
-            prompt=base_prompt,
-            count=count,
-            width=settings.get("width", 512),
-            height=settings.get("height", 512),
-            num_inference_steps=settings.get("steps", 30),
-            guidance_scale=settings.get("guidance", 7.5)
+        # Generate images, saving each batch while the rest are still being generated
+        return self._generate_and_save_images(
+            persona, base_prompt, count,
+            get_generation_params(settings, *CONTENT_TYPE_RESOLUTIONS["action"]),
+            seed=settings.get("seed"),
+            metadata={
+                "prompt": base_prompt,
+                "content_type": "action",
+                "action": action,
+                "setting": setting,
+                "settings": settings
+            },
+            progress_callback=progress_callback,
+            cancel_token=cancel_token
         )
-        
-        # Save images to content store
-        content_items = []
-        for i, image in enumerate(images):
-            content_data = self.content_manager.save_image(
-                image=image,
-                persona_id=persona["id"],
-                metadata={
-                    "prompt": base_prompt,
-                    "content_type": "action",
-                    "action": action,
-                    "setting": setting,
-                    "settings": settings
-                }
-            )
-            content_items.append(content_data)
-        
-        return content_items
     
-    def _generate_social_post_images(self, persona, settings, count):
+    def _generate_social_post_images(self, persona, settings, count, progress_callback=None, cancel_token=None):
         """
         Generate social media post images for a persona
         
@@ -552,6 +975,8 @@ class IntegrationManager:
             persona (dict): Persona data
             settings (dict): Generation settings
             count (int): Number of images to generate
+            progress_callback (callable): Progress callback for the denoising steps
+            cancel_token (CancellationToken): Aborts generation when cancelled
             
         Returns:
             list: Generated content data
@@ -594,33 +1019,21 @@ class IntegrationManager:
         if additional_prompt:
             base_prompt += f"{additional_prompt}, "
         
-        # Generate images
-        images = self.image_generator.generate_multiple_images(
-            prompt=base_prompt,
-            count=count,
-            width=settings.get("width", 1024),
-            height=settings.get("height", 1024),
-            num_inference_steps=settings.get("steps", 30),
-            guidance_scale=settings.get("guidance", 7.5)
+        # Generate images, saving each batch while the rest are still being generated
+        return self._generate_and_save_images(
+            persona, base_prompt, count,
+            get_generation_params(settings, *CONTENT_TYPE_RESOLUTIONS["social_post"]),
+            seed=settings.get("seed"),
+            metadata={
+                "prompt": base_prompt,
+                "content_type": "social_post",
+                "platform": platform,
+                "theme": theme,
+                "settings": settings
+            },
+            progress_callback=progress_callback,
+            cancel_token=cancel_token
         )
-        
-        # Save images to content store
-        content_items = []
-        for i, image in enumerate(images):
-            content_data = self.content_manager.save_image(
-                image=image,
-                persona_id=persona["id"],
-                metadata={
-                    "prompt": base_prompt,
-                    "content_type": "social_post",
-                    "platform": platform,
-                    "theme": theme,
-                    "settings": settings
-                }
-            )
-            content_items.append(content_data)
-        
-        return content_items
 
 # Example usage
 if __name__ == "__main__":
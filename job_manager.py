@@ -0,0 +1,600 @@
+"""
+Background job utilities for AI Influencer Content Generator
+Runs long workflows on a worker pool backed by a persistent local job store
+"""
+
+import os
+import json
+import uuid
+import time
+import threading
+import logging
+import traceback
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+class JobCancelledError(Exception):
+    """
+    Raised inside a running job when cancellation has been requested
+    """
+
+class JobManager:
+    """
+    Manages background jobs stored as JSON files in a local directory
+
+    Any process sharing the storage directory can submit, inspect and cancel
+    jobs. Processes started with workers claim queued jobs in priority order,
+    so web processes can run with num_workers=0 while dedicated worker
+    processes do the heavy lifting. Queued jobs also get an empty marker file
+    in a queue subdirectory, so claiming only looks at queued jobs however
+    many finished ones are kept, and finished jobs are purged periodically.
+    """
+
+    def __init__(self, storage_dir="jobs", num_workers=2, poll_interval=1.0, progress_interval=0.5,
+                 purge_interval=3600.0, retention=7 * 24 * 3600):
+        """
+        Initialize the job manager
+
+        Args:
+            storage_dir (str): Directory to store job data
+            num_workers (int): Number of worker threads in this process (0 for submit-only)
+            poll_interval (float): Seconds between scans for jobs submitted by other processes
+            progress_interval (float): Minimum seconds between persisted progress updates
+            purge_interval (float): Seconds between purges of old finished jobs by the workers
+            retention (float): Age in seconds after which finished jobs are purged
+        """
+        self.storage_dir = storage_dir
+        self.queue_dir = os.path.join(storage_dir, "queue")
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+        self.purge_interval = purge_interval
+        self.retention = retention
+
+        # Ensure storage directories exist
+        os.makedirs(self.storage_dir, exist_ok=True)
+        os.makedirs(self.queue_dir, exist_ok=True)
+
+        self._handlers = {}
+        self._condition = threading.Condition()
+        self._running = False
+        self._workers = []
+        self._next_purge = 0.0
+
+        logger.info(f"Initialized JobManager with storage at {storage_dir}")
+
+    def register_handler(self, job_type, handler):
+        """
+        Register the function that executes a job type
+
+        The handler is called as handler(params, progress_callback) and must
+        return a JSON-serializable result. progress_callback(progress, message=None,
+        preview=None) takes a value between 0 and 1 and raises JobCancelledError
+        once the job has been cancelled. A JSON-serializable preview is stored
+        as the job's 'preview' right away, so other processes polling the job
+        can relay intermediate results.
+
+        Args:
+            job_type (str): Name of the job type
+            handler (callable): Function executing the job
+        """
+        self._handlers[job_type] = handler
+
+    def get_job_types(self):
+        """
+        Get the names of the registered job types
+
+        Returns:
+            list: Job type names
+        """
+        return list(self._handlers)
+
+    def start(self, num_workers=None):
+        """
+        Recover interrupted jobs and start the worker threads
+
+        Args:
+            num_workers (int): Worker threads to start instead of the configured num_workers
+        """
+        if num_workers is not None:
+            self.num_workers = num_workers
+        if self._running or self.num_workers <= 0:
+            return
+
+        self._recover_jobs()
+        self._purge_if_due()
+        self._running = True
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+        logger.info(f"Started {self.num_workers} job workers")
+
+    def stop(self, wait=True):
+        """
+        Stop the worker threads after their current jobs
+
+        Args:
+            wait (bool): Block until the worker threads exit
+        """
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        self._workers = []
+
+    def submit_job(self, job_type, params=None, priority=0):
+        """
+        Submit a job for background execution
+
+        Args:
+            job_type (str): Name of a registered job type
+            params (dict): JSON-serializable parameters for the handler
+            priority (int): Higher priorities run first
+
+        Returns:
+            dict: Job data
+        """
+        try:
+            job_id = str(uuid.uuid4())
+            now = time.time()
+
+            job_data = {
+                "id": job_id,
+                "type": job_type,
+                "params": params or {},
+                "priority": int(priority),
+                "status": JOB_QUEUED,
+                "progress": 0.0,
+                "message": None,
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "started_at": None,
+                "finished_at": None
+            }
+
+            self._save_job_data(job_data)
+            self._enqueue(job_id)
+
+            with self._condition:
+                self._condition.notify()
+
+            logger.info(f"Submitted {job_type} job {job_id} with priority {priority}")
+            return job_data
+
+        except Exception as e:
+            logger.error(f"Error submitting job: {str(e)}")
+            raise
+
+    def get_job(self, job_id):
+        """
+        Get job data by ID
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            dict: Job data or None if not found
+        """
+        job_file = self._job_path(job_id, ".json")
+        if not os.path.exists(job_file):
+            logger.warning(f"Job with ID {job_id} not found")
+            return None
+
+        with open(job_file, 'r') as f:
+            job_data = json.load(f)
+
+        if job_data["status"] not in FINISHED_STATES and self._is_cancel_requested(job_id):
+            job_data["cancel_requested"] = True
+        return job_data
+
+    def list_jobs(self, status=None):
+        """
+        List jobs with optional status filtering
+
+        Args:
+            status (str): Filter by job status
+
+        Returns:
+            list: Job data dictionaries, newest first
+        """
+        jobs = []
+        for filename in os.listdir(self.storage_dir):
+            if not filename.endswith(".json"):
+                continue
+            job_data = self._load_job_data(filename[:-len(".json")])
+            if job_data and (status is None or job_data["status"] == status):
+                jobs.append(job_data)
+
+        jobs.sort(key=lambda x: x["created_at"], reverse=True)
+        return jobs
+
+    def cancel_job(self, job_id):
+        """
+        Cancel a queued job or request cancellation of a running job
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            dict: Updated job data or None if not found
+        """
+        job_data = self.get_job(job_id)
+        if not job_data:
+            return None
+
+        if job_data["status"] in FINISHED_STATES:
+            return job_data
+
+        # Mark the job so whichever worker owns it stops at its next progress update
+        with open(self._job_path(job_id, ".cancel"), 'w') as f:
+            f.write(str(time.time()))
+
+        # A queued job can be cancelled directly if no worker has claimed it yet
+        if job_data["status"] == JOB_QUEUED and self._claim_job(job_id):
+            try:
+                # Re-read under the claim, a worker may have started or finished it since
+                job_data = self._load_job_data(job_id)
+                if job_data and job_data["status"] == JOB_QUEUED:
+                    job_data["status"] = JOB_CANCELLED
+                    job_data["finished_at"] = time.time()
+                    self._save_job_data(job_data)
+                    self._dequeue(job_id)
+            finally:
+                self._release_job(job_id)
+
+        logger.info(f"Cancellation requested for job {job_id}")
+        return self.get_job(job_id)
+
+    def purge_jobs(self, older_than=7 * 24 * 3600):
+        """
+        Delete finished jobs older than the given age
+
+        Args:
+            older_than (float): Age in seconds after which finished jobs are removed
+
+        Returns:
+            int: Number of jobs removed
+        """
+        cutoff = time.time() - older_than
+        removed = 0
+        for job_data in self.list_jobs():
+            if job_data["status"] in FINISHED_STATES and (job_data["finished_at"] or 0) < cutoff:
+                for suffix in (".json", ".cancel"):
+                    # Worker processes sharing the store may purge the same job
+                    try:
+                        os.remove(self._job_path(job_data["id"], suffix))
+                    except FileNotFoundError:
+                        pass
+                removed += 1
+        return removed
+
+    def _worker_loop(self):
+        """
+        Claim and execute queued jobs until stopped
+        """
+        while self._running:
+            job_data = self._claim_next_job()
+            if job_data is None:
+                self._purge_if_due()
+                with self._condition:
+                    if self._running:
+                        self._condition.wait(self.poll_interval)
+                continue
+
+            try:
+                self._execute_job(job_data)
+            finally:
+                self._release_job(job_data["id"])
+
+    def _claim_next_job(self):
+        """
+        Claim the highest-priority queued job with a registered handler
+
+        Returns:
+            dict: Claimed job data or None if nothing is runnable
+        """
+        queued = []
+        for job_id in os.listdir(self.queue_dir):
+            job_data = self._load_job_data(job_id)
+            if job_data is None or job_data["status"] in FINISHED_STATES:
+                # Marker left behind by a job that was purged or by a worker that died
+                self._dequeue(job_id)
+                continue
+            if job_data["status"] != JOB_QUEUED:
+                continue
+            if job_data["type"] in self._handlers:
+                queued.append(job_data)
+        queued.sort(key=lambda x: (-x["priority"], x["created_at"]))
+
+        for job in queued:
+            if not self._claim_job(job["id"]):
+                continue
+
+            # Re-read under the claim in case it changed since listing
+            job_data = self._load_job_data(job["id"])
+            if job_data and job_data["status"] == JOB_QUEUED:
+                return job_data
+            self._release_job(job["id"])
+
+        return None
+
+    def _execute_job(self, job_data):
+        """
+        Run a claimed job and persist its outcome
+
+        Args:
+            job_data (dict): Claimed job data
+        """
+        job_id = job_data["id"]
+
+        if self._is_cancel_requested(job_id):
+            job_data["status"] = JOB_CANCELLED
+            job_data["finished_at"] = time.time()
+            self._save_job_data(job_data)
+            self._dequeue(job_id)
+            return
+
+        job_data["status"] = JOB_RUNNING
+        job_data["started_at"] = time.time()
+        self._save_job_data(job_data)
+        self._dequeue(job_id)
+
+        logger.info(f"Running {job_data['type']} job {job_id}")
+
+        last_saved = [0.0]
+
+        def progress_callback(progress, message=None, preview=None):
+            if self._is_cancel_requested(job_id):
+                raise JobCancelledError(f"Job {job_id} was cancelled")
+
+            job_data["progress"] = round(min(1.0, max(0.0, float(progress))), 4)
+            if message is not None:
+                job_data["message"] = message
+            if preview is not None:
+                job_data["preview"] = preview
+
+            # Throttle writes, step callbacks can fire many times per second
+            now = time.time()
+            if preview is not None or now - last_saved[0] >= self.progress_interval:
+                last_saved[0] = now
+                self._save_job_data(job_data)
+
+        try:
+            handler = self._handlers[job_data["type"]]
+            result = handler(job_data["params"], progress_callback)
+
+            job_data["status"] = JOB_COMPLETED
+            job_data["progress"] = 1.0
+            job_data["result"] = result
+            logger.info(f"Completed job {job_id}")
+
+        except JobCancelledError:
+            job_data["status"] = JOB_CANCELLED
+            logger.info(f"Cancelled job {job_id}")
+
+        except Exception as e:
+            job_data["status"] = JOB_FAILED
+            job_data["error"] = str(e)
+            logger.error(f"Error running job {job_id}: {str(e)}\n{traceback.format_exc()}")
+
+        job_data["finished_at"] = time.time()
+        self._save_job_data(job_data)
+
+    def _recover_jobs(self):
+        """
+        Requeue jobs left running by a worker process that no longer exists
+
+        Also restores the queue markers of queued jobs, such as those
+        submitted before the queue directory existed.
+        """
+        for job_data in self.list_jobs():
+            if job_data["status"] == JOB_QUEUED:
+                self._enqueue(job_data["id"])
+            if job_data["status"] != JOB_RUNNING:
+                continue
+
+            lock_path = self._job_path(job_data["id"], ".lock")
+            try:
+                with open(lock_path, 'r') as f:
+                    owner_pid = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                owner_pid = 0
+
+            if owner_pid and owner_pid != os.getpid() and self._is_process_alive(owner_pid):
+                continue
+
+            if os.path.exists(lock_path):
+                os.remove(lock_path)
+            job_data["status"] = JOB_QUEUED
+            job_data["progress"] = 0.0
+            job_data["started_at"] = None
+            self._save_job_data(job_data)
+            self._enqueue(job_data["id"])
+            logger.info(f"Requeued interrupted job {job_data['id']}")
+
+    def _purge_if_due(self):
+        """
+        Purge old finished jobs if purge_interval has passed since the last purge
+        """
+        with self._condition:
+            now = time.time()
+            if now < self._next_purge:
+                return
+            self._next_purge = now + self.purge_interval
+
+        try:
+            removed = self.purge_jobs(older_than=self.retention)
+            if removed:
+                logger.info(f"Purged {removed} finished jobs")
+        except Exception as e:
+            logger.error(f"Error purging jobs: {str(e)}")
+
+    def _enqueue(self, job_id):
+        """
+        Add the queue marker of a job
+
+        Args:
+            job_id (str): ID of the job
+        """
+        with open(os.path.join(self.queue_dir, job_id), 'w'):
+            pass
+
+    def _dequeue(self, job_id):
+        """
+        Remove the queue marker of a job once it has left the queued state
+
+        Args:
+            job_id (str): ID of the job
+        """
+        try:
+            os.remove(os.path.join(self.queue_dir, job_id))
+        except FileNotFoundError:
+            pass
+
+    def _claim_job(self, job_id):
+        """
+        Atomically claim a job for this process
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            bool: True if the claim succeeded
+        """
+        try:
+            fd = os.open(self._job_path(job_id, ".lock"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def _release_job(self, job_id):
+        """
+        Release a claim taken with _claim_job
+
+        Args:
+            job_id (str): ID of the job
+        """
+        lock_path = self._job_path(job_id, ".lock")
+        if os.path.exists(lock_path):
+            os.remove(lock_path)
+
+    def _is_cancel_requested(self, job_id):
+        """
+        Check whether cancellation has been requested for a job
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            bool: True if the job should stop
+        """
+        return os.path.exists(self._job_path(job_id, ".cancel"))
+
+    def _is_process_alive(self, pid):
+        """
+        Check whether a process with the given PID exists
+
+        Args:
+            pid (int): Process ID
+
+        Returns:
+            bool: True if the process exists
+        """
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _job_path(self, job_id, suffix):
+        """
+        Get the path of a job file
+
+        Args:
+            job_id (str): ID of the job
+            suffix (str): File suffix ('.json', '.lock' or '.cancel')
+
+        Returns:
+            str: Path to the file
+        """
+        return os.path.join(self.storage_dir, f"{job_id}{suffix}")
+
+    def _load_job_data(self, job_id):
+        """
+        Load job data from disk, tolerating files removed concurrently
+
+        Args:
+            job_id (str): ID of the job
+
+        Returns:
+            dict: Job data or None if missing
+        """
+        try:
+            with open(self._job_path(job_id, ".json"), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_job_data(self, job_data):
+        """
+        Save job data to disk atomically
+
+        Args:
+            job_data (dict): Job data to save
+        """
+        try:
+            job_file = self._job_path(job_data["id"], ".json")
+            temp_file = f"{job_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(job_data, f, indent=2)
+            os.replace(temp_file, job_file)
+
+        except Exception as e:
+            logger.error(f"Error saving job data: {str(e)}")
+            raise
+
+# Example usage
+if __name__ == "__main__":
+    # Create job manager with a single worker
+    manager = JobManager(num_workers=1)
+
+    # Register a test job type that reports progress
+    def count_handler(params, progress_callback):
+        total = params.get("steps", 10)
+        for step in range(total):
+            time.sleep(0.1)
+            progress_callback((step + 1) / total, f"Step {step + 1}/{total}")
+        return {"steps": total}
+
+    manager.register_handler("count", count_handler)
+    manager.start()
+
+    # Submit test job and wait for it
+    job = manager.submit_job("count", {"steps": 20}, priority=1)
+    while manager.get_job(job["id"])["status"] not in FINISHED_STATES:
+        time.sleep(0.2)
+
+    print(f"Job finished: {manager.get_job(job['id'])}")
+    manager.stop()
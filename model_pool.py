@@ -0,0 +1,293 @@
+"""
+Model Pool Module for AI Influencer Content Generator
+Shares loaded diffusion pipelines across all callers in a process
+"""
+
+import os
+import threading
+import logging
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class ModelPool:
+    """
+    Process-wide registry of loaded pipelines with LRU eviction
+
+    Pipelines are keyed by (model_id, device, variant). Several models can be
+    resident at once; when the memory budget or model count is exceeded the
+    least recently used pipelines are released.
+    """
+
+    def __init__(self, max_bytes=None, max_models=2):
+        """
+        Initialize the model pool
+
+        Args:
+            max_bytes (int): Memory budget for resident pipelines (None for no byte limit)
+            max_models (int): Maximum number of resident pipelines
+        """
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._pipeline_locks = {}
+
+        logger.info(f"Initialized ModelPool with budget of {max_bytes} bytes and up to {max_models} models")
+
+    def get_pipeline(self, model_id, device, loader, variant=None):
+        """
+        Get a resident pipeline, loading it with loader() on first use
+
+        Args:
+            model_id (str): HuggingFace model ID
+            device (str): Device the pipeline runs on
+            loader (callable): Function returning a loaded pipeline
+            variant (str): Extra key for differently configured copies of a model
+
+        Returns:
+            Pipeline object shared by all callers with the same key
+        """
+        key = (model_id, device, variant)
+
+        pipeline = self.get_loaded(model_id, device, variant)
+        if pipeline is not None:
+            return pipeline
+
+        # Only one caller loads a given model, the others wait for it
+        with self._lock:
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            pipeline = self.get_loaded(model_id, device, variant)
+            if pipeline is not None:
+                return pipeline
+
+            logger.info(f"Loading {model_id} on {device} into model pool")
+            pipeline = loader()
+            size = self._estimate_size(pipeline)
+
+            with self._lock:
+                self._models[key] = pipeline
+                self._sizes[key] = size
+                self._evict(keep=key)
+
+            logger.info(f"Model pool now holds {len(self._models)} models ({self.get_total_bytes()} bytes)")
+            return pipeline
+
+    def get_loaded(self, model_id, device, variant=None):
+        """
+        Get a pipeline only if it is already resident
+
+        Args:
+            model_id (str): HuggingFace model ID
+            device (str): Device the pipeline runs on
+            variant (str): Extra key for differently configured copies of a model
+
+        Returns:
+            Pipeline object or None if not loaded
+        """
+        key = (model_id, device, variant)
+        with self._lock:
+            pipeline = self._models.get(key)
+            if pipeline is not None:
+                # Mark pipeline as most recently used
+                self._models.move_to_end(key)
+            return pipeline
+
+    def get_pipeline_lock(self, model_id, device, variant=None):
+        """
+        Get the lock serializing calls into a shared pipeline
+
+        Diffusers pipelines keep per-call scheduler state, so callers sharing
+        a pipeline must not run it concurrently.
+
+        Args:
+            model_id (str): HuggingFace model ID
+            device (str): Device the pipeline runs on
+            variant (str): Extra key for differently configured copies of a model
+
+        Returns:
+            threading.Lock: Lock for the pipeline
+        """
+        with self._lock:
+            return self._pipeline_locks.setdefault((model_id, device, variant), threading.Lock())
+
+    def is_pipeline_used(self, model_id, device, variant=None):
+        """
+        Check whether a pipeline has ever been run through get_pipeline_lock
+
+        Args:
+            model_id (str): HuggingFace model ID
+            device (str): Device the pipeline runs on
+            variant (str): Extra key for differently configured copies of a model
+
+        Returns:
+            bool: True once any caller has taken the pipeline's lock
+        """
+        with self._lock:
+            return (model_id, device, variant) in self._pipeline_locks
+
+    def release(self, model_id, device, variant=None):
+        """
+        Drop a pipeline from the pool
+
+        Args:
+            model_id (str): HuggingFace model ID
+            device (str): Device the pipeline runs on
+            variant (str): Extra key for differently configured copies of a model
+
+        Returns:
+            bool: True if a pipeline was released
+        """
+        key = (model_id, device, variant)
+        with self._lock:
+            if key not in self._models:
+                return False
+            self._drop(key)
+        self._release_device_memory(device)
+        return True
+
+    def warm_up(self, model_ids, loader_factory, background=True):
+        """
+        Load models ahead of the first request
+
+        Args:
+            model_ids (list): Model IDs to load
+            loader_factory (callable): Function taking a model ID and loading it into the pool
+            background (bool): Load in a daemon thread instead of blocking
+
+        Returns:
+            threading.Thread: Loader thread if background, otherwise None
+        """
+        def run():
+            for model_id in model_ids:
+                try:
+                    loader_factory(model_id)
+                except Exception as e:
+                    logger.error(f"Error warming up model {model_id}: {str(e)}")
+
+        if not background:
+            run()
+            return None
+
+        thread = threading.Thread(target=run, name="model-pool-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def get_total_bytes(self):
+        """
+        Get the estimated memory held by resident pipelines
+
+        Returns:
+            int: Total size in bytes
+        """
+        with self._lock:
+            return sum(self._sizes.values())
+
+    def get_stats(self):
+        """
+        Get pool statistics
+
+        Returns:
+            dict: Resident models and memory usage
+        """
+        with self._lock:
+            return {
+                "models": [
+                    {"model_id": key[0], "device": key[1], "variant": key[2], "bytes": self._sizes[key]}
+                    for key in self._models
+                ],
+                "total_bytes": sum(self._sizes.values()),
+                "max_bytes": self.max_bytes,
+                "max_models": self.max_models
+            }
+
+    def _evict(self, keep):
+        """
+        Evict least recently used pipelines until the pool fits its limits
+
+        Must be called with the pool lock held.
+
+        Args:
+            keep (tuple): Key that must not be evicted
+        """
+        def over_limit():
+            if self.max_models is not None and len(self._models) > self.max_models:
+                return True
+            return self.max_bytes is not None and sum(self._sizes.values()) > self.max_bytes
+
+        for key in list(self._models):
+            if not over_limit():
+                break
+            if key == keep:
+                continue
+            logger.info(f"Evicting {key[0]} on {key[1]} from model pool")
+            self._drop(key)
+            self._release_device_memory(key[1])
+
+    def _drop(self, key):
+        """
+        Remove a pipeline from the pool, must be called with the pool lock held
+
+        Args:
+            key (tuple): Pool key
+        """
+        del self._models[key]
+        del self._sizes[key]
+
+    def _estimate_size(self, pipeline):
+        """
+        Estimate the parameter memory of a pipeline
+
+        Args:
+            pipeline: Loaded pipeline
+
+        Returns:
+            int: Size in bytes
+        """
+        size = 0
+        components = getattr(pipeline, "components", {}) or {}
+        for component in components.values():
+            if hasattr(component, "parameters"):
+                size += sum(p.numel() * p.element_size() for p in component.parameters())
+        return size
+
+    def _release_device_memory(self, device):
+        """
+        Return cached allocator memory to the device after an eviction
+
+        Args:
+            device (str): Device the evicted pipeline ran on
+        """
+        if device.startswith("cuda"):
+            import torch
+            torch.cuda.empty_cache()
+
+_model_pool = None
+_model_pool_lock = threading.Lock()
+
+def get_model_pool():
+    """
+    Get the process-wide model pool
+
+    The limits are read from MODEL_POOL_MAX_BYTES and MODEL_POOL_MAX_MODELS
+    when the pool is first created.
+
+    Returns:
+        ModelPool: Shared model pool
+    """
+    global _model_pool
+    with _model_pool_lock:
+        if _model_pool is None:
+            max_bytes = os.environ.get("MODEL_POOL_MAX_BYTES")
+            _model_pool = ModelPool(
+                max_bytes=int(max_bytes) if max_bytes else None,
+                max_models=int(os.environ.get("MODEL_POOL_MAX_MODELS", 2))
+            )
+        return _model_pool
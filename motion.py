@@ -0,0 +1,111 @@
+"""
+Motion Module for AI Influencer Content Generator
+Precomputed Ken Burns zoom and pan trajectories for animating still images
+"""
+
+import os
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Motion presets as curve amplitudes over the clip progress p in [0, 1):
+#   zoom  = 1 + zoom_amplitude * sin(pi * p)
+#   pan_x = width * pan_x_amplitude * sin(2 * pi * p)
+#   pan_y = height * pan_y_amplitude * cos(2 * pi * p)
+MOTION_PRESETS = {
+    "subtle": {"zoom_amplitude": 0.05, "pan_x_amplitude": 0.02, "pan_y_amplitude": 0.02},
+    "medium": {"zoom_amplitude": 0.1, "pan_x_amplitude": 0.05, "pan_y_amplitude": 0.05},
+    "strong": {"zoom_amplitude": 0.15, "pan_x_amplitude": 0.1, "pan_y_amplitude": 0.1}
+}
+
+def get_motion_preset(motion_type):
+    """
+    Get the curve amplitudes of a motion preset
+
+    Args:
+        motion_type (str): Preset name from MOTION_PRESETS
+
+    Returns:
+        dict: Curve amplitudes
+    """
+    if motion_type not in MOTION_PRESETS:
+        raise ValueError(f"Unknown motion type: {motion_type}")
+    return MOTION_PRESETS[motion_type]
+
+def compute_trajectory(motion_type, total_frames, width, height):
+    """
+    Compute the affine transform of every frame of a Ken Burns motion
+
+    Each frame shows a crop of the image scaled up to full size. The crop
+    centres keep their fractional part, so the motion moves by subpixel
+    amounts instead of jumping between whole pixels.
+
+    Args:
+        motion_type (str): Preset name from MOTION_PRESETS
+        total_frames (int): Number of frames in the clip
+        width (int): Image width
+        height (int): Image height
+
+    Returns:
+        numpy.ndarray: Affine matrices of shape (total_frames, 2, 3) mapping image to frame coordinates
+    """
+    preset = get_motion_preset(motion_type)
+    progress = np.arange(total_frames, dtype=np.float64) / total_frames
+
+    zoom = 1.0 + preset["zoom_amplitude"] * np.sin(progress * np.pi)
+    pan_x = width * preset["pan_x_amplitude"] * np.sin(progress * 2 * np.pi)
+    pan_y = height * preset["pan_y_amplitude"] * np.cos(progress * 2 * np.pi)
+
+    # Keep the crop, width / zoom by height / zoom, inside the image
+    half_crop_width = width / zoom / 2
+    half_crop_height = height / zoom / 2
+    center_x = np.clip(width / 2 + pan_x, half_crop_width, width - half_crop_width)
+    center_y = np.clip(height / 2 + pan_y, half_crop_height, height - half_crop_height)
+
+    # Scale by zoom about the crop centre and move it to the frame centre
+    matrices = np.zeros((total_frames, 2, 3), dtype=np.float64)
+    matrices[:, 0, 0] = zoom
+    matrices[:, 1, 1] = zoom
+    matrices[:, 0, 2] = width / 2 - zoom * center_x
+    matrices[:, 1, 2] = height / 2 - zoom * center_y
+    return matrices
+
+def render_frames(image, matrices, workers=None):
+    """
+    Render frames for a trajectory in a thread pool, yielding them in order
+
+    cv2.warpAffine releases the GIL, so frames render in parallel. At most
+    two frames per worker are in flight, which keeps memory bounded for
+    long clips.
+
+    Args:
+        image (numpy.ndarray): Source image
+        matrices (numpy.ndarray): Affine matrices from compute_trajectory
+        workers (int): Render threads (None for the CPU count)
+
+    Yields:
+        numpy.ndarray: Frames with the source image dimensions
+    """
+    height, width = image.shape[:2]
+    workers = workers or os.cpu_count() or 1
+
+    def render(matrix):
+        return cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                              borderMode=cv2.BORDER_REPLICATE)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="motion-render") as executor:
+        in_flight = deque()
+        for matrix in matrices:
+            in_flight.append(executor.submit(render, matrix))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+
+        while in_flight:
+            yield in_flight.popleft().result()
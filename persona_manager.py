@@ -4,7 +4,6 @@ Handles creation and storage of AI personas with consistent identity
 """
 
 import os
-import torch
 import numpy as np
 from PIL import Image
 import logging
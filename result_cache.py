@@ -0,0 +1,181 @@
+"""
+Result Cache Module for AI Influencer Content Generator
+Stores deterministic generation results on disk, addressed by their parameters
+"""
+
+import os
+import json
+import hashlib
+import threading
+import logging
+from PIL import Image
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class ImageResultCache:
+    """
+    Content-addressed on-disk cache of generated images with LRU eviction
+
+    Only seeded generations are deterministic, so callers should only cache
+    results for requests with an explicit seed. Entries are PNG files named
+    by the SHA-256 of the generation parameters; file modification times
+    track recency for eviction.
+    """
+
+    def __init__(self, cache_dir="cache/images", max_bytes=1024 * 1024 * 1024):
+        """
+        Initialize the result cache
+
+        Args:
+            cache_dir (str): Directory to store cached images
+            max_bytes (int): Maximum total size of cached images in bytes
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Ensure cache directory exists
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.current_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir)
+                                 if entry.name.endswith(".png"))
+
+        logger.info(f"Initialized ImageResultCache at {cache_dir} ({self.current_bytes} bytes cached)")
+
+    def make_key(self, **params):
+        """
+        Build the cache key for a set of generation parameters
+
+        Args:
+            **params: Generation parameters (model, prompts, size, steps, guidance, seed)
+
+        Returns:
+            str: Hex digest identifying the result
+        """
+        payload = json.dumps(params, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Load a cached image
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            PIL.Image: Cached image or None if not cached
+        """
+        path = self._entry_path(key)
+        try:
+            with Image.open(path) as img:
+                image = img.convert("RGB")
+
+            # Refresh recency for LRU eviction
+            os.utime(path, None)
+
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return image
+
+    def put(self, key, image):
+        """
+        Store an image, evicting least recently used entries beyond the size cap
+
+        Args:
+            key (str): Cache key from make_key
+            image (PIL.Image): Image to cache
+        """
+        path = self._entry_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            image.save(temp_path, "PNG")
+            size = os.path.getsize(temp_path)
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+
+        except Exception as e:
+            logger.warning(f"Could not cache generated image: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        with self._lock:
+            self.current_bytes += size - previous
+            if self.current_bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        """
+        Remove all cached images
+        """
+        with self._lock:
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(".png"):
+                    os.remove(entry.path)
+            self.current_bytes = 0
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Hit/miss counters and disk usage
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _evict(self):
+        """
+        Delete least recently used entries until the cache fits its cap
+
+        Must be called with the cache lock held. The directory is rescanned so
+        entries written by other processes are accounted for.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        self.current_bytes = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if self.current_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def _entry_path(self, key):
+        """
+        Get the file path for a cache key
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            str: Path to the cached PNG
+        """
+        return os.path.join(self.cache_dir, f"{key}.png")
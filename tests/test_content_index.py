@@ -0,0 +1,93 @@
+"""
+Tests for the content index module
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.content_index import ContentIndex
+
+def make_record(content_id, created_at, content_type="image", persona_id="persona", style=None):
+    """
+    Build a content record as stored in content.json
+    """
+    return {
+        "id": content_id,
+        "type": content_type,
+        "persona_id": persona_id,
+        "created_at": created_at,
+        "metadata": {"style": style}
+    }
+
+class ListPageTest(unittest.TestCase):
+    """
+    Tests for ContentIndex.list_page cursors
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = ContentIndex(os.path.join(self.temp_dir, "index.db"))
+
+    def tearDown(self):
+        self.index.engine.dispose()
+        shutil.rmtree(self.temp_dir)
+
+    def list_all(self, limit, **kwargs):
+        """
+        Follow the cursors through every page, returning the IDs of each page
+        """
+        pages = []
+        after = None
+        while True:
+            records, after = self.index.list_page(limit=limit, after=after, **kwargs)
+            pages.append([record["id"] for record in records])
+            if after is None:
+                return pages
+
+    def test_empty_index(self):
+        self.assertEqual(self.index.list_page(limit=10), ([], None))
+
+    def test_pages_cover_every_record_once_newest_first(self):
+        self.index.add_many([make_record(f"c{i:02d}", f"2024-01-01T00:00:{i:02d}") for i in range(7)])
+        pages = self.list_all(limit=3)
+        self.assertEqual(pages, [["c06", "c05", "c04"], ["c03", "c02", "c01"], ["c00"]])
+
+    def test_exact_multiple_of_limit_has_no_trailing_cursor(self):
+        self.index.add_many([make_record(f"c{i}", f"2024-01-0{i + 1}") for i in range(4)])
+        records, after = self.index.list_page(limit=4)
+        self.assertEqual(len(records), 4)
+        self.assertIsNone(after)
+
+        pages = self.list_all(limit=2)
+        self.assertEqual(pages, [["c3", "c2"], ["c1", "c0"]])
+
+    def test_cursor_is_last_record_of_page(self):
+        self.index.add_many([make_record(f"c{i}", f"2024-01-0{i + 1}") for i in range(3)])
+        records, after = self.index.list_page(limit=2)
+        self.assertEqual(after, ("2024-01-02", "c1"))
+        self.assertEqual([record["id"] for record in records], ["c2", "c1"])
+
+    def test_equal_timestamps_are_split_by_id(self):
+        self.index.add_many([make_record(content_id, "2024-01-01") for content_id in ("a", "b", "c", "d", "e")])
+        pages = self.list_all(limit=2)
+        self.assertEqual(pages, [["e", "d"], ["c", "b"], ["a"]])
+
+    def test_filters_apply_to_every_page(self):
+        records = []
+        for i in range(8):
+            records.append(make_record(f"c{i}", f"2024-01-0{i + 1}", content_type="video" if i % 2 else "image",
+                                       style="casual" if i < 4 else "formal"))
+        self.index.add_many(records)
+
+        self.assertEqual(self.list_all(limit=1, content_type="video"), [["c7"], ["c5"], ["c3"], ["c1"]])
+        self.assertEqual(self.list_all(limit=3, content_type="image", filters={"style": "casual"}),
+                         [["c2", "c0"]])
+
+    def test_unknown_filter_raises(self):
+        with self.assertRaises(ValueError):
+            self.index.list_page(filters={"prompt": "beach"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+Tests for the encoder profiles module
+"""
+
+import unittest
+
+from models.encoder_profiles import (ENCODER_PROFILES, build_audio_args, build_encoder_args, build_poster_args,
+                                     build_proxy_args, get_output_extension, get_scaled_size)
+
+def get_option(args, flag):
+    """
+    Get the value following an ffmpeg flag, None if the flag is missing
+    """
+    return args[args.index(flag) + 1] if flag in args else None
+
+class BuildEncoderArgsTest(unittest.TestCase):
+    """
+    Tests for build_encoder_args
+    """
+
+    def test_default_quality_is_standard(self):
+        self.assertEqual(build_encoder_args(), build_encoder_args("standard"))
+        self.assertEqual(build_encoder_args("unknown"), build_encoder_args("standard"))
+
+    def test_x264_profiles(self):
+        for quality, profile in ENCODER_PROFILES.items():
+            args = build_encoder_args(quality)
+            self.assertEqual(get_option(args, "-c:v"), "libx264")
+            self.assertEqual(get_option(args, "-preset"), profile["preset"])
+            self.assertEqual(get_option(args, "-crf"), str(profile["crf"]))
+            self.assertEqual(get_option(args, "-profile:v"), "high")
+            self.assertEqual(get_option(args, "-pix_fmt"), "yuv420p")
+            self.assertEqual(get_option(args, "-movflags"), "+faststart")
+
+    def test_x265_offsets_crf_and_tags_hevc(self):
+        args = build_encoder_args("high", codec="x265")
+        self.assertEqual(get_option(args, "-c:v"), "libx265")
+        self.assertEqual(get_option(args, "-crf"), "23")
+        self.assertEqual(get_option(args, "-tag:v"), "hvc1")
+        self.assertNotIn("-profile:v", args)
+
+    def test_vp9_uses_constant_quality_without_faststart(self):
+        args = build_encoder_args("draft", codec="vp9")
+        self.assertEqual(get_option(args, "-c:v"), "libvpx-vp9")
+        self.assertEqual(get_option(args, "-crf"), "36")
+        self.assertEqual(get_option(args, "-b:v"), "0")
+        self.assertEqual(get_option(args, "-cpu-used"), "5")
+        self.assertNotIn("-preset", args)
+        self.assertNotIn("-movflags", args)
+        self.assertEqual(get_output_extension("draft", codec="vp9"), "webm")
+
+    def test_still_image_tune_only_for_x264(self):
+        self.assertEqual(get_option(build_encoder_args(still_image=True), "-tune"), "stillimage")
+        self.assertNotIn("-tune", build_encoder_args())
+        self.assertNotIn("-tune", build_encoder_args(codec="x265", still_image=True))
+
+    def test_threads(self):
+        self.assertEqual(get_option(build_encoder_args(threads=4), "-threads"), "4")
+        self.assertNotIn("-threads", build_encoder_args())
+
+    def test_unknown_codec_raises(self):
+        with self.assertRaises(ValueError):
+            build_encoder_args(codec="av1")
+
+class BuildAudioArgsTest(unittest.TestCase):
+    """
+    Tests for build_audio_args
+    """
+
+    def test_supported_codec_is_copied(self):
+        self.assertEqual(build_audio_args("aac"), ["-c:a", "copy"])
+        self.assertEqual(build_audio_args("opus", codec="vp9"), ["-c:a", "copy"])
+
+    def test_unsupported_codec_is_reencoded_for_mp4(self):
+        self.assertEqual(build_audio_args("vorbis"), ["-c:a", "aac", "-b:a", "192k"])
+        self.assertEqual(build_audio_args("pcm_s16le", codec="x265"), ["-c:a", "aac", "-b:a", "192k"])
+
+    def test_unsupported_codec_is_reencoded_for_webm(self):
+        self.assertEqual(build_audio_args("aac", codec="vp9"), ["-c:a", "libopus", "-b:a", "128k"])
+
+class PreviewArgsTest(unittest.TestCase):
+    """
+    Tests for the preview proxy and poster arguments
+    """
+
+    def test_scaled_size_keeps_aspect_ratio_with_even_sides(self):
+        self.assertEqual(get_scaled_size(1920, 1080, 480), (480, 270))
+        self.assertEqual(get_scaled_size(1080, 1920, 320), (180, 320))
+        self.assertEqual(get_scaled_size(1001, 999, 480), (480, 478))
+
+    def test_scaled_size_never_upscales(self):
+        self.assertEqual(get_scaled_size(300, 200, 480), (300, 200))
+        self.assertEqual(get_scaled_size(301, 201, 480), (300, 200))
+
+    def test_proxy_args(self):
+        args = build_proxy_args(1920, 1080, threads=2)
+        self.assertEqual(get_option(args, "-vf"), "scale=480:270:flags=area")
+        self.assertEqual(get_option(args, "-c:v"), "libx264")
+        self.assertEqual(get_option(args, "-maxrate"), "600k")
+        self.assertEqual(get_option(args, "-bufsize"), "1200k")
+        self.assertEqual(get_option(args, "-threads"), "2")
+        self.assertIn("-an", args)
+
+    def test_webp_poster_args(self):
+        args = build_poster_args(1920, 1080)
+        self.assertEqual(get_option(args, "-vf"), "fps=10,scale=320:180:flags=area")
+        self.assertEqual(get_option(args, "-c:v"), "libwebp")
+        self.assertEqual(get_option(args, "-t"), "3")
+        self.assertEqual(get_option(args, "-loop"), "0")
+
+    def test_gif_poster_uses_generated_palette(self):
+        args = build_poster_args(1920, 1080, poster_format="gif")
+        self.assertIn("palettegen", get_option(args, "-vf"))
+        self.assertNotIn("-c:v", args)
+
+    def test_unknown_poster_format_raises(self):
+        with self.assertRaises(ValueError):
+            build_poster_args(1920, 1080, poster_format="apng")
+
+if __name__ == "__main__":
+    unittest.main()
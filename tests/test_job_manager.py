@@ -0,0 +1,176 @@
+"""
+Tests for the job manager module
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from utils.job_manager import (JOB_CANCELLED, JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING,
+                               JobCancelledError, JobManager)
+
+class JobManagerTest(unittest.TestCase):
+    """
+    Tests for claiming, cancelling and recovering jobs
+
+    Workers are not started, the tests drive claiming and execution directly
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = self.create_manager()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def create_manager(self):
+        """
+        Create a submit-only manager on the shared storage directory
+        """
+        manager = JobManager(storage_dir=self.temp_dir, num_workers=0)
+        manager.register_handler("echo", lambda params, progress: params)
+        return manager
+
+    def run_next(self, manager=None):
+        """
+        Claim and execute the next job like a worker thread does
+        """
+        manager = manager or self.manager
+        job_data = manager._claim_next_job()
+        if job_data is None:
+            return None
+        try:
+            manager._execute_job(job_data)
+        finally:
+            manager._release_job(job_data["id"])
+        return manager.get_job(job_data["id"])
+
+    def test_jobs_are_claimed_by_priority_then_age(self):
+        low = self.manager.submit_job("echo", {"n": 1})
+        high = self.manager.submit_job("echo", {"n": 2}, priority=5)
+        later_low = self.manager.submit_job("echo", {"n": 3})
+
+        order = [self.run_next()["id"] for _ in range(3)]
+        self.assertEqual(order, [high["id"], low["id"], later_low["id"]])
+        self.assertIsNone(self.manager._claim_next_job())
+
+    def test_claimed_job_is_not_claimed_twice(self):
+        job = self.manager.submit_job("echo")
+        other = self.create_manager()
+
+        claimed = self.manager._claim_next_job()
+        self.assertEqual(claimed["id"], job["id"])
+        self.assertIsNone(other._claim_next_job())
+
+        self.manager._release_job(job["id"])
+        self.assertEqual(other._claim_next_job()["id"], job["id"])
+
+    def test_jobs_without_handler_are_left_queued(self):
+        job = self.manager.submit_job("unknown")
+        self.assertIsNone(self.manager._claim_next_job())
+        self.assertEqual(self.manager.get_job(job["id"])["status"], JOB_QUEUED)
+
+    def test_completed_and_failed_jobs(self):
+        def fail(params, progress):
+            raise RuntimeError("boom")
+        self.manager.register_handler("fail", fail)
+
+        completed = self.manager.submit_job("echo", {"value": 1})
+        failed = self.manager.submit_job("fail")
+
+        self.run_next()
+        self.run_next()
+
+        job_data = self.manager.get_job(completed["id"])
+        self.assertEqual((job_data["status"], job_data["result"]), (JOB_COMPLETED, {"value": 1}))
+        job_data = self.manager.get_job(failed["id"])
+        self.assertEqual((job_data["status"], job_data["error"]), (JOB_FAILED, "boom"))
+        self.assertEqual(os.listdir(self.manager.queue_dir), [])
+
+    def test_cancel_queued_job(self):
+        job = self.manager.submit_job("echo")
+        job_data = self.manager.cancel_job(job["id"])
+
+        self.assertEqual(job_data["status"], JOB_CANCELLED)
+        self.assertIsNone(self.manager._claim_next_job())
+        self.assertEqual(os.listdir(self.manager.queue_dir), [])
+
+    def test_cancel_running_job_stops_at_next_progress_update(self):
+        def wait_for_cancel(params, progress):
+            self.manager.cancel_job(job["id"])
+            self.assertTrue(self.manager.get_job(job["id"])["cancel_requested"])
+            progress(0.5)
+            return "unreachable"
+        self.manager.register_handler("slow", wait_for_cancel)
+
+        job = self.manager.submit_job("slow")
+        self.assertEqual(self.run_next()["status"], JOB_CANCELLED)
+
+    def test_progress_callback_raises_once_cancelled(self):
+        progress_calls = []
+
+        def handler(params, progress):
+            progress(0.25, "first")
+            progress_calls.append(self.manager.get_job(job["id"])["progress"])
+            self.manager.cancel_job(job["id"])
+            with self.assertRaises(JobCancelledError):
+                progress(0.5)
+            raise JobCancelledError("stopped")
+        self.manager.register_handler("steps", handler)
+
+        job = self.manager.submit_job("steps")
+        self.assertEqual(self.run_next()["status"], JOB_CANCELLED)
+        self.assertEqual(progress_calls, [0.25])
+
+    def test_cancel_finished_job_is_a_no_op(self):
+        job = self.manager.submit_job("echo")
+        self.run_next()
+        self.assertEqual(self.manager.cancel_job(job["id"])["status"], JOB_COMPLETED)
+        self.assertIsNone(self.manager.cancel_job("missing"))
+
+    def mark_running(self, job_id, owner_pid):
+        """
+        Leave a job as if a worker in owner_pid were running it
+        """
+        job_data = self.manager.get_job(job_id)
+        job_data["status"] = JOB_RUNNING
+        job_data["started_at"] = time.time()
+        self.manager._save_job_data(job_data)
+        self.manager._dequeue(job_id)
+        with open(self.manager._job_path(job_id, ".lock"), 'w') as f:
+            f.write(str(owner_pid))
+
+    def test_recover_requeues_jobs_of_dead_workers(self):
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+
+        job = self.manager.submit_job("echo")
+        self.mark_running(job["id"], process.pid)
+        self.manager._recover_jobs()
+
+        job_data = self.manager.get_job(job["id"])
+        self.assertEqual((job_data["status"], job_data["started_at"]), (JOB_QUEUED, None))
+        self.assertEqual(self.run_next()["status"], JOB_COMPLETED)
+
+    def test_recover_keeps_jobs_of_live_workers(self):
+        job = self.manager.submit_job("echo")
+        self.mark_running(job["id"], os.getppid())
+        self.manager._recover_jobs()
+
+        self.assertEqual(self.manager.get_job(job["id"])["status"], JOB_RUNNING)
+        self.assertIsNone(self.manager._claim_next_job())
+
+    def test_recover_restores_missing_queue_markers(self):
+        job = self.manager.submit_job("echo")
+        self.manager._dequeue(job["id"])
+        self.assertIsNone(self.manager._claim_next_job())
+
+        self.manager._recover_jobs()
+        self.assertEqual(self.run_next()["id"], job["id"])
+
+if __name__ == "__main__":
+    unittest.main()
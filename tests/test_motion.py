@@ -0,0 +1,60 @@
+"""
+Tests for the motion module
+"""
+
+import unittest
+
+import numpy as np
+
+from models.motion import MOTION_PRESETS, compute_trajectory
+
+class ComputeTrajectoryTest(unittest.TestCase):
+    """
+    Tests for compute_trajectory
+    """
+
+    def test_shape(self):
+        matrices = compute_trajectory("subtle", 48, 512, 768)
+        self.assertEqual(matrices.shape, (48, 2, 3))
+
+    def test_first_frame_shows_the_whole_image(self):
+        for motion_type in MOTION_PRESETS:
+            matrices = compute_trajectory(motion_type, 30, 512, 512)
+            np.testing.assert_allclose(matrices[0], [[1, 0, 0], [0, 1, 0]], atol=1e-9)
+
+    def test_uniform_zoom_peaks_mid_clip(self):
+        matrices = compute_trajectory("medium", 100, 640, 480)
+        np.testing.assert_array_equal(matrices[:, 0, 0], matrices[:, 1, 1])
+        np.testing.assert_array_equal(matrices[:, 0, 1], 0)
+        np.testing.assert_array_equal(matrices[:, 1, 0], 0)
+        self.assertEqual(int(np.argmax(matrices[:, 0, 0])), 50)
+        self.assertAlmostEqual(matrices[50, 0, 0], 1.1)
+
+    def test_crop_stays_inside_the_image(self):
+        width, height = 640, 360
+        for motion_type in MOTION_PRESETS:
+            matrices = compute_trajectory(motion_type, 120, width, height)
+            zoom = matrices[:, 0, 0]
+            # Frame corners mapped back to image coordinates
+            left = -matrices[:, 0, 2] / zoom
+            right = (width - matrices[:, 0, 2]) / zoom
+            top = -matrices[:, 1, 2] / zoom
+            bottom = (height - matrices[:, 1, 2]) / zoom
+            self.assertTrue(np.all(left >= -1e-9) and np.all(right <= width + 1e-9))
+            self.assertTrue(np.all(top >= -1e-9) and np.all(bottom <= height + 1e-9))
+
+    def test_motion_is_subpixel(self):
+        matrices = compute_trajectory("subtle", 60, 512, 512)
+        offsets = matrices[:, :, 2]
+        self.assertTrue(np.any(np.abs(offsets - np.round(offsets)) > 1e-3))
+
+    def test_deterministic(self):
+        np.testing.assert_array_equal(compute_trajectory("strong", 25, 300, 200),
+                                      compute_trajectory("strong", 25, 300, 200))
+
+    def test_unknown_motion_type_raises(self):
+        with self.assertRaises(ValueError):
+            compute_trajectory("spin", 10, 512, 512)
+
+if __name__ == "__main__":
+    unittest.main()
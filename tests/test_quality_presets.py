@@ -0,0 +1,44 @@
+"""
+Tests for the quality presets module
+"""
+
+import unittest
+
+from models.quality_presets import MIN_RESOLUTION, get_generation_params, scale_resolution
+
+class ScaleResolutionTest(unittest.TestCase):
+    """
+    Tests for scale_resolution
+    """
+
+    def test_unscaled_size_is_kept(self):
+        self.assertEqual(scale_resolution(512, 1.0), 512)
+        self.assertEqual(scale_resolution(768, 1.0), 768)
+
+    def test_result_is_rounded_down_to_multiple_of_8(self):
+        self.assertEqual(scale_resolution(512, 0.75), 384)
+        self.assertEqual(scale_resolution(1000, 0.75), 744)
+        self.assertEqual(scale_resolution(523, 1.0), 520)
+
+    def test_result_is_clamped_to_minimum(self):
+        self.assertEqual(scale_resolution(512, 0.25), MIN_RESOLUTION)
+        self.assertEqual(scale_resolution(8, 1.0), MIN_RESOLUTION)
+
+    def test_upscaling(self):
+        self.assertEqual(scale_resolution(512, 1.5), 768)
+
+class GetGenerationParamsTest(unittest.TestCase):
+    """
+    Tests for get_generation_params resolution handling
+    """
+
+    def test_draft_scales_default_resolution(self):
+        params = get_generation_params({"quality": "draft"})
+        self.assertEqual((params["width"], params["height"]), (384, 384))
+
+    def test_explicit_resolution_is_not_scaled(self):
+        params = get_generation_params({"quality": "draft", "width": 640, "height": 480})
+        self.assertEqual((params["width"], params["height"]), (640, 480))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Tests for the result cache module
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from models.result_cache import ImageResultCache
+
+def make_image(color):
+    """
+    Build a small solid color image
+    """
+    return Image.new("RGB", (32, 32), color)
+
+class ImageResultCacheEvictionTest(unittest.TestCase):
+    """
+    Tests for ImageResultCache size accounting and LRU eviction
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        probe = ImageResultCache(os.path.join(self.temp_dir, "probe"))
+        probe.put("probe", make_image((0, 0, 0)))
+        self.entry_bytes = probe.current_bytes
+
+        # Room for two entries, a third one forces an eviction
+        self.cache = ImageResultCache(os.path.join(self.temp_dir, "cache"), max_bytes=2 * self.entry_bytes)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def put(self, key, mtime):
+        """
+        Store an entry and backdate its recency
+        """
+        self.cache.put(key, make_image((0, 0, 0)))
+        os.utime(self.cache._entry_path(key), (mtime, mtime))
+
+    def cached_keys(self):
+        return sorted(name[:-len(".png")] for name in os.listdir(self.cache.cache_dir) if name.endswith(".png"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self.put("a", 1000)
+        self.put("b", 2000)
+        self.put("c", 3000)
+
+        self.assertEqual(self.cached_keys(), ["b", "c"])
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertEqual(self.cache.current_bytes, 2 * self.entry_bytes)
+
+    def test_get_refreshes_recency(self):
+        self.put("a", 1000)
+        self.put("b", 2000)
+        self.assertIsNotNone(self.cache.get("a"))
+        self.put("c", 3000)
+
+        self.assertEqual(self.cached_keys(), ["a", "c"])
+        self.assertIsNone(self.cache.get("b"))
+
+    def test_overwriting_an_entry_is_not_counted_twice(self):
+        self.put("a", 1000)
+        self.put("a", 1000)
+        self.put("b", 2000)
+
+        self.assertEqual(self.cached_keys(), ["a", "b"])
+        self.assertEqual(self.cache.evictions, 0)
+        self.assertEqual(self.cache.current_bytes, 2 * self.entry_bytes)
+
+    def test_existing_entries_are_counted_on_startup(self):
+        self.put("a", 1000)
+        self.put("b", 2000)
+
+        reopened = ImageResultCache(self.cache.cache_dir, max_bytes=self.entry_bytes)
+        self.assertEqual(reopened.current_bytes, 2 * self.entry_bytes)
+
+        reopened.put("c", make_image((0, 0, 0)))
+        self.assertEqual(self.cached_keys(), ["c"])
+        self.assertEqual(reopened.evictions, 2)
+
+    def test_stats(self):
+        self.put("a", 1000)
+        self.cache.get("a")
+        self.cache.get("missing")
+
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+        self.assertEqual(stats["bytes"], self.entry_bytes)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -466,9 +466,12 @@ class ValidationManager:
                 "passes_validation": False
             }
             
-            # Import image generator
+            # Import image generator, fixed seeds let repeated runs reuse cached results
             from models.image_generator import ImageGenerator
-            generator = ImageGenerator()
+            from models.result_cache import ImageResultCache
+            generator = ImageGenerator(
+                result_cache=ImageResultCache(cache_dir=os.path.join(self.validation_dir, "cache"))
+            )
             
             # Test case 1: Basic portrait generation
             try:
@@ -478,7 +481,8 @@ class ValidationManager:
                     width=512,
                     height=512,
                     num_inference_steps=30,
-                    guidance_scale=7.5
+                    guidance_scale=7.5,
+                    seed=42
                 )
                 
                 # Save generated image for validation
@@ -516,7 +520,8 @@ class ValidationManager:
                     width=512,
                     height=768,
                     num_inference_steps=30,
-                    guidance_scale=7.5
+                    guidance_scale=7.5,
+                    seed=42
                 )
                 
                 # Save generated image for validation
@@ -4,47 +4,97 @@ Integrates open-source tools for converting static images to videos
 """
 
 import os
+import json
 import cv2
 import numpy as np
 from PIL import Image
 import tempfile
 import subprocess
 import logging
+import math
+import threading
 import uuid
 import time
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from models.encoder_profiles import (POSTER_FORMATS, build_audio_args, build_encoder_args, build_poster_args,
+                                     build_proxy_args, get_output_extension)
+from models.motion import compute_trajectory, get_motion_preset, render_frames
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Clips at least this long (seconds) are rendered as parallel segments by default
+SEGMENTED_MIN_DURATION = 20
+
+# Shortest segment (seconds) worth a separate process and encoder
+MIN_SEGMENT_DURATION = 5
+
 class ImageToVideoConverter:
     """
     Handles conversion of static images to videos with motion
     """
     
-    def __init__(self, output_dir="videos"):
+    def __init__(self, output_dir="videos", render_workers=None, encoder_threads=None,
+                 face_swap_model_path=None, face_detect_interval=10, poster_format="webp"):
         """
         Initialize the image to video converter
         
         Args:
             output_dir (str): Directory to store output videos
+            render_workers (int): Threads rendering animation frames (None for the CPU count)
+            encoder_threads (int): Threads per ffmpeg encoder (None to let the encoder decide)
+            face_swap_model_path (str): Path to inswapper_128.onnx (None for the insightface model directory)
+            face_detect_interval (int): Frames between face detections during face swaps
+            poster_format (str): Format of animated preview posters from encoder_profiles.POSTER_FORMATS
         """
         self.output_dir = output_dir
+        self.render_workers = render_workers
+        self.encoder_threads = encoder_threads
+        self.face_swap_model_path = face_swap_model_path
+        self.face_detect_interval = face_detect_interval
+        self.poster_format = poster_format
+        
+        self._face_swapper = None
+        self._face_swapper_lock = threading.Lock()
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
         
         logger.info(f"Initialized ImageToVideoConverter with output at {output_dir}")
+    
+    @property
+    def face_swapper(self):
+        """
+        Face swapper, importing insightface and onnxruntime on first access
+        """
+        with self._face_swapper_lock:
+            if self._face_swapper is None:
+                from models.face_swapper import FaceSwapper
+                self._face_swapper = FaceSwapper(swapper_model_path=self.face_swap_model_path,
+                                                 detect_interval=self.face_detect_interval)
+            return self._face_swapper
         
-    def animate_image(self, image_path, duration=5, motion_type="subtle", fps=30):
+    def animate_image(self, image_path, duration=5, motion_type="subtle", fps=30, streaming=True,
+                      quality=None, codec=None, segments=None, previews=False):
         """
         Animate a static image with motion effects
         
         Args:
             image_path (str): Path to the input image
             duration (int): Duration of output video in seconds
-            motion_type (str): Type of motion effect ("subtle", "medium", "strong")
+            motion_type (str): Motion preset from motion.MOTION_PRESETS ("subtle", "medium", "strong")
             fps (int): Frames per second for output video
+            streaming (bool): Pipe raw frames into ffmpeg instead of writing JPEG frames to disk
+            quality (str): Encoder quality tier from encoder_profiles.ENCODER_PROFILES (None for default)
+            codec (str): Codec from encoder_profiles.CODECS overriding the tier's codec
+            segments (int): Number of segments rendered in parallel processes
+                (None to segment long clips automatically, 1 to disable)
+            previews (bool): Also encode a preview proxy and an animated poster from the same
+                frames, see get_preview_paths
             
         Returns:
             str: Path to the output video file
@@ -59,99 +109,415 @@ class ImageToVideoConverter:
                 image = cv2.cvtColor(np.array(image_path), cv2.COLOR_RGB2BGR)
             else:
                 raise ValueError("Image must be a PIL Image or valid file path")
-                
+            
             # Get image dimensions
             height, width = image.shape[:2]
             
-            # Create temporary directory for frames
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Generate frames with motion effect
-                total_frames = duration * fps
-                logger.info(f"Generating {total_frames} frames with {motion_type} motion")
-                
-                for i in range(total_frames):
-                    # Calculate progress percentage
-                    progress = i / total_frames
-                    
-                    # Apply motion effect based on type
-                    if motion_type == "subtle":
-                        # Subtle zoom and pan
-                        zoom_factor = 1.0 + 0.05 * np.sin(progress * np.pi)
-                        pan_x = int(width * 0.02 * np.sin(progress * 2 * np.pi))
-                        pan_y = int(height * 0.02 * np.cos(progress * 2 * np.pi))
-                    elif motion_type == "medium":
-                        # Medium zoom and pan
-                        zoom_factor = 1.0 + 0.1 * np.sin(progress * np.pi)
-                        pan_x = int(width * 0.05 * np.sin(progress * 2 * np.pi))
-                        pan_y = int(height * 0.05 * np.cos(progress * 2 * np.pi))
-                    elif motion_type == "strong":
-                        # Strong zoom and pan
-                        zoom_factor = 1.0 + 0.15 * np.sin(progress * np.pi)
-                        pan_x = int(width * 0.1 * np.sin(progress * 2 * np.pi))
-                        pan_y = int(height * 0.1 * np.cos(progress * 2 * np.pi))
-                    else:
-                        raise ValueError(f"Unknown motion type: {motion_type}")
-                    
-                    # Apply zoom
-                    zoomed_width = int(width / zoom_factor)
-                    zoomed_height = int(height / zoom_factor)
-                    
-                    # Calculate crop region
-                    x1 = (width - zoomed_width) // 2 + pan_x
-                    y1 = (height - zoomed_height) // 2 + pan_y
-                    x2 = x1 + zoomed_width
-                    y2 = y1 + zoomed_height
-                    
-                    # Ensure crop region is within image bounds
-                    x1 = max(0, min(x1, width - zoomed_width))
-                    y1 = max(0, min(y1, height - zoomed_height))
-                    x2 = min(width, max(x2, zoomed_width))
-                    y2 = min(height, max(y2, zoomed_height))
-                    
-                    # Crop and resize
-                    cropped = image[y1:y2, x1:x2]
-                    frame = cv2.resize(cropped, (width, height))
-                    
-                    # Save frame
-                    frame_path = os.path.join(temp_dir, f"frame_{i:04d}.jpg")
-                    cv2.imwrite(frame_path, frame)
-                
-                # Generate unique output filename
-                output_filename = f"video_{uuid.uuid4()}.mp4"
-                output_path = os.path.join(self.output_dir, output_filename)
-                
-                # Use ffmpeg to create video from frames
-                logger.info(f"Creating video from {total_frames} frames")
-                ffmpeg_cmd = [
-                    "ffmpeg",
-                    "-y",  # Overwrite output file if it exists
-                    "-framerate", str(fps),
-                    "-i", os.path.join(temp_dir, "frame_%04d.jpg"),
-                    "-c:v", "libx264",
-                    "-profile:v", "high",
-                    "-crf", "18",  # High quality
-                    "-pix_fmt", "yuv420p",
-                    output_path
-                ]
-                
-                # Run ffmpeg
-                subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                
+            # Generate frames with motion effect
+            total_frames = duration * fps
+            logger.info(f"Generating {total_frames} frames with {motion_type} motion")
+            matrices = compute_trajectory(motion_type, total_frames, width, height)
+            
+            # Generate unique output filename
+            output_filename = f"video_{uuid.uuid4()}.{get_output_extension(quality, codec)}"
+            output_path = os.path.join(self.output_dir, output_filename)
+            
+            if segments is None:
+                segments = self._get_segment_count(duration)
+            if segments > 1:
+                self._encode_segments(image, matrices, fps, output_path, segments, quality, codec, previews)
                 logger.info(f"Video created successfully at {output_path}")
                 return output_path
+            
+            frames = render_frames(image, matrices, self.render_workers)
+            encoder_args = build_encoder_args(quality, codec, self.encoder_threads, still_image=True)
+            extra_outputs = self._get_preview_outputs(output_path, width, height) if previews else None
+            if streaming:
+                self._encode_frame_stream(frames, width, height, fps, output_path, encoder_args,
+                                          extra_outputs=extra_outputs)
+            else:
+                self._encode_frame_files(frames, fps, output_path, encoder_args, extra_outputs=extra_outputs)
+            
+            logger.info(f"Video created successfully at {output_path}")
+            return output_path
                 
         except Exception as e:
             logger.error(f"Error animating image: {str(e)}")
             raise
     
-    def face_swap_video(self, face_image_path, target_video_path):
+    def animate_batch(self, items, fps=30, quality=None, codec=None, previews=False, workers=None,
+                      progress_callback=None):
+        """
+        Animate many images and motion presets in one pass
+        
+        Each distinct source image is decoded once into shared memory, so
+        every variant in every worker process renders from the same
+        in-memory copy. The clips are rendered and encoded in parallel
+        processes, one clip per process at a time, with the CPUs shared
+        between them. Clips are not split into segments, the parallelism
+        comes from the batch instead.
+        
+        Args:
+            items (list): (image_path, motion_type, duration) tuples
+            fps (int): Frames per second for the output videos
+            quality (str): Encoder quality tier from encoder_profiles.ENCODER_PROFILES (None for default)
+            codec (str): Codec from encoder_profiles.CODECS overriding the tier's codec
+            previews (bool): Also encode a preview proxy and an animated poster for every clip
+            workers (int): Clips encoded at once (None for the CPU count, capped at the batch size)
+            progress_callback (callable): Called as progress_callback(completed, total) after each clip
+            
+        Returns:
+            list: Paths to the output videos, in the order of items
+        """
+        try:
+            if not items:
+                return []
+            
+            # Decode every source once, the workers map these shapes onto shared memory
+            shapes = {}
+            buffers = []
+            try:
+                for image_path, motion_type, _ in items:
+                    get_motion_preset(motion_type)
+                    if image_path not in shapes:
+                        image = cv2.imread(image_path)
+                        if image is None:
+                            raise ValueError(f"Could not load image from {image_path}")
+                        buffer = shared_memory.SharedMemory(create=True, size=image.nbytes)
+                        buffers.append(buffer)
+                        np.ndarray(image.shape, dtype=image.dtype, buffer=buffer.buf)[:] = image
+                        shapes[image_path] = (buffer.name, image.shape, image.dtype.str)
+                
+                return self._render_batch(items, shapes, fps, quality, codec, previews, workers,
+                                          progress_callback)
+            finally:
+                for buffer in buffers:
+                    buffer.close()
+                    buffer.unlink()
+            
+        except Exception as e:
+            logger.error(f"Error animating batch: {str(e)}")
+            raise
+    
+    def _render_batch(self, items, shapes, fps, quality, codec, previews, workers, progress_callback):
+        """
+        Render and encode the clips of animate_batch in a process pool
+        
+        Args:
+            items (list): (image_path, motion_type, duration) tuples
+            shapes (dict): (shared memory name, shape, dtype) of each decoded source by path
+            fps (int): Frames per second for the output videos
+            quality (str): Encoder quality tier
+            codec (str): Codec override
+            previews (bool): Also encode a preview proxy and an animated poster for every clip
+            workers (int): Clips encoded at once (None for the CPU count)
+            progress_callback (callable): Called as progress_callback(completed, total) after each clip
+            
+        Returns:
+            list: Paths to the output videos, in the order of items
+        """
+        cpus = os.cpu_count() or 1
+        workers = max(1, min(workers or cpus, len(items)))
+        threads = max(1, cpus // workers)
+        encoder_args = build_encoder_args(quality, codec, self.encoder_threads or threads, still_image=True)
+        extension = get_output_extension(quality, codec)
+        
+        logger.info(f"Animating {len(items)} clips from {len(shapes)} images in {workers} processes")
+        output_paths = []
+        futures = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_get_worker_context(),
+                                 initializer=_init_batch_worker, initargs=(shapes,)) as executor:
+            for image_path, motion_type, duration in items:
+                output_path = os.path.join(self.output_dir, f"video_{uuid.uuid4()}.{extension}")
+                height, width = shapes[image_path][1][:2]
+                extra_outputs = self._get_preview_outputs(output_path, width, height, threads) if previews else None
+                output_paths.append(output_path)
+                futures.append(executor.submit(_render_batch_item, image_path, motion_type, duration, fps,
+                                               output_path, encoder_args, threads, extra_outputs))
+            
+            try:
+                for completed, future in enumerate(as_completed(futures), 1):
+                    future.result()
+                    if progress_callback:
+                        progress_callback(completed, len(futures))
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        logger.info(f"Created {len(output_paths)} videos in {self.output_dir}")
+        return output_paths
+    
+    def _get_segment_count(self, duration):
         """
-        Placeholder for face swap functionality
-        In the MVP, this will be a simplified implementation
+        Choose how many parallel segments to render a clip in
+        
+        Args:
+            duration (int): Clip duration in seconds
+            
+        Returns:
+            int: Number of segments, 1 for a single serial encode
+        """
+        cpus = os.cpu_count() or 1
+        if duration < SEGMENTED_MIN_DURATION or cpus < 2:
+            return 1
+        return max(1, min(cpus, int(duration // MIN_SEGMENT_DURATION)))
+    
+    def _encode_segments(self, image, matrices, fps, output_path, segments, quality, codec, previews=False):
+        """
+        Render and encode parts of the timeline in parallel processes, then join them
+        
+        The trajectory is computed once for the whole clip and split, so the
+        motion is continuous across segment boundaries. All segments use the
+        same encoder settings and are joined without re-encoding by ffmpeg's
+        concat demuxer. Preview proxies are segmented and joined the same
+        way, and the poster comes from the first segment.
+        
+        Args:
+            image (numpy.ndarray): Source image in BGR
+            matrices (numpy.ndarray): Affine matrices for every frame of the clip
+            fps (int): Frames per second
+            output_path (str): Path of the output video
+            segments (int): Number of segments
+            quality (str): Encoder quality tier
+            codec (str): Codec override
+            previews (bool): Also encode the preview proxy and poster
+        """
+        # Share the CPUs between the segments instead of oversubscribing them
+        cpus = os.cpu_count() or 1
+        threads = max(1, cpus // segments)
+        encoder_args = build_encoder_args(quality, codec, self.encoder_threads or threads, still_image=True)
+        extension = os.path.splitext(output_path)[1]
+        height, width = image.shape[:2]
+        
+        logger.info(f"Rendering {len(matrices)} frames as {segments} parallel segments")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            segment_paths = [os.path.join(temp_dir, f"segment_{i:03d}{extension}") for i in range(segments)]
+            bounds = [round(i * len(matrices) / segments) for i in range(segments + 1)]
+            
+            # MIN_SEGMENT_DURATION exceeds the poster duration, so the first segment holds the whole poster
+            segment_outputs = [
+                self._get_preview_outputs(segment_paths[i], width, height, threads, poster=i == 0) if previews else None
+                for i in range(segments)
+            ]
+            
+            # The image and matrices are pickled to each worker, a few MB at most
+            with ProcessPoolExecutor(max_workers=segments, mp_context=_get_worker_context()) as executor:
+                futures = [
+                    executor.submit(_render_segment, image, matrices[bounds[i]:bounds[i + 1]], fps,
+                                    segment_paths[i], encoder_args, threads, segment_outputs[i])
+                    for i in range(segments)
+                ]
+                for future in futures:
+                    future.result()
+            
+            # Join the segments losslessly
+            self._concat_videos(segment_paths, output_path)
+            
+            if previews:
+                preview_outputs = self._get_preview_outputs(output_path, width, height)
+                proxy_path = preview_outputs[0][1]
+                self._concat_videos([outputs[0][1] for outputs in segment_outputs], proxy_path)
+                os.replace(segment_outputs[0][1][1], preview_outputs[1][1])
+    
+    def _concat_videos(self, video_paths, output_path):
+        """
+        Join videos with identical encoder settings without re-encoding
+        
+        Args:
+            video_paths (list): Paths of the parts in order
+            output_path (str): Path of the joined video
+        """
+        list_path = f"{os.path.splitext(video_paths[0])[0]}_concat.txt"
+        with open(list_path, 'w') as f:
+            for video_path in video_paths:
+                f.write(f"file '{video_path}'\n")
+        
+        concat_cmd = [
+            "ffmpeg",
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            *(["-movflags", "+faststart"] if output_path.endswith(".mp4") else []),
+            output_path
+        ]
+        try:
+            subprocess.run(concat_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        finally:
+            os.remove(list_path)
+    
+    def _get_preview_outputs(self, output_path, width, height, threads=None, poster=True):
+        """
+        Build the extra encoder outputs writing the previews of a video
+        
+        Args:
+            output_path (str): Path of the full-quality video
+            width (int): Frame width
+            height (int): Frame height
+            threads (int): Proxy encoder threads (None for the converter's setting)
+            poster (bool): Include the animated poster
+            
+        Returns:
+            list: (encoder_args, path) pairs, the proxy first
+        """
+        stem = os.path.splitext(output_path)[0]
+        outputs = [(build_proxy_args(width, height, threads or self.encoder_threads), f"{stem}_preview.mp4")]
+        if poster:
+            outputs.append((build_poster_args(width, height, self.poster_format), f"{stem}_poster.{self.poster_format}"))
+        return outputs
+    
+    def get_preview_paths(self, video_path):
+        """
+        Find the previews written alongside a video
+        
+        Args:
+            video_path (str): Path of the full-quality video
+            
+        Returns:
+            dict: Existing preview files as 'preview_path' and 'poster_path'
+        """
+        stem = os.path.splitext(video_path)[0]
+        previews = {}
+        if os.path.exists(f"{stem}_preview.mp4"):
+            previews["preview_path"] = f"{stem}_preview.mp4"
+        for poster_format in POSTER_FORMATS:
+            if os.path.exists(f"{stem}_poster.{poster_format}"):
+                previews["poster_path"] = f"{stem}_poster.{poster_format}"
+                break
+        return previews
+    
+    def _encode_frame_stream(self, frames, width, height, fps, output_path, encoder_args,
+                             audio_path=None, audio_args=None, extra_outputs=None):
+        """
+        Encode frames by piping raw BGR pixels into ffmpeg's stdin
+        
+        Frames never touch the disk and are not JPEG-compressed before the
+        final encode, so there is no intermediate generation loss.
+        
+        Args:
+            frames (iterable): BGR frames of identical size
+            width (int): Frame width
+            height (int): Frame height
+            fps (int or str): Frames per second, or an exact rational rate like "30000/1001"
+            output_path (str): Path of the output video
+            encoder_args (list): ffmpeg encoder arguments from build_encoder_args
+            audio_path (str): File whose first audio stream is muxed into the output (None for no audio)
+            audio_args (list): ffmpeg audio arguments from build_audio_args
+            extra_outputs (list): (encoder_args, path) pairs encoded from the same frames,
+                such as the previews from _get_preview_outputs
+        """
+        ffmpeg_cmd = [
+            "ffmpeg",
+            "-y",  # Overwrite output file if it exists
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-framerate", str(fps),
+            "-i", "-"
+        ]
+        if audio_path:
+            ffmpeg_cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0", *(audio_args or ["-c:a", "copy"])]
+        ffmpeg_cmd += [*encoder_args, output_path]
+        for extra_args, extra_path in extra_outputs or []:
+            ffmpeg_cmd += [*extra_args, extra_path]
+        
+        logger.info(f"Streaming frames into ffmpeg at {width}x{height}")
+        process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        
+        # Drain stderr concurrently so a chatty ffmpeg cannot block on a full pipe
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        
+        failed = False
+        try:
+            for frame in frames:
+                process.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except BrokenPipeError:
+            # ffmpeg exited early, its error output explains why
+            pass
+        except BaseException:
+            # Closing stdin would let ffmpeg finalize a truncated video, stop it instead
+            failed = True
+            process.kill()
+            raise
+        finally:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            returncode = process.wait()
+            stderr_reader.join()
+            
+            # Never leave partial outputs behind where they look like finished videos
+            if failed or returncode != 0:
+                for path in [output_path] + [extra_path for _, extra_path in extra_outputs or []]:
+                    if os.path.exists(path):
+                        os.remove(path)
+        
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, ffmpeg_cmd, stderr=b"".join(stderr_chunks))
+    
+    def _encode_frame_files(self, frames, fps, output_path, encoder_args, extra_outputs=None):
+        """
+        Encode frames by writing them as JPEG files for ffmpeg to read back
+        
+        Args:
+            frames (iterable): BGR frames of identical size
+            fps (int): Frames per second
+            output_path (str): Path of the output video
+            encoder_args (list): ffmpeg encoder arguments from build_encoder_args
+            extra_outputs (list): (encoder_args, path) pairs encoded from the same frames
+        """
+        # Create temporary directory for frames
+        with tempfile.TemporaryDirectory() as temp_dir:
+            total_frames = 0
+            for i, frame in enumerate(frames):
+                # Save frame
+                frame_path = os.path.join(temp_dir, f"frame_{i:04d}.jpg")
+                cv2.imwrite(frame_path, frame)
+                total_frames += 1
+            
+            # Use ffmpeg to create video from frames
+            logger.info(f"Creating video from {total_frames} frames")
+            ffmpeg_cmd = [
+                "ffmpeg",
+                "-y",  # Overwrite output file if it exists
+                "-framerate", str(fps),
+                "-i", os.path.join(temp_dir, "frame_%04d.jpg"),
+                *encoder_args,
+                output_path
+            ]
+            for extra_args, extra_path in extra_outputs or []:
+                ffmpeg_cmd += [*extra_args, extra_path]
+            
+            # Run ffmpeg
+            subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    def face_swap_video(self, face_image_path, target_video_path, quality=None, codec=None, workers=None,
+                        keep_timing=True, keep_audio=True, previews=False):
+        """
+        Swap the face from an image onto the faces in a video
+        
+        Frames stream from an ffmpeg decoder through the face swapper into
+        an ffmpeg encoder without touching the disk. Faces are detected on
+        keyframes and tracked in between, see models.face_swapper. Only the
+        video stream is re-encoded: the target's audio is remuxed into the
+        output as is, unless the output container cannot carry its codec.
         
         Args:
             face_image_path (str): Path to the face image
             target_video_path (str): Path to the target video
+            quality (str): Encoder quality tier from encoder_profiles.ENCODER_PROFILES (None for default)
+            codec (str): Codec from encoder_profiles.CODECS overriding the tier's codec
+            workers (int): Threads blending swapped faces into frames, output order is preserved (None or 1 for serial)
+            keep_timing (bool): Keep the target's frame rate instead of resampling to 30 fps
+            keep_audio (bool): Carry the target's audio stream over to the output
+            previews (bool): Also encode a preview proxy and an animated poster from the same
+                frames, see get_preview_paths
             
         Returns:
             str: Path to the output video file
@@ -159,70 +525,225 @@ class ImageToVideoConverter:
         try:
             logger.info(f"Face swap requested for {face_image_path} onto {target_video_path}")
             
-            # For MVP, we'll create a placeholder implementation
-            # that simply adds a watermark to the video
+            face_img = cv2.imread(face_image_path)
+            if face_img is None:
+                raise ValueError(f"Could not load face image from {face_image_path}")
+            
+            # The source identity is computed once for the whole video
+            face_swapper = self.face_swapper
+            source_face = face_swapper.get_source_face(face_img)
             
             # Generate unique output filename
-            output_filename = f"faceswap_{uuid.uuid4()}.mp4"
+            output_filename = f"faceswap_{uuid.uuid4()}.{get_output_extension(quality, codec)}"
             output_path = os.path.join(self.output_dir, output_filename)
             
-            # Create temporary directory for frames
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Extract frames from target video
-                extract_cmd = [
-                    "ffmpeg",
-                    "-i", target_video_path,
-                    "-vf", "fps=30",
-                    os.path.join(temp_dir, "frame_%04d.jpg")
-                ]
-                subprocess.run(extract_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                
-                # Load face image as watermark
-                face_img = cv2.imread(face_image_path)
-                if face_img is None:
-                    raise ValueError(f"Could not load face image from {face_image_path}")
-                
-                # Resize face image to small watermark
-                face_img = cv2.resize(face_img, (100, 100))
-                
-                # Process each frame
-                frames = sorted(os.listdir(temp_dir))
-                for frame_file in frames:
-                    if not frame_file.endswith('.jpg'):
-                        continue
-                        
-                    frame_path = os.path.join(temp_dir, frame_file)
-                    frame = cv2.imread(frame_path)
-                    
-                    # Add face image as watermark
-                    h, w = frame.shape[:2]
-                    fh, fw = face_img.shape[:2]
-                    frame[h-fh-10:h-10, w-fw-10:w-10] = face_img
-                    
-                    # Save modified frame
-                    cv2.imwrite(frame_path, frame)
-                
-                # Create video from modified frames
-                create_cmd = [
-                    "ffmpeg",
-                    "-y",
-                    "-framerate", "30",
-                    "-i", os.path.join(temp_dir, "frame_%04d.jpg"),
-                    "-c:v", "libx264",
-                    "-profile:v", "high",
-                    "-crf", "18",
-                    "-pix_fmt", "yuv420p",
-                    output_path
-                ]
-                subprocess.run(create_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                
-                logger.info(f"Face swap video created at {output_path}")
-                logger.warning("Note: This is a placeholder implementation for the MVP")
-                return output_path
+            video_info = self._probe_video(target_video_path)
+            width, height = video_info["width"], video_info["height"]
+            
+            # Decoding to raw video yields frames at the source's nominal rate,
+            # encoding at that exact rational rate keeps the frame timing and A/V sync
+            fps = video_info["frame_rate"] if keep_timing and video_info["frame_rate"] else 30
+            
+            audio_path, audio_args = None, None
+            if keep_audio and video_info["audio_codec"]:
+                audio_path = target_video_path
+                audio_args = build_audio_args(video_info["audio_codec"], quality, codec)
+            
+            frames = self._decode_frames(target_video_path, width, height, fps=None if keep_timing else 30)
+            frames = face_swapper.swap_frames(frames, source_face, workers=workers)
+            
+            self._encode_frame_stream(frames, width, height, fps, output_path,
+                                      build_encoder_args(quality, codec, self.encoder_threads),
+                                      audio_path=audio_path, audio_args=audio_args,
+                                      extra_outputs=self._get_preview_outputs(output_path, width, height) if previews else None)
+            
+            logger.info(f"Face swap video created at {output_path}")
+            return output_path
                 
         except Exception as e:
             logger.error(f"Error in face swap: {str(e)}")
             raise
+    
+    def _probe_video(self, video_path):
+        """
+        Read the stream properties of a video with ffprobe
+        
+        Args:
+            video_path (str): Path to the video
+            
+        Returns:
+            dict: width, height, fps, frame_rate and duration of the first video
+                stream, and audio_codec of the first audio stream (None without audio).
+                frame_rate is the exact rational rate string, or None if unknown
+        """
+        probe_cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-show_entries", "stream=codec_type,codec_name,width,height,r_frame_rate,avg_frame_rate:format=duration",
+            "-of", "json",
+            video_path
+        ]
+        result = subprocess.run(probe_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        probe = json.loads(result.stdout)
+        
+        streams = probe.get("streams", [])
+        video_streams = [s for s in streams if s.get("codec_type") == "video"]
+        audio_streams = [s for s in streams if s.get("codec_type") == "audio"]
+        if not video_streams:
+            raise ValueError(f"No video stream found in {video_path}")
+        stream = video_streams[0]
+        
+        numerator, _, denominator = stream.get("avg_frame_rate", "0/1").partition("/")
+        fps = float(numerator) / float(denominator) if denominator and float(denominator) else 0.0
+        
+        # r_frame_rate is the rate ffmpeg emits raw frames at, avg_frame_rate may be fractional noise
+        frame_rate = stream.get("r_frame_rate") or stream.get("avg_frame_rate")
+        numerator, _, denominator = (frame_rate or "0/0").partition("/")
+        if not float(numerator) or (denominator and not float(denominator)):
+            frame_rate = None
+        
+        return {
+            "width": int(stream["width"]),
+            "height": int(stream["height"]),
+            "fps": fps,
+            "frame_rate": frame_rate,
+            "duration": float(probe.get("format", {}).get("duration", 0) or 0),
+            "audio_codec": audio_streams[0].get("codec_name") if audio_streams else None
+        }
+    
+    def _decode_frames(self, video_path, width, height, fps=None):
+        """
+        Decode a video into raw BGR frames read from ffmpeg's stdout
+        
+        Args:
+            video_path (str): Path to the video
+            width (int): Frame width
+            height (int): Frame height
+            fps (float): Resample to this frame rate (None to keep the source timing)
+            
+        Yields:
+            numpy.ndarray: Writable BGR frames
+        """
+        decode_cmd = ["ffmpeg", "-v", "error", "-i", video_path]
+        if fps:
+            decode_cmd += ["-vf", f"fps={fps}"]
+        decode_cmd += ["-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+        
+        process = subprocess.Popen(decode_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stderr_chunks = []
+        stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stderr_reader.start()
+        
+        frame_size = width * height * 3
+        finished = False
+        try:
+            while True:
+                buffer = bytearray(frame_size)
+                view = memoryview(buffer)
+                filled = 0
+                while filled < frame_size:
+                    count = process.stdout.readinto(view[filled:])
+                    if not count:
+                        break
+                    filled += count
+                
+                if filled < frame_size:
+                    finished = True
+                    break
+                
+                yield np.frombuffer(buffer, dtype=np.uint8).reshape(height, width, 3)
+        finally:
+            if not finished:
+                # The consumer stopped early, no need to decode the rest
+                process.kill()
+            process.stdout.close()
+            returncode = process.wait()
+            stderr_reader.join()
+        
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, decode_cmd, stderr=b"".join(stderr_chunks))
+
+def _get_worker_context():
+    """
+    Get the multiprocessing context for render worker processes
+    
+    Renders run from job worker threads in processes that may also be
+    running torch and other jobs, and a child forked while another thread
+    holds a lock or an OpenMP pool deadlocks. forkserver children are forked
+    from a separate single-threaded server instead. Like spawned processes
+    they import the main module, so entry points keep their side effects
+    under if __name__ == '__main__'.
+    
+    Returns:
+        multiprocessing.context.BaseContext: forkserver context
+    """
+    context = multiprocessing.get_context("forkserver")
+    # Loaded once in the server rather than in every worker, only takes effect before the server starts
+    context.set_forkserver_preload([__name__])
+    return context
+
+def _render_segment(image, matrices, fps, output_path, encoder_args, render_workers, extra_outputs=None):
+    """
+    Render and encode one segment of an animation in a worker process
+    
+    Args:
+        image (numpy.ndarray): Source image in BGR
+        matrices (numpy.ndarray): Affine matrices for the frames of this segment
+        fps (int): Frames per second
+        output_path (str): Path of the segment video
+        encoder_args (list): ffmpeg encoder arguments shared by all segments
+        render_workers (int): Render threads for this segment
+        extra_outputs (list): (encoder_args, path) pairs encoded from the same frames
+    """
+    # Parallelism comes from the segments, keep OpenCV's own pool out of the way
+    cv2.setNumThreads(1)
+    
+    height, width = image.shape[:2]
+    converter = ImageToVideoConverter(output_dir=os.path.dirname(output_path), render_workers=render_workers)
+    converter._encode_frame_stream(render_frames(image, matrices, render_workers), width, height, fps,
+                                   output_path, encoder_args, extra_outputs=extra_outputs)
+
+# Source images of the running batch and their shared memory, set in each batch worker
+_batch_sources = None
+_batch_buffers = None
+
+def _init_batch_worker(shapes):
+    """
+    Map the batch's decoded source images from shared memory in a worker process
+    
+    Args:
+        shapes (dict): (shared memory name, shape, dtype) of each decoded BGR image by path
+    """
+    global _batch_sources, _batch_buffers
+    _batch_sources = {}
+    _batch_buffers = []
+    for image_path, (name, shape, dtype) in shapes.items():
+        buffer = shared_memory.SharedMemory(name=name)
+        _batch_buffers.append(buffer)
+        image = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer.buf)
+        # Renders only read the source, a stray write must not change the other clips
+        image.flags.writeable = False
+        _batch_sources[image_path] = image
+
+def _render_batch_item(image_path, motion_type, duration, fps, output_path, encoder_args, render_workers,
+                       extra_outputs=None):
+    """
+    Render and encode one clip of an animation batch in a worker process
+    
+    Args:
+        image_path (str): Path identifying the source image in the batch
+        motion_type (str): Motion preset from motion.MOTION_PRESETS
+        duration (int): Duration of the clip in seconds
+        fps (int): Frames per second
+        output_path (str): Path of the output video
+        encoder_args (list): ffmpeg encoder arguments shared by the batch
+        render_workers (int): Render threads for this clip
+        extra_outputs (list): (encoder_args, path) pairs encoded from the same frames
+    """
+    image = _batch_sources[image_path]
+    height, width = image.shape[:2]
+    matrices = compute_trajectory(motion_type, int(duration * fps), width, height)
+    _render_segment(image, matrices, fps, output_path, encoder_args, render_workers, extra_outputs)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,44 @@
+"""
+Job worker entry point for AI Influencer Content Generator
+Runs queued background jobs in a dedicated process, separate from the web server
+"""
+
+import os
+import signal
+import logging
+import argparse
+import threading
+
+from app import job_manager, start_job_workers
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+def main():
+    """
+    Start the job workers and run until SIGINT or SIGTERM
+    """
+    parser = argparse.ArgumentParser(description="Run background jobs submitted through the web app")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get('JOB_WORKERS', 2)),
+                        help="Number of job worker threads (default: JOB_WORKERS or 2)")
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        parser.error("--workers must be at least 1")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    start_job_workers(args.workers)
+    logger.info(f"Job worker process {os.getpid()} running {args.workers} workers")
+
+    stop_event.wait()
+
+    # Running jobs finish first, anything interrupted is requeued by the next worker to start
+    logger.info("Stopping job workers")
+    job_manager.stop()
+
+if __name__ == '__main__':
+    main()